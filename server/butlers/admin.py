@@ -201,10 +201,10 @@ class ButlerModelRequestAdmin(admin.ModelAdmin):
 
 @admin.register(ButlerCoupon)
 class ButlerCouponAdmin(admin.ModelAdmin):
-    list_display = ['id', 'code', 'name', 'description', 'discount_type', 'discount_rate', 'max_discount', 'discount', 'valid_from', 'valid_to', 'is_active']
+    list_display = ['id', 'code', 'name', 'description', 'discount_type', 'discount_rate', 'max_discount', 'discount', 'issued_count', 'redeemed_count', 'valid_from', 'valid_to', 'is_active']
     list_filter = ['is_active', 'valid_from', 'valid_to', 'discount_type']
     search_fields = ['code', 'name', 'description']
-    readonly_fields = ['code', 'created_at', 'modified_at']
+    readonly_fields = ['code', 'issued_count', 'redeemed_count', 'created_at', 'modified_at']
     list_editable = ['is_active']
 
     fieldsets = (
@@ -221,7 +221,7 @@ class ButlerCouponAdmin(admin.ModelAdmin):
             'fields': ('valid_from', 'valid_to', 'is_active')
         }),
         ('System Information', {
-            'fields': ('code', 'created_at', 'modified_at'),
+            'fields': ('code', 'issued_count', 'redeemed_count', 'created_at', 'modified_at'),
             'classes': ('collapse',)
         }),
     )
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.4 on 2025-11-14 10:20
+
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('butlers', '0002_butlerrequest_description'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='butlercoupon',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['brand_ids'], name='butler_coupon_brand_ids_idx', opclasses=['jsonb_path_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='butlercoupon',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['model_ids'], name='butler_coupon_model_ids_idx', opclasses=['jsonb_path_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='butlercoupon',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['car_ids'], name='butler_coupon_car_ids_idx', opclasses=['jsonb_path_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='butlercoupon',
+            index=models.Index(condition=models.Q(('brand_ids', []), ('car_ids', []), ('model_ids', [])), fields=['id'], name='butler_coupon_untargeted_idx'),
+        ),
+        # 대상 미지정 조건(세 목록 모두 빈 값)의 행 수를 플래너가 독립 가정으로 과대 추정하지 않도록 다변량 통계 추가
+        migrations.RunSQL(
+            sql="CREATE STATISTICS butler_coupon_targets_stats (mcv) ON brand_ids, model_ids, car_ids FROM butlers_butlercoupon",
+            reverse_sql="DROP STATISTICS IF EXISTS butler_coupon_targets_stats",
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.4 on 2025-11-15 09:42
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_coupon_counts(apps, schema_editor):
+    ButlerCoupon = apps.get_model('butlers', 'ButlerCoupon')
+    ButlerUserCoupon = apps.get_model('butlers', 'ButlerUserCoupon')
+
+    counts = ButlerUserCoupon.objects.filter(coupon=OuterRef('pk')).values('coupon')
+    ButlerCoupon.objects.update(
+        issued_count=Coalesce(Subquery(counts.annotate(count=Count('id')).values('count')), 0),
+        redeemed_count=Coalesce(Subquery(counts.annotate(count=Count('id', filter=Q(used_at__isnull=False))).values('count')), 0),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('butlers', '0003_butlercoupon_butler_coupon_brand_ids_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='butlercoupon',
+            name='issued_count',
+            field=models.IntegerField(default=0, editable=False, verbose_name='Issued Count'),
+        ),
+        migrations.AddField(
+            model_name='butlercoupon',
+            name='redeemed_count',
+            field=models.IntegerField(default=0, editable=False, verbose_name='Redeemed Count'),
+        ),
+        migrations.RunPython(backfill_coupon_counts, migrations.RunPython.noop),
+    ]
@@ -1,17 +1,41 @@
 # butlers/models.py
 app_name = 'butlers'
 
-import random, string
-
 from datetime import timedelta
 
-from django.db import models
+from django.db import models, transaction
 from django.utils import timezone
 from django.core.exceptions import ValidationError
+from django.contrib.postgres.indexes import GinIndex
 
+from server.codes import generate_unique_codes
 from accounts.models import User
 from cars.models import Car, Model
 
+class ButlerCouponQuerySet(models.QuerySet):
+    def applicable_to(self, car):
+        # 대상 지정이 없는 쿠폰 + 차량/모델/브랜드 중 하나라도 대상으로 지정한 쿠폰
+        # 각 조건은 JSON 목록 GIN 인덱스(@>)와 미지정 쿠폰 부분 인덱스로 처리된다.
+        return self.filter(
+            models.Q(brand_ids=[], model_ids=[], car_ids=[]) |
+            models.Q(brand_ids__contains=[car.model.brand_id]) |
+            models.Q(model_ids__contains=[car.model_id]) |
+            models.Q(car_ids__contains=[car.id])
+        )
+
+    def valid_now(self):
+        now = timezone.now()
+        return self.filter(is_active=True, valid_from__lte=now, valid_to__gte=now)
+
+
+class ButlerUserCouponQuerySet(models.QuerySet):
+    def usable(self):
+        return self.filter(is_active=True, used_at__isnull=True, coupon__in=ButlerCoupon.objects.valid_now())
+
+    def applicable_to(self, car):
+        return self.filter(coupon__in=ButlerCoupon.objects.applicable_to(car))
+
+
 class ButlerCoupon(models.Model):
     TYPE_CHOICES = [
         ('PERCENTAGE', 'Percentage'),
@@ -37,6 +61,8 @@ class ButlerCoupon(models.Model):
 
     usage_limit = models.IntegerField(verbose_name="Usage Limit", default=1)                            # Usage Limit
     usage_limit_per_user = models.IntegerField(verbose_name="Usage Limit Per User", default=1)          # Usage Limit Per User
+    issued_count = models.IntegerField(verbose_name="Issued Count", default=0, editable=False)          # Issued Count (<= Usage Limit)
+    redeemed_count = models.IntegerField(verbose_name="Redeemed Count", default=0, editable=False)      # Redeemed Count
 
     valid_from = models.DateTimeField(verbose_name="Valid From", default=timezone.now)                  # Valid From
     valid_to = models.DateTimeField(verbose_name="Valid To")                                            # Valid To
@@ -46,20 +72,24 @@ class ButlerCoupon(models.Model):
 
     is_active = models.BooleanField(default=True)
 
+    objects = ButlerCouponQuerySet.as_manager()
+
     class Meta:
         verbose_name = "Coupon"
         verbose_name_plural = "Coupons"
         ordering = ['-created_at']
+        indexes = [
+            GinIndex(fields=['brand_ids'], name='butler_coupon_brand_ids_idx', opclasses=['jsonb_path_ops']),
+            GinIndex(fields=['model_ids'], name='butler_coupon_model_ids_idx', opclasses=['jsonb_path_ops']),
+            GinIndex(fields=['car_ids'], name='butler_coupon_car_ids_idx', opclasses=['jsonb_path_ops']),
+            models.Index(fields=['id'], name='butler_coupon_untargeted_idx', condition=models.Q(brand_ids=[], model_ids=[], car_ids=[])),
+        ]
 
     def __str__(self):
         return f"{self.name} ({self.code})"
 
     def generate_code(self):
-        characters = string.ascii_uppercase + string.digits
-        while True:
-            code = ''.join(random.choice(characters) for _ in range(8))
-            if not ButlerCoupon.objects.filter(code=code).exists():
-                return code
+        return generate_unique_codes(ButlerCoupon, 1)[0]
 
     def clean(self):
         # 할인 타입에 따른 필수 필드 검사
@@ -142,6 +172,8 @@ class ButlerUserCoupon(models.Model):
 
     is_active = models.BooleanField(default=True)
 
+    objects = ButlerUserCouponQuerySet.as_manager()
+
     class Meta:
         verbose_name = "Butler User Coupon"
         verbose_name_plural = "Butler User Coupons"
@@ -167,13 +199,22 @@ class ButlerUserCoupon(models.Model):
     def use_coupon(self):
         if not self.is_valid:
             raise ValueError("사용할 수 없는 쿠폰입니다.")
-        
-        self.used_at = timezone.now()
-        self.save()
+
+        # 미사용 -> 사용 전환과 사용 횟수 증가를 각각 조건부 UPDATE 한 번으로 처리해 동시에 사용해도 중복 집계되지 않는다.
+        used_at = timezone.now()
+        with transaction.atomic():
+            if not ButlerUserCoupon.objects.filter(pk=self.pk, used_at__isnull=True).update(used_at=used_at, modified_at=used_at):
+                raise ValueError("이미 사용된 쿠폰입니다.")
+            if not ButlerCoupon.objects.filter(pk=self.coupon_id, redeemed_count__lt=models.F('usage_limit')).update(redeemed_count=models.F('redeemed_count') + 1):
+                raise ValueError("쿠폰 사용 한도를 초과했습니다.")
+        self.used_at = used_at
 
     def return_coupon(self):
+        modified_at = timezone.now()
+        with transaction.atomic():
+            if ButlerUserCoupon.objects.filter(pk=self.pk, used_at__isnull=False).update(used_at=None, modified_at=modified_at):
+                ButlerCoupon.objects.filter(pk=self.coupon_id, redeemed_count__gt=0).update(redeemed_count=models.F('redeemed_count') - 1)
         self.used_at = None
-        self.save()
 
     def clean(self):
         # 쿠폰이 존재하는지 확인
@@ -184,31 +225,27 @@ class ButlerUserCoupon(models.Model):
         if not self.user:
             raise ValidationError("사용자를 선택해야 합니다.")
         
-        # 이미 같은 사용자가 같은 쿠폰을 가지고 있는지 확인 (새로 생성되는 경우에만)
-        if self.pk is None:  # 새로 생성되는 경우에만
-            if ButlerUserCoupon.objects.filter(user=self.user, coupon=self.coupon, used_at=None).exists():
+        # 보유 여부/사용자당 사용 제한 확인 (새로 생성되는 경우에만, 한 번의 집계 쿼리)
+        if self.pk is None:
+            counts = ButlerUserCoupon.objects.filter(user=self.user, coupon=self.coupon).aggregate(
+                total=models.Count('id'),
+                unused=models.Count('id', filter=models.Q(used_at__isnull=True)),
+            )
+            if counts['unused']:
                 raise ValidationError("이미 해당 쿠폰을 보유하고 있습니다.")
-        
-        # 쿠폰의 전체 사용 제한 확인 (현재 레코드 제외)
-        used_count = ButlerUserCoupon.objects.filter(
-            coupon=self.coupon,
-        ).exclude(pk=self.pk).count()
-        
-        if used_count >= self.coupon.usage_limit:
-            raise ValidationError(f"이 쿠폰은 이미 최대 사용 횟수({self.coupon.usage_limit}회)에 도달했습니다.")
-        
-        # 사용자당 사용 제한 확인 (현재 레코드 제외)
-        user_used_count = ButlerUserCoupon.objects.filter(
-            user=self.user,
-            coupon=self.coupon,
-        ).exclude(pk=self.pk).count()
-        
-        if user_used_count >= self.coupon.usage_limit_per_user:
-            raise ValidationError(f"이 쿠폰은 사용자당 최대 {self.coupon.usage_limit_per_user}회까지 사용할 수 있습니다.")
+            if counts['total'] >= self.coupon.usage_limit_per_user:
+                raise ValidationError(f"이 쿠폰은 사용자당 최대 {self.coupon.usage_limit_per_user}회까지 사용할 수 있습니다.")
 
     def save(self, *args, **kwargs):
         self.clean()
-        super().save(*args, **kwargs)
+        if self.pk is not None:
+            return super().save(*args, **kwargs)
+
+        # 쿠폰 전체 사용 제한: 발급 횟수 검사와 증가를 UPDATE ... WHERE issued_count < usage_limit 한 번으로 처리한다.
+        with transaction.atomic():
+            if not ButlerCoupon.objects.filter(pk=self.coupon_id, issued_count__lt=models.F('usage_limit')).update(issued_count=models.F('issued_count') + 1):
+                raise ValidationError(f"이 쿠폰은 이미 최대 사용 횟수({self.coupon.usage_limit}회)에 도달했습니다.")
+            super().save(*args, **kwargs)
 
 
 class ButlerRequest(models.Model):
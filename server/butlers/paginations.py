@@ -3,7 +3,15 @@ app_name = 'butler'
 
 from rest_framework.pagination import PageNumberPagination
 
+from server.paginations import KeysetPagination
+
 class ButlerPagination(PageNumberPagination):
     page_size = 20
     page_size_query_param = 'page_size'
-    max_page_size = 100
\ No newline at end of file
+    max_page_size = 100
+
+
+class ButlerCursorPagination(KeysetPagination):
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
@@ -146,6 +146,64 @@ class GarageSchema:
                     description="구독 가능한 상품만 표시",
                     examples=[OpenApiExample("사용 예시", value=True)]
                 ),
+                OpenApiParameter(
+                    name="date",
+                    type=OpenApiTypes.DATE,
+                    location=OpenApiParameter.QUERY,
+                    description="해당 날짜에 예약이 없는 차량만 표시 (여러 개 가능)",
+                    many=True,
+                    examples=[OpenApiExample("날짜 예시", value=["2025-11-01", "2025-11-02"])]
+                ),
+                OpenApiParameter(
+                    name="start_date",
+                    type=OpenApiTypes.DATE,
+                    location=OpenApiParameter.QUERY,
+                    description="기간 검색 시작일. start_date ~ end_date 전체 기간에 예약이 없는 차량만 표시",
+                    examples=[OpenApiExample("시작일 예시", value="2025-11-01")]
+                ),
+                OpenApiParameter(
+                    name="end_date",
+                    type=OpenApiTypes.DATE,
+                    location=OpenApiParameter.QUERY,
+                    description="기간 검색 종료일 (기본값: start_date)",
+                    examples=[OpenApiExample("종료일 예시", value="2025-11-03")]
+                ),
+                OpenApiParameter(
+                    name="start_time",
+                    type=OpenApiTypes.STR,
+                    location=OpenApiParameter.QUERY,
+                    description="시작일의 대여 시작 시각 HH:MM (기본값: 00:00)",
+                    examples=[OpenApiExample("시작 시각 예시", value="09:30")]
+                ),
+                OpenApiParameter(
+                    name="end_time",
+                    type=OpenApiTypes.STR,
+                    location=OpenApiParameter.QUERY,
+                    description="종료일의 반납 시각 HH:MM (생략 시 종료일 하루 끝까지)",
+                    examples=[OpenApiExample("반납 시각 예시", value="18:00")]
+                ),
+                OpenApiParameter(
+                    name="pagination",
+                    type=OpenApiTypes.STR,
+                    location=OpenApiParameter.QUERY,
+                    description="페이지네이션 방식 (cursor 지정 시 정렬 필드 + id 기준 커서 페이지네이션)",
+                    enum=["page", "cursor"],
+                    default="page",
+                    examples=[OpenApiExample("커서 모드 예시", value="cursor")]
+                ),
+                OpenApiParameter(
+                    name="cursor",
+                    type=OpenApiTypes.STR,
+                    location=OpenApiParameter.QUERY,
+                    description="pagination_info의 next_cursor / previous_cursor 값",
+                ),
+                OpenApiParameter(
+                    name="with_count",
+                    type=OpenApiTypes.BOOL,
+                    location=OpenApiParameter.QUERY,
+                    description="커서 모드에서 캐시된 전체 개수 추정치 포함 여부",
+                    examples=[OpenApiExample("사용 예시", value=True)]
+                ),
             ],
             'responses': {
                 200: SuccessResponseSerializer,
@@ -243,6 +301,110 @@ class GarageSchema:
             ]
         }
     
+    @staticmethod
+    def get_garage_search():
+        return {
+            'summary': "차량 검색",
+            'description': "브랜드명, 모델명/코드, 세부 모델, 트림, 색상으로 버틀러 가능한 차량을 검색합니다. 관련도 순으로 정렬되며 차고 목록 조회와 동일한 필터를 사용할 수 있습니다.",
+            'parameters': [
+                OpenApiParameter(
+                    name="q",
+                    type=OpenApiTypes.STR,
+                    location=OpenApiParameter.QUERY,
+                    description="검색어",
+                    required=True,
+                    examples=[OpenApiExample("검색어 예시", value="그랜저 하이브리드")]
+                ),
+                OpenApiParameter(
+                    name="brand",
+                    type=OpenApiTypes.STR,
+                    location=OpenApiParameter.QUERY,
+                    description="브랜드 슬러그로 필터링 (여러 개 가능)",
+                    many=True,
+                    examples=[OpenApiExample("브랜드 예시", value=["hyundai", "bmw"])]
+                ),
+                OpenApiParameter(
+                    name="model",
+                    type=OpenApiTypes.STR,
+                    location=OpenApiParameter.QUERY,
+                    description="모델 슬러그로 필터링 (여러 개 가능)",
+                    many=True,
+                    examples=[OpenApiExample("모델 예시", value=["hyundai-grandeur"])]
+                ),
+                OpenApiParameter(
+                    name="date",
+                    type=OpenApiTypes.DATE,
+                    location=OpenApiParameter.QUERY,
+                    description="해당 날짜에 예약이 없는 차량만 표시 (여러 개 가능)",
+                    many=True,
+                    examples=[OpenApiExample("날짜 예시", value=["2025-11-01", "2025-11-02"])]
+                ),
+                OpenApiParameter(
+                    name="start_date",
+                    type=OpenApiTypes.DATE,
+                    location=OpenApiParameter.QUERY,
+                    description="기간 검색 시작일. start_date ~ end_date 전체 기간에 예약이 없는 차량만 표시",
+                    examples=[OpenApiExample("시작일 예시", value="2025-11-01")]
+                ),
+                OpenApiParameter(
+                    name="end_date",
+                    type=OpenApiTypes.DATE,
+                    location=OpenApiParameter.QUERY,
+                    description="기간 검색 종료일 (기본값: start_date)",
+                    examples=[OpenApiExample("종료일 예시", value="2025-11-03")]
+                ),
+                OpenApiParameter(
+                    name="start_time",
+                    type=OpenApiTypes.STR,
+                    location=OpenApiParameter.QUERY,
+                    description="시작일의 대여 시작 시각 HH:MM (기본값: 00:00)",
+                    examples=[OpenApiExample("시작 시각 예시", value="09:30")]
+                ),
+                OpenApiParameter(
+                    name="end_time",
+                    type=OpenApiTypes.STR,
+                    location=OpenApiParameter.QUERY,
+                    description="종료일의 반납 시각 HH:MM (생략 시 종료일 하루 끝까지)",
+                    examples=[OpenApiExample("반납 시각 예시", value="18:00")]
+                ),
+            ],
+            'responses': {
+                200: SuccessResponseSerializer,
+                400: ErrorResponseSerializer,
+                500: ErrorResponseSerializer,
+            },
+            'examples': [
+                CommonExamples.success_example(
+                    message="차량 검색 성공",
+                    data={
+                        "cars": [
+                            {
+                                "id": 1,
+                                "sub_model": "2.5 하이브리드",
+                                "trim": "캘리그래피",
+                                "color": "블랙",
+                                "mileage": 12000,
+                                "butler_fee": 150000,
+                                "butler_overtime_fee": 20000
+                            }
+                        ],
+                        "pagination_info": {
+                            "count": 1,
+                            "next": None,
+                            "previous": None,
+                            "page_size": 20,
+                            "current_page": 1,
+                            "total_pages": 1
+                        }
+                    }
+                ),
+                CommonExamples.error_example(
+                    message="검색어를 입력해주세요.",
+                    errors={"q": "필수 항목입니다."}
+                )
+            ]
+        }
+    
     @staticmethod
     def get_model_list():
         return {
@@ -608,6 +770,46 @@ class CouponSchema:
             ]
         }
     
+    @staticmethod
+    def get_car_coupon_list():
+        return {
+            'summary': "차량 적용 가능 쿠폰 목록 조회",
+            'description': "사용자의 미사용 유효 쿠폰 중 해당 차량(및 차량의 모델/브랜드)에 적용 가능한 쿠폰 목록을 조회합니다.",
+            'responses': {
+                200: SuccessResponseSerializer,
+                401: ErrorResponseSerializer,
+                404: ErrorResponseSerializer,
+                500: ErrorResponseSerializer,
+            },
+            'examples': [
+                CommonExamples.success_example(
+                    message="차량 적용 가능 쿠폰 목록 조회 성공",
+                    data={
+                        "coupons": [
+                            {
+                                "id": 1,
+                                "user": 1,
+                                "coupon": {
+                                    "id": 1,
+                                    "code": "WELCOME10",
+                                    "name": "신규 가입 할인",
+                                    "discount_type": "PERCENTAGE",
+                                    "discount_rate": 10,
+                                    "is_specific": False
+                                },
+                                "used_at": None,
+                                "is_active": True
+                            }
+                        ]
+                    }
+                ),
+                CommonExamples.error_example(
+                    message="요청하신 차량을 찾을 수 없습니다.",
+                    errors={"detail": "Car not found"}
+                )
+            ]
+        }
+
     @staticmethod
     def get_coupon_detail():
         return {
@@ -27,7 +27,10 @@ class SimpleButlerModelSerializer(serializers.ModelSerializer):
         fields = ['id', 'name', 'image', 'front_image', 'rear_image', 'code', 'slug', 'car_count']
     
     def get_car_count(self, obj):
-        return obj.cars.filter(is_active=True, is_butler=True).count()
+        car_count = getattr(obj, 'butler_car_count', None)
+        if car_count is None:
+            return obj.cars.filter(is_active=True, is_butler=True).count()
+        return car_count
 
 
 class ButlerModelSerializer(serializers.ModelSerializer):
@@ -3,12 +3,15 @@ app_name = "butlers"
 
 from django.db.models.signals import pre_save, post_save, post_delete
 from django.dispatch import receiver
-from django.db import transaction
+from django.db import models, transaction
+from django.db.models.functions import Greatest
 
-from cars.utils import update_available_from
+from cars.utils import update_available_from, defer_car_update
+from cars.bookings import delete_car_booking
+from cars.reservations import update_butler_reservation_bitmap
 
-from .models import ButlerRequest, Butler
-from .utils import update_butler_reservated_dates
+from .models import ButlerRequest, Butler, ButlerCoupon, ButlerUserCoupon
+from .utils import sync_butler_request_bookings, sync_butler_booking
 
 # Butler Request
 # <-------------------------------------------------------------------------------------------------------------------------------->
@@ -46,10 +49,16 @@ def handle_point_transaction(sender, instance, **kwargs):
         instance.point.save()
 
 
+# 예약 구간 동기화는 가능일 재계산보다 먼저 등록해야 한다.
+@receiver(post_save, sender=ButlerRequest)
+def sync_car_booking_on_request_save(sender, instance, **kwargs):
+    sync_butler_request_bookings(instance)
+
+
 @receiver(post_save, sender=ButlerRequest)
 def update_car_available_from_on_request_save(sender, instance, **kwargs):
-    update_butler_reservated_dates(instance.car.id)
-    update_available_from(instance.car.id)
+    defer_car_update(update_butler_reservation_bitmap, instance.car_id)
+    defer_car_update(update_available_from, instance.car_id)
 
 
 @receiver(post_delete, sender=ButlerRequest)
@@ -64,10 +73,15 @@ def return_point_on_delete(sender, instance, **kwargs):
         instance.point.delete()
 
 
+@receiver(post_delete, sender=ButlerRequest)
+def delete_car_booking_on_request_delete(sender, instance, **kwargs):
+    delete_car_booking('BUTLER_REQUEST', instance.id)
+
+
 @receiver(post_delete, sender=ButlerRequest)
 def update_car_available_from_on_request_delete(sender, instance, **kwargs):
-    update_butler_reservated_dates(instance.car.id)
-    update_available_from(instance.car.id)
+    defer_car_update(update_butler_reservation_bitmap, instance.car_id)
+    defer_car_update(update_available_from, instance.car_id)
 
 # Butler
 # <-------------------------------------------------------------------------------------------------------------------------------->
@@ -89,13 +103,34 @@ def handle_request_inactivation(sender, instance, **kwargs):
         transaction.on_commit(inactivate_request_after_commit)
 
 
+@receiver(post_save, sender=Butler)
+def sync_car_booking_on_butler_save(sender, instance, **kwargs):
+    sync_butler_booking(instance)
+
+
 @receiver(post_save, sender=Butler)
 def update_car_available_from_on_subscription_save(sender, instance, **kwargs):
-    update_butler_reservated_dates(instance.request.car.id)
-    update_available_from(instance.request.car.id)
+    defer_car_update(update_butler_reservation_bitmap, instance.request.car_id)
+    defer_car_update(update_available_from, instance.request.car_id)
+
+
+@receiver(post_delete, sender=Butler)
+def delete_car_booking_on_butler_delete(sender, instance, **kwargs):
+    delete_car_booking('BUTLER', instance.id)
 
 
 @receiver(post_delete, sender=Butler)
 def update_car_available_from_on_subscription_delete(sender, instance, **kwargs):
-    update_butler_reservated_dates(instance.request.car.id)
-    update_available_from(instance.request.car.id)
\ No newline at end of file
+    defer_car_update(update_butler_reservation_bitmap, instance.request.car_id)
+    defer_car_update(update_available_from, instance.request.car_id)
+
+
+# Coupon
+# <-------------------------------------------------------------------------------------------------------------------------------->
+# 발급된 쿠폰이 삭제되면 발급/사용 횟수를 되돌린다. 어긋난 행이 있어도 각 횟수는 0 아래로 내려가지 않는다.
+@receiver(post_delete, sender=ButlerUserCoupon)
+def release_coupon_counts_on_delete(sender, instance, **kwargs):
+    counts = {'issued_count': Greatest(models.F('issued_count') - 1, 0)}
+    if instance.used_at is not None:
+        counts['redeemed_count'] = Greatest(models.F('redeemed_count') - 1, 0)
+    ButlerCoupon.objects.filter(pk=instance.coupon_id).update(**counts)
@@ -5,6 +5,8 @@ from celery import shared_task
 
 from django.core.mail import send_mail
 
+from cars.reservations import compact_butler_reservation_bitmaps
+
 @shared_task
 def send_butler_email(email, text):
     send_mail(
@@ -15,3 +17,9 @@ def send_butler_email(email, text):
         fail_silently=True,
     )    
     return True
+
+
+# 지난 날짜를 예약 비트맵에서 밀어내 origin을 오늘로 맞춘다. (매일 새벽 실행)
+@shared_task
+def compact_reservation_bitmaps():
+    return compact_butler_reservation_bitmaps()
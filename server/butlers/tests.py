@@ -1,3 +1,37 @@
-from django.test import TestCase
+from django.core.cache import cache
+from django.test import TestCase, override_settings
 
-# Create your tests here.
+from server.testing import LOCMEM_CACHES
+
+# Garage Filter
+# <-------------------------------------------------------------------------------------------------------------------------------->
+# 잘못된 날짜/기간 파라미터는 조용히 버리지 않고 해당 파라미터 이름과 함께 400으로 응답해야 한다.
+@override_settings(CACHES=LOCMEM_CACHES)
+class GarageFilterValidationTest(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def assertBadParam(self, query, param):
+        for path in ('/butlers/garages', '/butlers/garages/search'):
+            response = self.client.get(path, {'q': 'x', **query})
+            self.assertEqual(response.status_code, 400)
+            self.assertIn(param, response.json()['errors'])
+
+    def test_invalid_date(self):
+        self.assertBadParam({'date': '2026-13-01'}, 'date')
+        self.assertBadParam({'date': '9999-01-01'}, 'date')
+
+    def test_invalid_period(self):
+        self.assertBadParam({'start_date': 'tomorrow'}, 'start_date')
+        self.assertBadParam({'start_date': '2026-11-01', 'end_date': '11/02'}, 'end_date')
+        self.assertBadParam({'start_date': '2026-11-01', 'start_time': '25:00'}, 'start_time')
+        self.assertBadParam({'start_date': '2026-11-01', 'end_time': 'noon'}, 'end_time')
+        self.assertBadParam({'end_date': '2026-11-01'}, 'start_date')
+
+    def test_period_must_end_after_start(self):
+        self.assertBadParam({'start_date': '2026-11-02', 'end_date': '2026-11-01'}, 'end_date')
+        self.assertBadParam({'start_date': '2026-11-01', 'start_time': '10:00', 'end_time': '09:00'}, 'end_time')
+
+    def test_valid_period(self):
+        response = self.client.get('/butlers/garages', {'start_date': '2026-11-01', 'start_time': '10:00', 'end_time': '12:00'})
+        self.assertEqual(response.status_code, 200)
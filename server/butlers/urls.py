@@ -3,13 +3,13 @@ app_name = 'butlers'
 
 from django.urls import path
 
-from .views import GarageAPIView
+from .views import GarageAPIView, GarageSearchAPIView
 from .views import ModelListAPIView, ModelDetailAPIView
 from .views import CarListAPIView, CarDetailAPIView
 from .views import ButlerAPIView, ButlerRequestListAPIView, ButlerRequestAPIView, ButlerRequestDetailAPIView, ButlerWayPointAPIView, ButlerWayPointDetailAPIView
 from .views import LikeAPIView, ReviewListAPIView, ReviewAPIView, ReviewDetailAPIView, ReviewLikeAPIView
 from .views import ModelRequestAPIView
-from .views import CouponListAPIView, CouponDetailAPIView
+from .views import CouponListAPIView, CarCouponListAPIView, CouponDetailAPIView
 
 urlpatterns = [
     path('', ButlerAPIView.as_view(), name='butler'),
@@ -20,6 +20,7 @@ urlpatterns = [
     path('/waypoints/<int:waypoint_id>', ButlerWayPointDetailAPIView.as_view(), name='butler-waypoint-detail'),
 
     path('/garages', GarageAPIView.as_view(), name='garage-list'),
+    path('/garages/search', GarageSearchAPIView.as_view(), name='garage-search'),
 
     path('/models/request', ModelRequestAPIView.as_view(), name='model-request'),                   # 모델 요청
     path('/models', ModelListAPIView.as_view(), name='model-list'),                                 # 모델 목록
@@ -30,6 +31,7 @@ urlpatterns = [
     path('/cars', CarListAPIView.as_view(), name='car-list'),                                       # 자동차 목록
     path('/cars/<int:car_id>', CarDetailAPIView.as_view(), name='car-detail'),                      # 자동차 상세
     path('/cars/<int:car_id>/request', ButlerRequestAPIView.as_view(), name='add-subscription-request'),# 구독 요청
+    path('/cars/<int:car_id>/coupons', CarCouponListAPIView.as_view(), name='car-coupon-list'),     # 차량 적용 가능 쿠폰
 
     path('/reviews', ReviewListAPIView.as_view(), name='review-list'),                              # 리뷰 목록
     path('/reviews/<int:review_id>', ReviewDetailAPIView.as_view(), name='review-detail'),          # 리뷰 상세
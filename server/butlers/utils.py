@@ -1,53 +1,130 @@
 # butlers/utils.py
 app_name = 'butlers'
 
-from datetime import timedelta, datetime
+from datetime import date, datetime, time, timedelta
 
+from django.db.models import Q
 from django.utils import timezone
 
-from cars.models import Car
+from rest_framework.exceptions import ValidationError
 
-from .models import Butler, ButlerRequest
+from cars.bookings import sync_car_booking, filter_free_cars_at
+from cars.reservations import filter_butler_reservation_free, get_reservation_window
 
-def update_butler_reservated_dates(car_id):
+# Car Booking
+# <-------------------------------------------------------------------------------------------------------------------------------->
+# 버틀러 예약 구간은 요청의 시작/종료 시각을 현지 날짜로 바꾼 기간이다.
+def get_butler_request_dates(request):
+    if not request.start_at or not request.end_at:
+        return None, None
+    return timezone.localtime(request.start_at).date(), timezone.localtime(request.end_at).date()
+
+
+# 버틀러 행은 기간을 요청에서 읽으므로, 요청이 바뀌면 요청과 하위 버틀러 구간을 함께 동기화한다.
+def sync_butler_request_bookings(request):
+    start, end = get_butler_request_dates(request)
+    sync_car_booking('BUTLER_REQUEST', request.id, request.car_id, start, end, request.is_active, request.start_at, request.end_at)
+    for butler_id, is_active in request.butlers.values_list('id', 'is_active'):
+        sync_car_booking('BUTLER', butler_id, request.car_id, start, end, is_active, request.start_at, request.end_at)
+
+
+def sync_butler_booking(butler):
+    request = butler.request
+    start, end = get_butler_request_dates(request)
+    sync_car_booking('BUTLER', butler.id, request.car_id, start, end, butler.is_active, request.start_at, request.end_at)
+
+
+# Garage Filter
+# <-------------------------------------------------------------------------------------------------------------------------------->
+# 잘못된 날짜/기간 파라미터는 rest_framework ValidationError({파라미터: 메시지})로 올린다.
+def get_garage_filters(query_params):
+    return {
+        'brands': sorted(set(query_params.getlist('brand'))),
+        'models': sorted(set(query_params.getlist('model'))),
+        'dates': sorted(parse_garage_dates(query_params.getlist('date'))),
+        'period': parse_garage_period(query_params),
+    }
+
+
+# 형식이 잘못되었거나 예약 비트맵 범위를 넘는 날짜는 ValidationError로 돌려 400으로 응답한다.
+def parse_garage_dates(values):
+    _, last_day = get_reservation_window()
+    dates = set()
+    for value in values:
+        try:
+            day = date.fromisoformat(value)
+        except ValueError:
+            raise ValidationError({'date': f"'{value}'은(는) 올바른 날짜 형식(YYYY-MM-DD)이 아닙니다."})
+        if day > last_day:
+            raise ValidationError({'date': f"버틀러 예약은 {last_day.isoformat()}까지만 조회할 수 있습니다."})
+        dates.add(day)
+    return dates
+
+
+def parse_garage_value(query_params, name, parse, message):
     try:
-        car = Car.objects.get(id=car_id)
-
-    except Car.DoesNotExist:
-        return
-        
-    now = timezone.now().date()
-    butler_reservated_dates = []
-    
-    butlers = Butler.objects.filter(request__car=car, is_active=True, request__end_at__gt=now)
-    for butler in butlers:
-        request = butler.request
-        if request.start_at and request.end_at:
-            current_date = request.start_at.astimezone(timezone.get_current_timezone()).date()
-            end_date = request.end_at.astimezone(timezone.get_current_timezone()).date()
-            while current_date <= end_date:
-                butler_reservated_dates.append(current_date.isoformat())
-                current_date += timedelta(days=1)
-
-    butler_requests = ButlerRequest.objects.filter(car=car, is_active=True, end_at__gt=now)
-    for request in butler_requests:
-        if request.start_at and request.end_at:
-            current_date = request.start_at.astimezone(timezone.get_current_timezone()).date()
-            end_date = request.end_at.astimezone(timezone.get_current_timezone()).date()
-            while current_date <= end_date:
-                butler_reservated_dates.append(current_date.isoformat())
-                current_date += timedelta(days=1)
-    
-    butler_reservated_dates = sorted(list(set(butler_reservated_dates)))
-    print(butler_reservated_dates)
-    car.butler_reservated_dates = butler_reservated_dates
-
-    car.save()
-
-
-def get_butler_available_from(car):
-    if car.butler_reservated_dates:
-        latest_date = datetime.fromisoformat(car.butler_reservated_dates[-1]).date()
-        return latest_date + timedelta(days=1)
-    
-    return None
\ No newline at end of file
+        return parse(query_params[name])
+    except ValueError:
+        raise ValidationError({name: f"'{query_params[name]}'은(는) {message}이 아닙니다."})
+
+
+# start_date HH:MM(start_time) 부터 end_date HH:MM(end_time) 까지의 대여 구간.
+# end_date 기본값은 start_date, 시각을 생략하면 시작일 0시부터 종료일 하루 끝까지로 본다.
+# 형식이 잘못되었거나 시작이 종료보다 늦으면 해당 파라미터 이름으로 ValidationError
+def parse_garage_period(query_params):
+    if not query_params.get('start_date'):
+        if any(query_params.get(name) for name in ('end_date', 'start_time', 'end_time')):
+            raise ValidationError({'start_date': "기간 검색에는 start_date가 필요합니다."})
+        return None
+
+    start_date = parse_garage_value(query_params, 'start_date', date.fromisoformat, "올바른 날짜 형식(YYYY-MM-DD)")
+    end_date = parse_garage_value(query_params, 'end_date', date.fromisoformat, "올바른 날짜 형식(YYYY-MM-DD)") if query_params.get('end_date') else start_date
+    start_time = parse_garage_value(query_params, 'start_time', time.fromisoformat, "올바른 시각 형식(HH:MM)") if query_params.get('start_time') else time.min
+    end_time = parse_garage_value(query_params, 'end_time', time.fromisoformat, "올바른 시각 형식(HH:MM)") if query_params.get('end_time') else None
+
+    start_at = timezone.make_aware(datetime.combine(start_date, start_time))
+    if end_time is None:
+        end_at = timezone.make_aware(datetime.combine(end_date + timedelta(days=1), time.min))
+    else:
+        end_at = timezone.make_aware(datetime.combine(end_date, end_time))
+    if start_at >= end_at:
+        raise ValidationError({'end_time' if end_time else 'end_date': "종료 시각은 시작 시각보다 늦어야 합니다."})
+    return start_at, end_at
+
+
+def filter_garage_cars(cars_queryset, filters):
+    # (brand OR model) AND (date)
+    if filters['brands'] or filters['models']:
+        filter_conditions = Q()
+        if filters['brands']:
+            filter_conditions |= Q(model__brand__slug__in=filters['brands'])
+        if filters['models']:
+            filter_conditions |= Q(model__slug__in=filters['models'])
+        cars_queryset = cars_queryset.filter(filter_conditions)
+
+    # 요청 날짜 전체를 마스크 하나로 만들어 예약 비트맵과 한 번에 비교
+    if filters['dates']:
+        cars_queryset = filter_butler_reservation_free(cars_queryset, filters['dates'])
+
+    # 기간 검색은 예약 시각 구간(tstzrange)과의 겹침을 인덱스로 한 번에 확인
+    if filters['period']:
+        cars_queryset = filter_free_cars_at(cars_queryset, *filters['period'])
+    return cars_queryset
+
+
+def filter_garage_listings(listings_queryset, filters):
+    # filter_garage_cars와 동일한 조건을 CarListing의 비정규화 컬럼에 적용
+    if filters['brands'] or filters['models']:
+        filter_conditions = Q()
+        if filters['brands']:
+            filter_conditions |= Q(brand_slug__in=filters['brands'])
+        if filters['models']:
+            filter_conditions |= Q(model_slug__in=filters['models'])
+        listings_queryset = listings_queryset.filter(filter_conditions)
+
+    if filters['dates']:
+        listings_queryset = filter_butler_reservation_free(listings_queryset, filters['dates'])
+
+    if filters['period']:
+        listings_queryset = filter_free_cars_at(listings_queryset, *filters['period'], car_field='car_id')
+    return listings_queryset
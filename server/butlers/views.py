@@ -1,27 +1,30 @@
 # butlers/views.py
 app_name = 'butlers'
 
-from collections import defaultdict
-
 from rest_framework import status
 from rest_framework.views import APIView
 from rest_framework.response import Response
+from rest_framework.exceptions import NotFound, ValidationError
 
-from django.db.models import Prefetch, Q
+from django.db.models import Exists, OuterRef
+from django.utils.decorators import method_decorator
 
 from drf_spectacular.utils import extend_schema
 
 from server.utils import SuccessResponseBuilder, ErrorResponseBuilder
-from cars.models import Brand, Model, Car
+from cars.models import Brand, Model, Car, CarListing
+from cars.caches import get_garage_list, catalog_condition
+from cars.projections import project_models
 
 from .tasks import send_butler_email
+from .utils import get_garage_filters, filter_garage_cars, filter_garage_listings
 from .models import Butler, ButlerRequest, ButlerWayPoint, ButlerLike, ButlerReview, ButlerReviewLike, ButlerCoupon, ButlerUserCoupon
-from .serializers import ButlerModelListSerializer, ButlerModelDetailSerializer, ButlerCarDetailSerializer, SimpleButlerModelSerializer
+from .serializers import SimpleButlerModelSerializer, ButlerBrandSerializer, ButlerCarSerializer, ButlerCarDetailSerializer
 from .serializers import ButlerSerializer, ButlerRequestSerializer, ButlerWayPointSerializer
 from .serializers import ButlerReviewSerializer, ButlerReviewDetailSerializer, ButlerModelRequestSerializer
 from .serializers import ButlerCouponSerializer, ButlerUserCouponSerializer
 from .permissions import AllowAny, IsAuthenticated, IsCIVerified, IsAuthor, IsButlered, IsButlerWayPointAuthor
-from .paginations import ButlerPagination
+from .paginations import ButlerPagination, ButlerCursorPagination
 from .schemas import GarageSchema, CouponSchema, ButlerSchema, ReviewSchema
 
 # Garage APIs
@@ -30,54 +33,46 @@ from .schemas import GarageSchema, CouponSchema, ButlerSchema, ReviewSchema
 class GarageAPIView(APIView):
     permission_classes = [AllowAny]
     pagination_class = ButlerPagination
+    cursor_pagination_class = ButlerCursorPagination
 
     @extend_schema(**GarageSchema.get_garage())
+    @method_decorator(catalog_condition)
     def get(self, request):
-        brand_model_dict = defaultdict(list)
-        for model in Model.objects.select_related('brand').all():
-            brand_model_dict[model.brand].append(model)
-        
-        garage_list = []
-        for brand, models in brand_model_dict.items():
-            garage_item = {
-                'name': brand.name,
-                'slug': brand.slug,
-                'model_list': SimpleButlerModelSerializer(models, many=True).data
-            }
-            garage_list.append(garage_item)
-        
-        brands = request.query_params.getlist('brand')
-        models = request.query_params.getlist('model')
-        dates = request.query_params.getlist('date')
+        try:
+            filters = get_garage_filters(request.query_params)
+        except ValidationError as e:
+            response = ErrorResponseBuilder().with_message("검색 조건이 올바르지 않습니다.").with_errors(e.detail).build()
+            return Response(response, status=status.HTTP_400_BAD_REQUEST)
+
+        garage_list = get_garage_list('butlers', SimpleButlerModelSerializer)
         order = request.query_params.get('order')
 
         try:
-            cars_queryset = Car.objects.filter(is_active=True, is_butler=True).select_related('model', 'model__brand')
-
-            # (brand OR model) AND (date)
-            if brands or models:
-                filter_conditions = Q()
-                if brands:
-                    filter_conditions |= Q(model__brand__slug__in=brands)
-                if models:
-                    filter_conditions |= Q(model__slug__in=models)
-                cars_queryset = cars_queryset.filter(filter_conditions)
-            
-            if dates:
-                exclude_conditions = Q()
-                for date in dates:
-                    exclude_conditions |= Q(butler_reservated_dates__contains=[date])
-                cars_queryset = cars_queryset.exclude(exclude_conditions)
+            # 미리 렌더링된 CarListing 행을 읽어 행마다 시리얼라이저를 실행하지 않는다.
+            listings_queryset = CarListing.objects.filter(service='butlers')
+            listings_queryset = filter_garage_listings(listings_queryset, filters)
             
             if order == 'desc':
-                sort_field = f'-{'butler_price'}'
+                sort_field = '-butler_fee'
             else:
-                sort_field = 'butler_price'
+                sort_field = 'butler_fee'
+
+            listings_queryset = listings_queryset.order_by(sort_field)
+
+            # Cursor 모드: (버틀러 요금, id) keyset 페이지네이션
+            if request.query_params.get('pagination') == 'cursor' or request.query_params.get('cursor'):
+                paginator = self.cursor_pagination_class('butler_fee', order == 'desc')
+                page = paginator.paginate_queryset(listings_queryset, request)
+                response_data = {
+                    'garage_list': garage_list,
+                    'cars': [listing.payload for listing in page],
+                    'pagination_info': paginator.get_pagination_info()
+                }
+                response = SuccessResponseBuilder().with_message("차고 목록 조회 성공").with_data(response_data).build()
+                return Response(response, status=status.HTTP_200_OK)
 
-            cars_queryset = cars_queryset.order_by(sort_field)
-            
             paginator = self.pagination_class()
-            page = paginator.paginate_queryset(cars_queryset, request)
+            page = paginator.paginate_queryset(listings_queryset, request)
             if page is not None:
                 pagination_info = {
                     'count': paginator.page.paginator.count,
@@ -90,7 +85,7 @@ class GarageAPIView(APIView):
 
                 response_data = {
                     'garage_list': garage_list,
-                    'cars': ButlerCarDetailSerializer(page, many=True).data,
+                    'cars': [listing.payload for listing in page],
                     'pagination_info': pagination_info
                 }
                 response = SuccessResponseBuilder().with_message("차고 목록 조회 성공").with_data(response_data).build()
@@ -99,31 +94,84 @@ class GarageAPIView(APIView):
             else:
                 response_data = {
                     'garage_list': garage_list,
-                    'cars': ButlerCarDetailSerializer(cars_queryset, many=True).data,
+                    'cars': [listing.payload for listing in listings_queryset],
                 }    
                 response = SuccessResponseBuilder().with_message("차고 목록 조회 성공").with_data(response_data).build()
                 return Response(response, status=status.HTTP_200_OK)
-                
+
+        except NotFound as e:
+            response = ErrorResponseBuilder().with_message("유효하지 않은 커서입니다.").with_errors(str(e)).build()
+            return Response(response, status=status.HTTP_404_NOT_FOUND)
+
         except Exception as e:
             response = ErrorResponseBuilder().with_message("차고 목록을 불러오는 중 오류가 발생했습니다.").with_errors(str(e)).build()
             return Response(response, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+# Garage 차량을 검색어로 검색하는 API
+class GarageSearchAPIView(APIView):
+    permission_classes = [AllowAny]
+    pagination_class = ButlerPagination
+
+    @extend_schema(**GarageSchema.get_garage_search())
+    @method_decorator(catalog_condition)
+    def get(self, request):
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            response = ErrorResponseBuilder().with_message("검색어를 입력해주세요.").with_errors({'q': '필수 항목입니다.'}).build()
+            return Response(response, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            filters = get_garage_filters(request.query_params)
+        except ValidationError as e:
+            response = ErrorResponseBuilder().with_message("검색 조건이 올바르지 않습니다.").with_errors(e.detail).build()
+            return Response(response, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            cars_queryset = Car.objects.filter(is_active=True, is_butler=True).select_related('model', 'model__brand')
+            cars_queryset = filter_garage_cars(cars_queryset, filters).search(query)
+
+            paginator = self.pagination_class()
+            page = paginator.paginate_queryset(cars_queryset, request)
+            pagination_info = {
+                'count': paginator.page.paginator.count,
+                'next': paginator.get_next_link(),
+                'previous': paginator.get_previous_link(),
+                'page_size': paginator.page_size,
+                'current_page': paginator.page.number,
+                'total_pages': paginator.page.paginator.num_pages
+            }
+
+            response_data = {
+                'cars': ButlerCarDetailSerializer(page, many=True).data,
+                'pagination_info': pagination_info
+            }
+            response = SuccessResponseBuilder().with_message("차량 검색 성공").with_data(response_data).build()
+            return Response(response, status=status.HTTP_200_OK)
+
+        except NotFound as e:
+            response = ErrorResponseBuilder().with_message("유효하지 않은 페이지입니다.").with_errors(str(e)).build()
+            return Response(response, status=status.HTTP_404_NOT_FOUND)
+
+        except Exception as e:
+            response = ErrorResponseBuilder().with_message("차량을 검색하는 중 오류가 발생했습니다.").with_errors(str(e)).build()
+            return Response(response, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
 # 버틀러 가능한 자동차 모델 목록을 조회하는 API
 class ModelListAPIView(APIView):
     permission_classes = [AllowAny]
 
     @extend_schema(**GarageSchema.get_model_list())
+    @method_decorator(catalog_condition)
     def get(self, request):
         try:
-            models = Model.objects.filter(cars__is_active=True, cars__is_butler=True
-            ).select_related('brand'
-            ).prefetch_related(Prefetch('cars', queryset=Car.objects.filter(is_active=True, is_butler=True).prefetch_related('butler_requests', 'butler_requests__butlers'))
-            ).distinct(
-            ).order_by('brand__name', 'name')
+            # 시리얼라이저가 쓰는 컬럼만 values()로 읽어 모델별로 묶는다.
+            cars = Car.objects.filter(is_active=True, is_butler=True)
+            models = Model.objects.filter(Exists(cars.filter(model=OuterRef('pk')))).order_by('brand__name', 'name')
+            models_data = project_models(models, cars, ButlerBrandSerializer.Meta.fields, ButlerCarSerializer.Meta.fields)
             
-            serializer = ButlerModelListSerializer(models, many=True)
-            response = SuccessResponseBuilder().with_message("모델 목록 조회 성공").with_data({'models': serializer.data}).build()
+            response = SuccessResponseBuilder().with_message("모델 목록 조회 성공").with_data({'models': models_data}).build()
             return Response(response, status=status.HTTP_200_OK)
 
         except Exception as e:
@@ -136,19 +184,18 @@ class ModelDetailAPIView(APIView):
     permission_classes = [AllowAny]
 
     @extend_schema(**GarageSchema.get_model_detail())
+    @method_decorator(catalog_condition)
     def get(self, request, model_id):
         try:
-            model = Model.objects.filter(id=model_id, cars__is_active=True, cars__is_butler=True
-            ).select_related('brand'
-            ).prefetch_related(Prefetch('cars', queryset=Car.objects.filter(is_active=True, is_butler=True).prefetch_related('butler_requests', 'butler_requests__butlers'))
-            ).first()
+            cars = Car.objects.filter(is_active=True, is_butler=True)
+            models = Model.objects.filter(Exists(cars.filter(model=OuterRef('pk'))), id=model_id)
+            models_data = project_models(models, cars, ButlerBrandSerializer.Meta.fields, ButlerCarSerializer.Meta.fields)
             
-            if not model:
+            if not models_data:
                 response = ErrorResponseBuilder().with_message("요청하신 모델을 찾을 수 없거나 버틀러 서비스가 불가능합니다.").build()
                 return Response(response, status=status.HTTP_404_NOT_FOUND)
             
-            serializer = ButlerModelDetailSerializer(model)
-            response = SuccessResponseBuilder().with_message("모델 상세 정보 조회 성공").with_data({'model': serializer.data}).build()
+            response = SuccessResponseBuilder().with_message("모델 상세 정보 조회 성공").with_data({'model': models_data[0]}).build()
             return Response(response, status=status.HTTP_200_OK)
             
         except Exception as e:
@@ -161,12 +208,13 @@ class CarListAPIView(APIView):
     permission_classes = [AllowAny]
 
     @extend_schema(**GarageSchema.get_car_list())
+    @method_decorator(catalog_condition)
     def get(self, request):
         try:            
-            cars = Car.objects.filter(is_active=True, is_butler=True).select_related('model', 'model__brand')
-            serializer = ButlerCarDetailSerializer(cars, many=True)
+            # 미리 렌더링된 CarListing 행 사용
+            cars = CarListing.objects.filter(service='butlers').values_list('payload', flat=True)
             
-            response = SuccessResponseBuilder().with_message("차량 목록 조회 성공").with_data({'cars': serializer.data}).build()
+            response = SuccessResponseBuilder().with_message("차량 목록 조회 성공").with_data({'cars': list(cars)}).build()
             return Response(response, status=status.HTTP_200_OK)
 
         except Exception as e:
@@ -179,6 +227,7 @@ class CarDetailAPIView(APIView):
     permission_classes = [AllowAny]
 
     @extend_schema(**GarageSchema.get_car_detail())
+    @method_decorator(catalog_condition)
     def get(self, request, car_id):
         try:
             car = Car.objects.filter(id=car_id, is_active=True, is_butler=True
@@ -216,6 +265,28 @@ class CouponListAPIView(APIView):
             return Response(response, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+# 차량에 적용 가능한 내 쿠폰 목록을 조회하는 API
+class CarCouponListAPIView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    @extend_schema(**CouponSchema.get_car_coupon_list())
+    def get(self, request, car_id):
+        try:
+            car = Car.objects.select_related('model').get(id=car_id)
+            user_coupons = ButlerUserCoupon.objects.filter(user=request.user).usable().applicable_to(car).select_related('coupon')
+            serializer = ButlerUserCouponSerializer(user_coupons, many=True)
+            response = SuccessResponseBuilder().with_message("차량 적용 가능 쿠폰 목록 조회 성공").with_data({'coupons': serializer.data}).build()
+            return Response(response, status=status.HTTP_200_OK)
+
+        except Car.DoesNotExist:
+            response = ErrorResponseBuilder().with_message("요청하신 차량을 찾을 수 없습니다.").build()
+            return Response(response, status=status.HTTP_404_NOT_FOUND)
+
+        except Exception as e:
+            response = ErrorResponseBuilder().with_message("쿠폰 목록을 불러오는 중 오류가 발생했습니다.").with_errors(str(e)).build()
+            return Response(response, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
 class CouponDetailAPIView(APIView):
     permission_classes = [IsAuthenticated]
 
@@ -2,7 +2,7 @@
 app_name = 'cars'
 
 from django.contrib import admin
-from .models import Brand, Model, Car
+from .models import Brand, Model, Car, CarSubscriptionFee
 
 @admin.register(Brand)
 class BrandAdmin(admin.ModelAdmin):
@@ -41,6 +41,17 @@ class ModelAdmin(admin.ModelAdmin):
     )
 
 
+class CarSubscriptionFeeInline(admin.TabularInline):
+    model = CarSubscriptionFee
+    fields = ['months', 'fee']
+    readonly_fields = ['months', 'fee']
+    extra = 0
+    can_delete = False
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
 @admin.register(Car)
 class CarAdmin(admin.ModelAdmin):
     list_display = ['id', 'model', 'sub_model', 'license_plate', 'is_sellable', 'is_subscriptable', 'is_butler', 'is_new', 'is_hot', 'is_active']
@@ -48,6 +59,7 @@ class CarAdmin(admin.ModelAdmin):
     search_fields = ['vin_number', 'license_plate', 'model__name', 'model__brand__name', 'description']
     readonly_fields = ['tax', 'acquisition_tax', 'subscription_fee_minimum', 'subscription_available_from', 'butler_reservated_dates', 'butler_available_from', 'created_at', 'modified_at']
     autocomplete_fields = ['model']
+    inlines = [CarSubscriptionFeeInline]
     list_editable = ['is_sellable', 'is_subscriptable', 'is_butler', 'is_new', 'is_hot', 'is_active']
     
     fieldsets = (
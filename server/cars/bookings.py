@@ -0,0 +1,104 @@
+# cars/bookings.py
+app_name = 'cars'
+
+from django.db import connection, models
+from django.utils import timezone
+from django.db.backends.postgresql.psycopg_any import DateRange, DateTimeTZRange
+
+from .models import CarBooking
+
+# Booking Sync
+# <-------------------------------------------------------------------------------------------------------------------------------->
+# 예약 구간은 시작일~종료일을 모두 포함하는 날짜 구간으로 저장한다. (DB에는 [start, end + 1) 형태로 정규화된다)
+def get_booking_period(start, end):
+    return DateRange(start, end, bounds='[]')
+
+
+# 시각 단위 구간은 [start_at, end_at) 이다.
+def get_booking_time_period(start_at, end_at):
+    if start_at is None or end_at is None or start_at >= end_at:
+        return None
+    return DateTimeTZRange(start_at, end_at, bounds='[)')
+
+
+# 원본 행 하나당 예약 구간 하나를 upsert 한다. 비활성이거나 기간이 비어 있으면 구간을 지운다.
+def sync_car_booking(source, source_id, car_id, start, end, active=True, start_at=None, end_at=None):
+    if not active or start is None or end is None or start > end:
+        delete_car_booking(source, source_id)
+        return
+
+    CarBooking.objects.bulk_create(
+        [CarBooking(
+            source=source, source_id=source_id, car_id=car_id,
+            period=get_booking_period(start, end), time_period=get_booking_time_period(start_at, end_at),
+        )],
+        update_conflicts=True,
+        unique_fields=['source', 'source_id'],
+        update_fields=['car', 'period', 'time_period', 'modified_at'],
+    )
+
+
+def delete_car_booking(source, source_id):
+    CarBooking.objects.filter(source=source, source_id=source_id).delete()
+
+
+# Availability Query
+# <-------------------------------------------------------------------------------------------------------------------------------->
+# 오늘 이후까지 이어지는 예약 중 가장 늦은 종료일 다음 날. 예약이 없는 차량은 None
+# (car, period) GiST 인덱스에서 period && [today, ∞) 로 진행 중/예정 예약만 읽는다.
+def get_available_from(car_ids, today=None):
+    today = today or timezone.localdate()
+    rows = (
+        CarBooking.objects
+        .filter(car_id__in=car_ids, period__overlap=DateRange(today, None))
+        .values('car_id')
+        .annotate(available_from=models.Max('period__endswith'))
+    )
+    available_from = {car_id: None for car_id in car_ids}
+    available_from.update({row['car_id']: row['available_from'] for row in rows})
+    return available_from
+
+
+# from_date 이후 어떤 예약에도 포함되지 않는 첫 날짜. 예약이 없는 차량은 from_date
+# 차량별로 시작일 순으로 훑으며 앞선 예약들의 최대 종료일(covered_until)보다 늦게 시작하는 예약이 있으면 그 사이가 첫 빈 날이다.
+def get_next_free_dates(car_ids, from_date=None):
+    from_date = from_date or timezone.localdate()
+    car_ids = list(car_ids)
+    table = connection.ops.quote_name(CarBooking._meta.db_table)
+    sql = (
+        f"WITH booking AS ("
+        f"SELECT car_id, lower(period) AS start_day, upper(period) AS end_day, "
+        f"MAX(upper(period)) OVER (PARTITION BY car_id ORDER BY lower(period) ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING) AS covered_until "
+        f"FROM {table} WHERE car_id = ANY(%s) AND period && daterange(%s, NULL)"
+        f") "
+        f"SELECT car_id, COALESCE(MIN(GREATEST(covered_until, %s)) FILTER (WHERE start_day > GREATEST(covered_until, %s)), MAX(end_day)) "
+        f"FROM booking GROUP BY car_id"
+    )
+    next_free_dates = {car_id: from_date for car_id in car_ids}
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [car_ids, from_date, from_date, from_date])
+        next_free_dates.update(cursor.fetchall())
+    return next_free_dates
+
+
+# start~end(포함) 중 하루라도 예약과 겹치는지
+def get_overlapping_bookings(start, end):
+    return CarBooking.objects.filter(period__overlap=get_booking_period(start, end))
+
+
+def is_car_free(car_id, start, end):
+    return not get_overlapping_bookings(start, end).filter(car_id=car_id).exists()
+
+
+# start~end(포함) 동안 예약이 없는 차량만 남긴다. Car 외의 쿼리셋은 car_field로 차량 id 컬럼을 지정한다.
+def filter_free_cars(queryset, start, end, car_field='pk'):
+    return queryset.filter(
+        ~models.Exists(get_overlapping_bookings(start, end).filter(car_id=models.OuterRef(car_field)))
+    )
+
+
+# start_at~end_at 시각 구간과 겹치는 예약이 없는 차량만 남긴다. 구간 길이와 관계없이 (car, time_period) 인덱스 조회 한 번이다.
+# 시각 구간이 없는 구독 예약은 대상이 아니다.
+def filter_free_cars_at(queryset, start_at, end_at, car_field='pk'):
+    overlapping = CarBooking.objects.filter(car_id=models.OuterRef(car_field), time_period__overlap=get_booking_time_period(start_at, end_at))
+    return queryset.filter(~models.Exists(overlapping))
@@ -0,0 +1,107 @@
+# cars/caches.py
+app_name = 'cars'
+
+import time, math, random, hashlib
+
+from collections import defaultdict
+
+from django.utils import timezone
+from django.core.cache import cache
+from django.views.decorators.http import condition
+
+from .models import Model
+
+CATALOG_VERSION_KEY = 'cars:catalog:version'
+CATALOG_MODIFIED_KEY = 'cars:catalog:modified_at'
+GARAGE_LIST_TIMEOUT = 60 * 60 * 24
+REFRESH_LOCK_TIMEOUT = 30
+
+# Catalog Version
+# <-------------------------------------------------------------------------------------------------------------------------------->
+def get_catalog_version():
+    version = cache.get(CATALOG_VERSION_KEY)
+    if version is None:
+        # 버전 키가 유실된 경우 이전 버전과 겹치지 않도록 현재 시각으로 초기화
+        cache.add(CATALOG_VERSION_KEY, time.time_ns(), timeout=None)
+        version = cache.get(CATALOG_VERSION_KEY)
+    return version
+
+
+def bump_catalog_version():
+    cache.set(CATALOG_MODIFIED_KEY, timezone.now(), timeout=None)
+    try:
+        return cache.incr(CATALOG_VERSION_KEY)
+    except ValueError:
+        return get_catalog_version()
+
+
+# Conditional GET
+# <-------------------------------------------------------------------------------------------------------------------------------->
+# 카탈로그 버전 + 날짜(구독/버틀러 가능일 기준) + 요청 경로로 ETag를 만들어, 일치하면 본 쿼리 없이 304를 반환한다.
+def catalog_etag(request, *args, **kwargs):
+    source = f'{get_catalog_version()}:{timezone.localdate().isoformat()}:{request.get_full_path()}'
+    return hashlib.md5(source.encode()).hexdigest()
+
+
+def catalog_last_modified(request, *args, **kwargs):
+    return cache.get(CATALOG_MODIFIED_KEY)
+
+
+catalog_condition = condition(etag_func=catalog_etag, last_modified_func=catalog_last_modified)
+
+
+# Garage List
+# <-------------------------------------------------------------------------------------------------------------------------------->
+def get_garage_list(service, model_serializer_class):
+    key = f'cars:garage_list:{service}:{get_catalog_version()}'
+    garage_list = cache.get(key)
+    if garage_list is not None:
+        return garage_list
+
+    brand_model_dict = defaultdict(list)
+    for model in Model.objects.select_related('brand').with_car_counts().order_by('brand__name', 'name'):
+        brand_model_dict[model.brand].append(model)
+
+    garage_list = []
+    for brand, models in brand_model_dict.items():
+        garage_item = {
+            'name': brand.name,
+            'slug': brand.slug,
+            'model_list': model_serializer_class(models, many=True).data
+        }
+        garage_list.append(garage_item)
+
+    cache.set(key, garage_list, GARAGE_LIST_TIMEOUT)
+    return garage_list
+
+
+# Stale-While-Revalidate
+# <-------------------------------------------------------------------------------------------------------------------------------->
+# 값은 {'value', 'expires_at', 'delta'} 형태로 soft TTL(timeout) 보다 stale_timeout 만큼 더 오래 보관한다.
+# soft TTL이 지나면 락을 잡은 하나의 워커만 다시 만들고, 나머지는 기존 값을 그대로 반환한다.
+def get_or_refresh(key, builder, timeout, stale_timeout, beta=1.0):
+    envelope = cache.get(key)
+    if envelope is not None:
+        # 확률적 조기 만료(XFetch): 생성 시간(delta)이 길수록 만료 전에 미리 갱신할 확률이 높다.
+        if time.time() - envelope['delta'] * beta * math.log(1.0 - random.random()) < envelope['expires_at']:
+            return envelope['value']
+        if not cache.add(f'{key}:lock', 1, REFRESH_LOCK_TIMEOUT):
+            return envelope['value']
+
+    try:
+        started_at = time.time()
+        value = builder()
+        delta = time.time() - started_at
+        cache.set(key, {'value': value, 'expires_at': time.time() + timeout, 'delta': delta}, timeout + stale_timeout)
+    finally:
+        if envelope is not None:
+            cache.delete(f'{key}:lock')
+    return value
+
+
+def expire_cached(key, stale_timeout):
+    # 값은 남겨두고 만료 시각만 과거로 돌려, 다음 요청 하나가 갱신하고 나머지는 기존 값을 계속 사용하도록 한다.
+    envelope = cache.get(key)
+    if envelope is not None:
+        envelope['expires_at'] = 0
+        cache.set(key, envelope, stale_timeout)
@@ -0,0 +1,35 @@
+# cars/fields.py
+app_name = 'cars'
+
+from django.db import models
+from django.core.exceptions import ValidationError
+
+# 고정 길이 PostgreSQL bit(n) 컬럼. 값은 '0'/'1' 문자열로 읽고 쓴다.
+# 길이나 문자가 맞지 않는 값은 DB에 보내기 전에 ValidationError로 막는다.
+class BitStringField(models.Field):
+    description = "Fixed-length bit string"
+
+    def __init__(self, *args, length, **kwargs):
+        self.length = length
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        kwargs['length'] = self.length
+        return name, path, args, kwargs
+
+    def db_type(self, connection):
+        return f'bit({self.length})'
+
+    def to_python(self, value):
+        if value is None:
+            return value
+        if not isinstance(value, str) or len(value) != self.length or value.strip('01'):
+            raise ValidationError(f"{self.length}자리 0/1 문자열이어야 합니다.", code='invalid')
+        return value
+
+    def get_prep_value(self, value):
+        value = super().get_prep_value(value)
+        if value is None or hasattr(value, 'resolve_expression'):
+            return value
+        return self.to_python(value)
@@ -0,0 +1,88 @@
+# cars/listings.py
+app_name = 'cars'
+
+from django.db import transaction
+
+from .models import Car, CarListing
+from .caches import bump_catalog_version
+
+# 목록 payload에 들어가는 브랜드/모델 필드. 이 값이 바뀐 경우에만 소속 차량의 목록을 다시 만든다.
+LISTING_BRAND_FIELDS = {'name', 'slug', 'image', 'is_imported'}
+LISTING_MODEL_FIELDS = {'brand', 'name', 'code', 'slug', 'image', 'front_image', 'rear_image'}
+
+# Listing Serializer
+# <-------------------------------------------------------------------------------------------------------------------------------->
+# cars 앱이 서비스 앱을 import 하지 않도록 시리얼라이저는 호출 시점에 가져온다.
+def get_listing_serializer(service):
+    if service == 'subscriptions':
+        from subscriptions.serializers import SubscriptionCarDetailSerializer
+        return SubscriptionCarDetailSerializer
+    if service == 'butlers':
+        from butlers.serializers import ButlerCarDetailSerializer
+        return ButlerCarDetailSerializer
+    raise ValueError(f"Unknown listing service: {service}")
+
+
+def is_listable(car, service):
+    if service == 'subscriptions':
+        return car.is_active and car.is_subscriptable
+    if service == 'butlers':
+        return car.is_active and car.is_butler
+    return False
+
+
+# Listing Refresh
+# <-------------------------------------------------------------------------------------------------------------------------------->
+# 목록을 고친 뒤 카탈로그 버전을 올린다. 버전을 먼저 올리면 그 사이의 요청이 이전 목록을 새 버전(ETag)으로 캐시한다.
+def build_car_listing(car, service):
+    return CarListing(
+        car=car,
+        service=service,
+        payload=get_listing_serializer(service)(car).data,
+        brand_slug=car.model.brand.slug,
+        model_slug=car.model.slug,
+        mileage=car.mileage,
+        release_date=car.release_date,
+        subscription_months=sorted(fee.months for fee in car.subscription_fees.all()),
+        subscription_fee_minimum=car.subscription_fee_minimum,
+        subscription_available_from=car.subscription_available_from,
+        butler_fee=car.butler_fee,
+        butler_reservation_origin=car.butler_reservation_origin,
+        butler_reservation_bitmap=car.butler_reservation_bitmap,
+        is_new=car.is_new,
+        is_hot=car.is_hot,
+        created_at=car.created_at,
+    )
+
+
+def refresh_car_listings(car_ids):
+    car_ids = set(car_ids)
+    cars = Car.objects.filter(id__in=car_ids).select_related('model', 'model__brand').prefetch_related('subscription_fees')
+
+    listings = []
+    unlisted_car_ids = {service: set(car_ids) for service, _ in CarListing.SERVICE_CHOICES}
+    for car in cars:
+        for service, _ in CarListing.SERVICE_CHOICES:
+            if is_listable(car, service):
+                listings.append(build_car_listing(car, service))
+                unlisted_car_ids[service].discard(car.id)
+
+    with transaction.atomic():
+        for service, service_car_ids in unlisted_car_ids.items():
+            if service_car_ids:
+                CarListing.objects.filter(service=service, car_id__in=service_car_ids).delete()
+        if listings:
+            CarListing.objects.bulk_create(
+                listings,
+                update_conflicts=True,
+                unique_fields=['service', 'car'],
+                update_fields=[field.name for field in CarListing._meta.concrete_fields if field.name not in ('id', 'car', 'service')],
+            )
+    transaction.on_commit(bump_catalog_version)
+
+
+def rebuild_car_listings(batch_size=500):
+    car_ids = list(Car.objects.order_by('id').values_list('id', flat=True))
+    for start in range(0, len(car_ids), batch_size):
+        refresh_car_listings(car_ids[start:start + batch_size])
+    return len(car_ids)
@@ -0,0 +1,46 @@
+# cars/management/commands/rebuild_car_bookings.py
+app_name = 'cars'
+
+from django.db import transaction
+from django.core.management.base import BaseCommand
+
+from cars.models import CarBooking
+from cars.bookings import get_booking_period, get_booking_time_period
+from butlers.models import Butler, ButlerRequest
+from butlers.utils import get_butler_request_dates
+from subscriptions.models import Subscription, SubscriptionRequest
+
+class Command(BaseCommand):
+    help = "구독/구독 신청/버틀러/버틀러 신청 행으로 CarBooking 예약 구간 테이블을 전체 재생성합니다."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def get_bookings(self):
+        for subscription_id, car_id, start, end in Subscription.objects.values_list('id', 'request__car_id', 'start_date', 'end_date').iterator():
+            yield 'SUBSCRIPTION', subscription_id, car_id, start, end, None, None
+
+        for request_id, car_id, start, end in SubscriptionRequest.objects.filter(is_active=True).values_list('id', 'car_id', 'start_date', 'end_date').iterator():
+            yield 'SUBSCRIPTION_REQUEST', request_id, car_id, start, end, None, None
+
+        for request in ButlerRequest.objects.filter(is_active=True).only('id', 'car_id', 'start_at', 'end_at').iterator():
+            yield 'BUTLER_REQUEST', request.id, request.car_id, *get_butler_request_dates(request), request.start_at, request.end_at
+
+        for butler in Butler.objects.filter(is_active=True).select_related('request').only('id', 'request__car_id', 'request__start_at', 'request__end_at').iterator():
+            request = butler.request
+            yield 'BUTLER', butler.id, request.car_id, *get_butler_request_dates(request), request.start_at, request.end_at
+
+    def handle(self, *args, **options):
+        bookings = [
+            CarBooking(
+                source=source, source_id=source_id, car_id=car_id,
+                period=get_booking_period(start, end), time_period=get_booking_time_period(start_at, end_at),
+            )
+            for source, source_id, car_id, start, end, start_at, end_at in self.get_bookings()
+            if start is not None and end is not None and start <= end
+        ]
+
+        with transaction.atomic():
+            CarBooking.objects.all().delete()
+            CarBooking.objects.bulk_create(bookings, batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"{len(bookings)}개의 예약 구간을 재생성했습니다."))
@@ -0,0 +1,16 @@
+# cars/management/commands/rebuild_car_listings.py
+app_name = 'cars'
+
+from django.core.management.base import BaseCommand
+
+from cars.listings import rebuild_car_listings
+
+class Command(BaseCommand):
+    help = "차고 목록용 CarListing 테이블을 전체 재생성합니다."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        count = rebuild_car_listings(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"{count}대의 차량 목록을 갱신했습니다."))
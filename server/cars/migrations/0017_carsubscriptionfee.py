@@ -0,0 +1,30 @@
+# Generated by Django 5.2.4 on 2025-11-03 10:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cars', '0016_brand_is_imported_car_acquisition_tax_car_tax_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CarSubscriptionFee',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('months', models.PositiveSmallIntegerField(verbose_name='Months')),
+                ('fee', models.IntegerField(verbose_name='Subscription Fee')),
+                ('car', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='subscription_fees', to='cars.car', verbose_name='Car')),
+            ],
+            options={
+                'verbose_name': 'Car Subscription Fee',
+                'verbose_name_plural': 'Car Subscription Fees',
+                'ordering': ['car', 'months'],
+                'indexes': [models.Index(fields=['months', 'car'], name='cars_carsub_months_86f4a6_idx')],
+                'unique_together': {('car', 'months')},
+            },
+        ),
+    ]
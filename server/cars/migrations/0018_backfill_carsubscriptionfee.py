@@ -0,0 +1,30 @@
+# Generated by Django 5.2.4 on 2025-11-03 10:14
+
+from django.db import migrations
+
+SUBSCRIPTION_MONTHS = [1, 3, 6, 12, 24, 36, 48, 60, 72, 84, 96]
+
+
+def backfill_subscription_fees(apps, schema_editor):
+    Car = apps.get_model('cars', 'Car')
+    CarSubscriptionFee = apps.get_model('cars', 'CarSubscriptionFee')
+
+    fields = ['id'] + [f'subscription_fee_{months}' for months in SUBSCRIPTION_MONTHS]
+    fees = []
+    for car in Car.objects.values(*fields).iterator():
+        for months in SUBSCRIPTION_MONTHS:
+            fee = car[f'subscription_fee_{months}']
+            if fee is not None:
+                fees.append(CarSubscriptionFee(car_id=car['id'], months=months, fee=fee))
+    CarSubscriptionFee.objects.bulk_create(fees, batch_size=1000, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cars', '0017_carsubscriptionfee'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_subscription_fees, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.4 on 2025-11-05 14:43
+
+from django.db import migrations
+from django.db.models import Value
+from django.contrib.postgres.search import SearchVector
+
+
+def backfill_search_index(apps, schema_editor):
+    Car = apps.get_model('cars', 'Car')
+
+    for car in Car.objects.select_related('model', 'model__brand').iterator():
+        brand, model = car.model.brand, car.model
+        title = ' '.join(filter(None, [brand.name, model.name]))
+        detail = ' '.join(filter(None, [car.sub_model, car.trim, car.color, car.get_fuel_type_display()]))
+        Car.objects.filter(pk=car.pk).update(
+            search_document=' '.join(filter(None, [title, model.code, detail])).lower(),
+            search_vector=(
+                SearchVector(Value(title), weight='A', config='simple') +
+                SearchVector(Value(model.code or ''), weight='B', config='simple') +
+                SearchVector(Value(detail), weight='C', config='simple')
+            ),
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cars', '0019_car_search_document_car_search_vector_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_search_index, migrations.RunPython.noop),
+    ]
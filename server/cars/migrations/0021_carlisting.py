@@ -0,0 +1,45 @@
+# Generated by Django 5.2.4 on 2025-11-07 11:20
+
+import django.contrib.postgres.indexes
+import django.core.serializers.json
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cars', '0020_backfill_car_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CarListing',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('service', models.CharField(choices=[('subscriptions', 'Subscriptions'), ('butlers', 'Butlers')], max_length=16, verbose_name='Service')),
+                ('payload', models.JSONField(encoder=django.core.serializers.json.DjangoJSONEncoder, verbose_name='Payload')),
+                ('brand_slug', models.SlugField(max_length=100, verbose_name='Brand Slug')),
+                ('model_slug', models.SlugField(max_length=100, verbose_name='Model Slug')),
+                ('mileage', models.IntegerField(default=0, verbose_name='Mileage')),
+                ('release_date', models.DateField(blank=True, null=True, verbose_name='Release Date')),
+                ('subscription_months', models.JSONField(blank=True, default=list, verbose_name='Subscription Months')),
+                ('subscription_fee_minimum', models.IntegerField(blank=True, null=True, verbose_name='Subscription Fee Minimum')),
+                ('subscription_available_from', models.DateField(blank=True, null=True, verbose_name='Subscription Available From')),
+                ('butler_fee', models.IntegerField(blank=True, null=True, verbose_name='Butler Fee')),
+                ('butler_reservated_dates', models.JSONField(blank=True, null=True, verbose_name='Butler Reservated Dates')),
+                ('is_new', models.BooleanField(default=True, verbose_name='Is New')),
+                ('is_hot', models.BooleanField(default=False, verbose_name='Is Hot')),
+                ('created_at', models.DateTimeField(verbose_name='Car Created At')),
+                ('refreshed_at', models.DateTimeField(auto_now=True, verbose_name='Refreshed At')),
+                ('car', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='listings', to='cars.car', verbose_name='Car')),
+            ],
+            options={
+                'verbose_name': 'Car Listing',
+                'verbose_name_plural': 'Car Listings',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['service', '-created_at'], name='cars_listing_created_idx'), models.Index(fields=['service', 'brand_slug'], name='cars_listing_brand_idx'), models.Index(fields=['service', 'model_slug'], name='cars_listing_model_idx'), models.Index(fields=['service', 'subscription_fee_minimum'], name='cars_listing_sub_fee_idx'), models.Index(fields=['service', 'subscription_available_from'], name='cars_listing_sub_from_idx'), models.Index(fields=['service', 'butler_fee'], name='cars_listing_butler_fee_idx'), django.contrib.postgres.indexes.GinIndex(fields=['subscription_months'], name='cars_listing_months_idx')],
+                'unique_together': {('service', 'car')},
+            },
+        ),
+    ]
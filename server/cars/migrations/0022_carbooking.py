@@ -0,0 +1,35 @@
+# Generated by Django 5.2.4 on 2025-11-18 10:12
+
+import django.contrib.postgres.fields.ranges
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import BtreeGistExtension
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cars', '0021_carlisting'),
+    ]
+
+    operations = [
+        BtreeGistExtension(),
+        migrations.CreateModel(
+            name='CarBooking',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(choices=[('SUBSCRIPTION', 'Subscription'), ('SUBSCRIPTION_REQUEST', 'Subscription Request'), ('BUTLER', 'Butler'), ('BUTLER_REQUEST', 'Butler Request')], max_length=32, verbose_name='Source')),
+                ('source_id', models.PositiveIntegerField(verbose_name='Source ID')),
+                ('period', django.contrib.postgres.fields.ranges.DateRangeField(verbose_name='Period')),
+                ('modified_at', models.DateTimeField(auto_now=True, verbose_name='Modified At')),
+                ('car', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='bookings', to='cars.car', verbose_name='Car')),
+            ],
+            options={
+                'verbose_name': 'Car Booking',
+                'verbose_name_plural': 'Car Bookings',
+                'indexes': [django.contrib.postgres.indexes.GistIndex(fields=['car', 'period'], name='cars_booking_period_idx')],
+                'unique_together': {('source', 'source_id')},
+            },
+        ),
+    ]
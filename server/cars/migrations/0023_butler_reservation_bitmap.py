@@ -0,0 +1,78 @@
+# Generated by Django 5.2.4 on 2025-11-19 14:32
+
+from datetime import date, timedelta
+
+import cars.fields
+from django.db import migrations, models
+from django.utils import timezone
+
+BUTLER_RESERVATION_DAYS = 730
+
+
+def encode_reservated_dates(dates, origin):
+    offsets = {(date.fromisoformat(value) - origin).days for value in dates or []}
+    if not any(0 <= offset < BUTLER_RESERVATION_DAYS for offset in offsets):
+        return None, None
+    return origin, ''.join('1' if offset in offsets else '0' for offset in range(BUTLER_RESERVATION_DAYS))
+
+
+def decode_reservation_bitmap(origin, bitmap):
+    if not bitmap:
+        return None
+    return [(origin + timedelta(days=offset)).isoformat() for offset, bit in enumerate(bitmap) if bit == '1']
+
+
+def backfill_reservation_bitmaps(apps, schema_editor):
+    today = timezone.localdate()
+    for model_name in ('Car', 'CarListing'):
+        model = apps.get_model('cars', model_name)
+        for row in model.objects.exclude(butler_reservated_dates=None).only('id', 'butler_reservated_dates').iterator():
+            origin, bitmap = encode_reservated_dates(row.butler_reservated_dates, today)
+            model.objects.filter(id=row.id).update(butler_reservation_origin=origin, butler_reservation_bitmap=bitmap)
+
+
+def restore_reservated_dates(apps, schema_editor):
+    for model_name in ('Car', 'CarListing'):
+        model = apps.get_model('cars', model_name)
+        for row in model.objects.exclude(butler_reservation_bitmap=None).only('id', 'butler_reservation_origin', 'butler_reservation_bitmap').iterator():
+            dates = decode_reservation_bitmap(row.butler_reservation_origin, row.butler_reservation_bitmap)
+            model.objects.filter(id=row.id).update(butler_reservated_dates=dates)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cars', '0022_carbooking'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='car',
+            name='butler_reservation_bitmap',
+            field=cars.fields.BitStringField(blank=True, editable=False, length=730, null=True, verbose_name='Butler Reservation Bitmap'),
+        ),
+        migrations.AddField(
+            model_name='car',
+            name='butler_reservation_origin',
+            field=models.DateField(blank=True, editable=False, null=True, verbose_name='Butler Reservation Origin'),
+        ),
+        migrations.AddField(
+            model_name='carlisting',
+            name='butler_reservation_bitmap',
+            field=cars.fields.BitStringField(blank=True, length=730, null=True, verbose_name='Butler Reservation Bitmap'),
+        ),
+        migrations.AddField(
+            model_name='carlisting',
+            name='butler_reservation_origin',
+            field=models.DateField(blank=True, null=True, verbose_name='Butler Reservation Origin'),
+        ),
+        migrations.RunPython(backfill_reservation_bitmaps, restore_reservated_dates),
+        migrations.RemoveField(
+            model_name='car',
+            name='butler_reservated_dates',
+        ),
+        migrations.RemoveField(
+            model_name='carlisting',
+            name='butler_reservated_dates',
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.4 on 2025-11-20 09:47
+
+import django.contrib.postgres.fields.ranges
+import django.contrib.postgres.indexes
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cars', '0023_butler_reservation_bitmap'),
+        ('butlers', '0004_butlercoupon_issued_count_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='carbooking',
+            name='time_period',
+            field=django.contrib.postgres.fields.ranges.DateTimeRangeField(blank=True, null=True, verbose_name='Time Period'),
+        ),
+        migrations.AddIndex(
+            model_name='carbooking',
+            index=django.contrib.postgres.indexes.GistIndex(fields=['car', 'time_period'], name='cars_booking_time_idx'),
+        ),
+        migrations.RunSQL(
+            sql=[
+                "UPDATE cars_carbooking SET time_period = tstzrange(request.start_at, request.end_at, '[)') "
+                "FROM butlers_butlerrequest AS request "
+                "WHERE cars_carbooking.source = 'BUTLER_REQUEST' AND cars_carbooking.source_id = request.id "
+                "AND request.start_at < request.end_at",
+                "UPDATE cars_carbooking SET time_period = tstzrange(request.start_at, request.end_at, '[)') "
+                "FROM butlers_butler AS butler JOIN butlers_butlerrequest AS request ON request.id = butler.request_id "
+                "WHERE cars_carbooking.source = 'BUTLER' AND cars_carbooking.source_id = butler.id "
+                "AND request.start_at < request.end_at",
+            ],
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
@@ -0,0 +1,68 @@
+# Generated by Django 5.2.4 on 2025-11-21 18:40
+
+from django.db import migrations
+from django.utils import timezone
+from django.db.backends.postgresql.psycopg_any import DateRange, DateTimeTZRange
+
+
+# 예약 구간은 시작일~종료일을 모두 포함하고, 시각 구간은 [start_at, end_at) 이다. (cars.bookings와 같은 규칙)
+def build_booking(CarBooking, source, source_id, car_id, start, end, start_at=None, end_at=None):
+    if car_id is None or start is None or end is None or start > end:
+        return None
+    time_period = DateTimeTZRange(start_at, end_at, bounds='[)') if start_at and end_at and start_at < end_at else None
+    return CarBooking(source=source, source_id=source_id, car_id=car_id, period=DateRange(start, end, bounds='[]'), time_period=time_period)
+
+
+# 버틀러 예약 구간은 요청의 시작/종료 시각을 현지 날짜로 바꾼 기간이다.
+def get_butler_request_dates(start_at, end_at):
+    if not start_at or not end_at:
+        return None, None
+    return timezone.localtime(start_at).date(), timezone.localtime(end_at).date()
+
+
+def get_bookings(apps, CarBooking):
+    Subscription = apps.get_model('subscriptions', 'Subscription')
+    SubscriptionRequest = apps.get_model('subscriptions', 'SubscriptionRequest')
+    Butler = apps.get_model('butlers', 'Butler')
+    ButlerRequest = apps.get_model('butlers', 'ButlerRequest')
+
+    for subscription_id, car_id, start, end in Subscription.objects.values_list('id', 'request__car_id', 'start_date', 'end_date').iterator():
+        yield build_booking(CarBooking, 'SUBSCRIPTION', subscription_id, car_id, start, end)
+
+    for request_id, car_id, start, end in SubscriptionRequest.objects.filter(is_active=True).values_list('id', 'car_id', 'start_date', 'end_date').iterator():
+        yield build_booking(CarBooking, 'SUBSCRIPTION_REQUEST', request_id, car_id, start, end)
+
+    for request_id, car_id, start_at, end_at in ButlerRequest.objects.filter(is_active=True).values_list('id', 'car_id', 'start_at', 'end_at').iterator():
+        yield build_booking(CarBooking, 'BUTLER_REQUEST', request_id, car_id, *get_butler_request_dates(start_at, end_at), start_at, end_at)
+
+    butlers = Butler.objects.filter(is_active=True).values_list('id', 'request__car_id', 'request__start_at', 'request__end_at')
+    for butler_id, car_id, start_at, end_at in butlers.iterator():
+        yield build_booking(CarBooking, 'BUTLER', butler_id, car_id, *get_butler_request_dates(start_at, end_at), start_at, end_at)
+
+
+# 배포 시점의 구독/구독 신청/버틀러/버틀러 신청 행으로 예약 구간을 채운다. (rebuild_car_bookings 명령과 같은 내용)
+# 이미 시그널로 들어간 구간은 원본 행 기준으로 다시 쓴다.
+def backfill_car_bookings(apps, schema_editor):
+    CarBooking = apps.get_model('cars', 'CarBooking')
+    bookings = []
+    for booking in get_bookings(apps, CarBooking):
+        if booking is not None:
+            bookings.append(booking)
+        if len(bookings) >= 1000:
+            CarBooking.objects.bulk_create(bookings, update_conflicts=True, unique_fields=['source', 'source_id'], update_fields=['car', 'period', 'time_period'])
+            bookings = []
+    if bookings:
+        CarBooking.objects.bulk_create(bookings, update_conflicts=True, unique_fields=['source', 'source_id'], update_fields=['car', 'period', 'time_period'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cars', '0024_carbooking_time_period'),
+        ('butlers', '0004_butlercoupon_issued_count_and_more'),
+        ('subscriptions', '0023_subscriptioninstallment'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_car_bookings, migrations.RunPython.noop),
+    ]
@@ -1,11 +1,18 @@
 # cars/models.py
 app_name = 'cars'
 
-from datetime import date
+from datetime import date, timedelta
 
-from django.db import models
+from django.db import models, transaction
 from django.utils.text import slugify
 from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models.functions import Lower, NullIf
+from django.contrib.postgres.fields import DateRangeField, DateTimeRangeField
+from django.contrib.postgres.indexes import GinIndex, GistIndex
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector, SearchVectorField, TrigramWordSimilarity
+
+from .fields import BitStringField
 
 class Brand(models.Model):
     name = models.CharField(max_length=100, verbose_name="Brand Name")
@@ -34,6 +41,14 @@ class Brand(models.Model):
         return self.name
 
 
+class ModelQuerySet(models.QuerySet):
+    def with_car_counts(self):
+        return self.annotate(
+            subscription_car_count=models.Count('cars', filter=models.Q(cars__is_active=True, cars__is_subscriptable=True)),
+            butler_car_count=models.Count('cars', filter=models.Q(cars__is_active=True, cars__is_butler=True)),
+        )
+
+
 class Model(models.Model):
     brand = models.ForeignKey(Brand, on_delete=models.CASCADE, related_name='models', verbose_name="Brand")
     name = models.CharField(max_length=100, verbose_name="Model Name")
@@ -46,6 +61,8 @@ class Model(models.Model):
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Created At")
     modified_at = models.DateTimeField(auto_now=True, verbose_name="Modified At")
 
+    objects = ModelQuerySet.as_manager()
+
     class Meta:
         verbose_name = "Model"
         verbose_name_plural = "Models"
@@ -70,6 +87,48 @@ class Model(models.Model):
         return f"{self.brand.name} - {self.name} ({self.code})"
 
 
+class CarQuerySet(models.QuerySet):
+    def search(self, query):
+        # tsvector 단어 일치 + pg_trgm 부분/유사 일치, 두 점수를 합산해 정렬
+        terms = query.lower().split()
+        query = ' '.join(terms)
+        search_query = SearchQuery(query, config='simple', search_type='websearch')
+        return self.filter(
+            models.Q(search_vector=search_query) |
+            models.Q(*[models.Q(search_document__contains=term) for term in terms]) |
+            models.Q(search_document__trigram_word_similar=query)
+        ).annotate(
+            search_rank=SearchRank(models.F('search_vector'), search_query) + TrigramWordSimilarity(query, 'search_document')
+        ).order_by('-search_rank', 'id')
+
+    def update_search_index(self):
+        # Car.get_search_index()와 같은 문서/벡터를 SQL 식으로 만들어, 차량마다 저장하지 않고 UPDATE 한 번으로 갱신
+        model = Model.objects.filter(pk=models.OuterRef('model_id'))
+        model_code = models.Subquery(model.values('code')[:1])
+        title = join_words(models.Subquery(model.values('brand__name')[:1]), models.Subquery(model.values('name')[:1]))
+        fuel_type = models.Case(
+            *[models.When(fuel_type=value, then=models.Value(label)) for value, label in self.model.FUEL_TYPE_CHOICES],
+            default=models.F('fuel_type'),
+        )
+        detail = join_words(models.F('sub_model'), models.F('trim'), models.F('color'), fuel_type)
+        return self.update(
+            search_document=Lower(join_words(title, model_code, detail)),
+            search_vector=(
+                SearchVector(title, weight='A', config='simple') +
+                SearchVector(model_code, weight='B', config='simple') +
+                SearchVector(detail, weight='C', config='simple')
+            ),
+        )
+
+
+# ' '.join(filter(None, words))와 같다. NULL/빈 문자열은 건너뛴다.
+def join_words(*words):
+    return models.Func(
+        models.Value(' '), *[NullIf(word, models.Value('')) for word in words],
+        function='CONCAT_WS', output_field=models.TextField(),
+    )
+
+
 class Car(models.Model):
     FUEL_TYPE_CHOICES = [
         ('GASOLINE', 'Gasoline'),
@@ -90,6 +149,9 @@ class Car(models.Model):
         ('AWD', 'All Wheel Drive'),
     ]
 
+    SUBSCRIPTION_MONTHS = [1, 3, 6, 12, 24, 36, 48, 60, 72, 84, 96]
+    BUTLER_RESERVATION_DAYS = 730
+
     model = models.ForeignKey(Model, on_delete=models.CASCADE, related_name='cars', verbose_name="Model")
     sub_model = models.CharField(blank=True, null=True, verbose_name="Sub Model")
     engine_size = models.IntegerField(verbose_name="Engine Size", default=2000)
@@ -133,7 +195,9 @@ class Car(models.Model):
     is_butler = models.BooleanField(default=False, verbose_name="Is Butler")
     butler_fee = models.IntegerField(blank=True, null=True, verbose_name="Butler Fee")
     butler_overtime_fee = models.IntegerField(blank=True, null=True, verbose_name="Butler Overtime Fee")
-    butler_reservated_dates = models.JSONField(blank=True, null=True, verbose_name="Butler Reservated Dates")
+    # origin 날짜부터 하루 1비트씩, 버틀러 예약이 있는 날을 1로 표시한다. 예약이 없으면 NULL
+    butler_reservation_origin = models.DateField(blank=True, null=True, editable=False, verbose_name="Butler Reservation Origin")
+    butler_reservation_bitmap = BitStringField(length=BUTLER_RESERVATION_DAYS, blank=True, null=True, editable=False, verbose_name="Butler Reservation Bitmap")
     butler_available_from = models.DateField(blank=True, null=True, verbose_name="Butler Available From")
 
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Created At")
@@ -144,10 +208,19 @@ class Car(models.Model):
     
     is_active = models.BooleanField(default=True, verbose_name="Is Active")
 
+    search_document = models.TextField(blank=True, default='', editable=False, verbose_name="Search Document")
+    search_vector = SearchVectorField(blank=True, null=True, editable=False, verbose_name="Search Vector")
+
+    objects = CarQuerySet.as_manager()
+
     class Meta:
         verbose_name = "Car"
         verbose_name_plural = "Cars"
         ordering = ['-created_at']
+        indexes = [
+            GinIndex(fields=['search_vector'], name='cars_car_search_vector_idx'),
+            GinIndex(fields=['search_document'], name='cars_car_search_trgm_idx', opclasses=['gin_trgm_ops']),
+        ]
 
     def clean(self):
         super().clean()
@@ -183,6 +256,35 @@ class Car(models.Model):
 
         self.subscription_fee_minimum = 0
 
+    def sync_subscription_fees(self):
+        # subscription_fee_N 컬럼을 CarSubscriptionFee 테이블로 동기화
+        fees = [
+            CarSubscriptionFee(car=self, months=months, fee=getattr(self, f'subscription_fee_{months}'))
+            for months in self.SUBSCRIPTION_MONTHS
+            if getattr(self, f'subscription_fee_{months}') is not None
+        ]
+        self.subscription_fees.exclude(months__in=[fee.months for fee in fees]).delete()
+        if fees:
+            CarSubscriptionFee.objects.bulk_create(fees, update_conflicts=True, unique_fields=['car', 'months'], update_fields=['fee'])
+
+    def get_search_index(self):
+        # 브랜드/모델명은 A, 모델 코드는 B, 세부 사양은 C 가중치로 검색 문서와 벡터를 만든다.
+        brand, model = self.model.brand, self.model
+        title = ' '.join(filter(None, [brand.name, model.name]))
+        detail = ' '.join(filter(None, [self.sub_model, self.trim, self.color, self.get_fuel_type_display()]))
+        search_document = ' '.join(filter(None, [title, model.code, detail])).lower()
+        search_vector = (
+            SearchVector(models.Value(title), weight='A', config='simple') +
+            SearchVector(models.Value(model.code or ''), weight='B', config='simple') +
+            SearchVector(models.Value(detail), weight='C', config='simple')
+        )
+        return search_document, search_vector
+
+    def get_subscription_fee(self, month):
+        # 구독 기간(month) 이하에서 가장 긴 요금 구간의 월 구독료 (컴파일된 요금표 캐시 사용)
+        from .pricing import get_subscription_fee
+        return get_subscription_fee(self.pk, month)
+
     def calculate_car_age(self):
         if not self.release_date:
             return 1
@@ -220,7 +322,112 @@ class Car(models.Model):
         self.tax = self.calculate_tax()
         self.acquisition_tax = self.calculate_acquisition_tax()
         self.full_clean()
-        super().save(*args, **kwargs)
+        # 파생 테이블 동기화까지 한 트랜잭션으로 묶어 on_commit 훅이 완료된 상태를 보도록 한다.
+        # 검색 문서/벡터는 별도 UPDATE 없이 같은 INSERT/UPDATE 문에 함께 기록한다.
+        self.search_document, self.search_vector = self.get_search_index()
+        if kwargs.get('update_fields') is not None:
+            kwargs['update_fields'] = {*kwargs['update_fields'], 'search_document', 'search_vector'}
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            self.sync_subscription_fees()
     
     def __str__(self):
-        return f"{self.model.brand.name} {self.model.name} - {self.sub_model} - {self.license_plate}"
\ No newline at end of file
+        return f"{self.model.brand.name} {self.model.name} - {self.sub_model} - {self.license_plate}"
+
+    @property
+    def butler_reservated_dates(self):
+        if not self.butler_reservation_bitmap:
+            return []
+        return [
+            (self.butler_reservation_origin + timedelta(days=offset)).isoformat()
+            for offset, bit in enumerate(self.butler_reservation_bitmap) if bit == '1'
+        ]
+
+
+class CarSubscriptionFee(models.Model):
+    car = models.ForeignKey(Car, on_delete=models.CASCADE, related_name='subscription_fees', verbose_name="Car")
+    months = models.PositiveSmallIntegerField(verbose_name="Months")
+    fee = models.IntegerField(verbose_name="Subscription Fee")
+
+    class Meta:
+        verbose_name = "Car Subscription Fee"
+        verbose_name_plural = "Car Subscription Fees"
+        ordering = ['car', 'months']
+        unique_together = [['car', 'months']]
+        indexes = [models.Index(fields=['months', 'car'])]
+
+    def __str__(self):
+        return f"{self.car} - {self.months} months: {self.fee}"
+
+class CarListing(models.Model):
+    SERVICE_CHOICES = [
+        ('subscriptions', 'Subscriptions'),
+        ('butlers', 'Butlers'),
+    ]
+
+    car = models.ForeignKey(Car, on_delete=models.CASCADE, related_name='listings', verbose_name="Car")
+    service = models.CharField(max_length=16, choices=SERVICE_CHOICES, verbose_name="Service")
+    payload = models.JSONField(encoder=DjangoJSONEncoder, verbose_name="Payload")
+
+    brand_slug = models.SlugField(max_length=100, verbose_name="Brand Slug")
+    model_slug = models.SlugField(max_length=100, verbose_name="Model Slug")
+    mileage = models.IntegerField(default=0, verbose_name="Mileage")
+    release_date = models.DateField(blank=True, null=True, verbose_name="Release Date")
+    subscription_months = models.JSONField(default=list, blank=True, verbose_name="Subscription Months")
+    subscription_fee_minimum = models.IntegerField(blank=True, null=True, verbose_name="Subscription Fee Minimum")
+    subscription_available_from = models.DateField(blank=True, null=True, verbose_name="Subscription Available From")
+    butler_fee = models.IntegerField(blank=True, null=True, verbose_name="Butler Fee")
+    butler_reservation_origin = models.DateField(blank=True, null=True, verbose_name="Butler Reservation Origin")
+    butler_reservation_bitmap = BitStringField(length=Car.BUTLER_RESERVATION_DAYS, blank=True, null=True, verbose_name="Butler Reservation Bitmap")
+    is_new = models.BooleanField(default=True, verbose_name="Is New")
+    is_hot = models.BooleanField(default=False, verbose_name="Is Hot")
+    created_at = models.DateTimeField(verbose_name="Car Created At")
+    refreshed_at = models.DateTimeField(auto_now=True, verbose_name="Refreshed At")
+
+    class Meta:
+        verbose_name = "Car Listing"
+        verbose_name_plural = "Car Listings"
+        ordering = ['-created_at']
+        unique_together = [['service', 'car']]
+        indexes = [
+            models.Index(fields=['service', '-created_at'], name='cars_listing_created_idx'),
+            models.Index(fields=['service', 'brand_slug'], name='cars_listing_brand_idx'),
+            models.Index(fields=['service', 'model_slug'], name='cars_listing_model_idx'),
+            models.Index(fields=['service', 'subscription_fee_minimum'], name='cars_listing_sub_fee_idx'),
+            models.Index(fields=['service', 'subscription_available_from'], name='cars_listing_sub_from_idx'),
+            models.Index(fields=['service', 'butler_fee'], name='cars_listing_butler_fee_idx'),
+            GinIndex(fields=['subscription_months'], name='cars_listing_months_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.service} - {self.car_id}"
+
+
+# 차량 예약 구간. 구독/구독 신청/버틀러/버틀러 신청 행이 각각 하나의 날짜 구간으로 동기화된다.
+class CarBooking(models.Model):
+    SOURCE_CHOICES = [
+        ('SUBSCRIPTION', 'Subscription'),
+        ('SUBSCRIPTION_REQUEST', 'Subscription Request'),
+        ('BUTLER', 'Butler'),
+        ('BUTLER_REQUEST', 'Butler Request'),
+    ]
+
+    car = models.ForeignKey(Car, on_delete=models.CASCADE, related_name='bookings', verbose_name="Car")
+    source = models.CharField(max_length=32, choices=SOURCE_CHOICES, verbose_name="Source")
+    source_id = models.PositiveIntegerField(verbose_name="Source ID")
+    period = DateRangeField(verbose_name="Period")
+    # 시각 단위 예약 구간. 시작/종료 시각이 있는 버틀러 예약에만 채워진다.
+    time_period = DateTimeRangeField(blank=True, null=True, verbose_name="Time Period")
+    modified_at = models.DateTimeField(auto_now=True, verbose_name="Modified At")
+
+    class Meta:
+        verbose_name = "Car Booking"
+        verbose_name_plural = "Car Bookings"
+        unique_together = [['source', 'source_id']]
+        indexes = [
+            GistIndex(fields=['car', 'period'], name='cars_booking_period_idx'),
+            GistIndex(fields=['car', 'time_period'], name='cars_booking_time_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.car_id} - {self.source} {self.source_id} ({self.period})"
@@ -0,0 +1,63 @@
+# cars/pricing.py
+app_name = 'cars'
+
+from bisect import bisect_right
+from collections import defaultdict
+
+from django.core.cache import cache
+
+from .models import CarSubscriptionFee
+
+PRICING_TABLE_TIMEOUT = 60 * 60 * 24
+
+# Pricing Table
+# <-------------------------------------------------------------------------------------------------------------------------------->
+# 차량의 요금 구간을 (개월 수 오름차순 튜플, 월 구독료 튜플) 한 쌍으로 컴파일해 캐시한다.
+# 구독료가 없는 차량도 빈 테이블로 캐시해 반복 조회 시 DB를 다시 읽지 않는다.
+EMPTY_PRICING_TABLE = ((), ())
+
+
+def get_pricing_table_key(car_id):
+    return f'cars:pricing:{car_id}'
+
+
+def compile_pricing_tables(car_ids):
+    tiers = defaultdict(list)
+    rows = CarSubscriptionFee.objects.filter(car_id__in=car_ids, fee__gt=0).order_by('car_id', 'months').values_list('car_id', 'months', 'fee')
+    for car_id, months, fee in rows:
+        tiers[car_id].append((months, fee))
+    return {car_id: tuple(zip(*tiers[car_id])) if tiers[car_id] else EMPTY_PRICING_TABLE for car_id in car_ids}
+
+
+def get_pricing_tables(car_ids):
+    keys = {car_id: get_pricing_table_key(car_id) for car_id in set(car_ids)}
+    cached = cache.get_many(keys.values())
+    tables = {car_id: cached[key] for car_id, key in keys.items() if key in cached}
+
+    missing_car_ids = [car_id for car_id in keys if car_id not in tables]
+    if missing_car_ids:
+        compiled = compile_pricing_tables(missing_car_ids)
+        cache.set_many({keys[car_id]: table for car_id, table in compiled.items()}, PRICING_TABLE_TIMEOUT)
+        tables.update(compiled)
+    return tables
+
+
+def get_pricing_table(car_id):
+    return get_pricing_tables([car_id])[car_id]
+
+
+def invalidate_pricing_table(car_id):
+    cache.delete(get_pricing_table_key(car_id))
+
+
+# Fee Lookup
+# <-------------------------------------------------------------------------------------------------------------------------------->
+# 구독 기간(month) 이하에서 가장 긴 요금 구간의 월 구독료. 해당 구간이 없으면 None
+def lookup_fee(table, month):
+    months, fees = table
+    index = bisect_right(months, month)
+    return fees[index - 1] if index else None
+
+
+def get_subscription_fee(car_id, month):
+    return lookup_fee(get_pricing_table(car_id), month)
@@ -0,0 +1,27 @@
+# cars/projections.py
+app_name = 'cars'
+
+from collections import defaultdict
+
+# Model Projection
+# <-------------------------------------------------------------------------------------------------------------------------------->
+# 모델 목록/상세 응답을 모델 인스턴스 없이 values()로 필요한 컬럼만 읽어 Python에서 묶는다.
+# 반환 형태는 {Service}ModelListSerializer 출력과 동일하다.
+def project_models(models_queryset, cars_queryset, brand_fields, car_fields):
+    model_rows = list(models_queryset.values('id', 'name', 'code', 'image', *[f'brand__{field}' for field in brand_fields]))
+
+    cars_by_model = defaultdict(list)
+    for car in cars_queryset.filter(model_id__in=[row['id'] for row in model_rows]).values('model_id', *car_fields):
+        cars_by_model[car.pop('model_id')].append(car)
+
+    return [
+        {
+            'id': row['id'],
+            'brand': {field: row[f'brand__{field}'] for field in brand_fields},
+            'name': row['name'],
+            'code': row['code'],
+            'image': row['image'],
+            'car': cars_by_model.get(row['id']) or None,
+        }
+        for row in model_rows
+    ]
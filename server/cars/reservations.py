@@ -0,0 +1,136 @@
+# cars/reservations.py
+app_name = 'cars'
+
+from datetime import timedelta
+
+from django.db import connection, models, transaction
+from django.utils import timezone
+
+from .models import Car, CarBooking, CarListing
+from .listings import refresh_car_listings
+
+BUTLER_RESERVATION_DAYS = Car.BUTLER_RESERVATION_DAYS
+BUTLER_BOOKING_SOURCES = ('BUTLER', 'BUTLER_REQUEST')
+
+# Reservation Bitmap
+# <-------------------------------------------------------------------------------------------------------------------------------->
+# 오늘을 origin으로 하는 bit(730) 비트맵을 차량의 버틀러 예약 구간(CarBooking)에서 UPDATE 한 번으로 다시 만든다.
+# 예약마다 [시작, 종료) 구간의 비트를 1로 채운 비트열을 bit_or로 합친다. 예약이 없으면 NULL
+def update_butler_reservation_bitmap(car_id):
+    today = timezone.localdate()
+    quote_name = connection.ops.quote_name
+    bits = f'bit({BUTLER_RESERVATION_DAYS})'
+    start_offset = "GREATEST(lower(period) - %s::date, 0)"
+    end_offset = f"LEAST(upper(period) - %s::date, {BUTLER_RESERVATION_DAYS})"
+    sql = (
+        f"UPDATE {quote_name(Car._meta.db_table)} SET butler_reservation_origin = %s::date, butler_reservation_bitmap = ("
+        f"SELECT bit_or((repeat('0', {start_offset}) || repeat('1', {end_offset} - {start_offset}))::varbit::{bits}) "
+        f"FROM {quote_name(CarBooking._meta.db_table)} "
+        f"WHERE car_id = %s AND source IN %s AND period && daterange(%s::date, %s::date)"
+        f") WHERE id = %s"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [
+            today, today, today, today, car_id, BUTLER_BOOKING_SOURCES,
+            today, today + timedelta(days=BUTLER_RESERVATION_DAYS), car_id,
+        ])
+        updated = cursor.rowcount
+
+    if updated:
+        transaction.on_commit(lambda: refresh_car_listings([car_id]))
+
+
+# 매일 origin을 오늘로 옮기며 지난 날짜의 비트를 왼쪽 시프트로 버리고, 새로 창에 들어온 꼬리 구간
+# [이전 origin + 730일, 오늘 + 730일)의 비트는 CarBooking에서 채워 OR 한다. (origin이 없던 차량은 창 전체)
+# 남은 예약이 없으면 NULL로 비우고, 목록(CarListing)에는 차량의 결과를 그대로 복사한다.
+def compact_butler_reservation_bitmaps():
+    today = timezone.localdate()
+    quote_name = connection.ops.quote_name
+    car_table, booking_table, listing_table = (quote_name(model._meta.db_table) for model in (Car, CarBooking, CarListing))
+    bits = f'bit({BUTLER_RESERVATION_DAYS})'
+    start_offset = "GREATEST(lower(booking.period) - %(today)s::date, 0)"
+    end_offset = f"LEAST(upper(booking.period) - %(today)s::date, {BUTLER_RESERVATION_DAYS})"
+    tail_start = f"COALESCE(GREATEST(car.butler_reservation_origin + {BUTLER_RESERVATION_DAYS}, %(today)s::date), %(today)s::date)"
+    sql = (
+        f"WITH tail AS ("
+        f"SELECT car.id AS car_id, bit_or((repeat('0', {start_offset}) || repeat('1', {end_offset} - {start_offset}))::varbit::{bits}) AS bits "
+        f"FROM {car_table} AS car JOIN {booking_table} AS booking ON booking.car_id = car.id "
+        f"WHERE booking.source IN %(sources)s AND booking.period && daterange({tail_start}, %(last_day)s::date) "
+        f"GROUP BY car.id"
+        f"), compacted AS ("
+        f"SELECT car.id, COALESCE(car.butler_reservation_bitmap << (%(today)s::date - car.butler_reservation_origin), B'0'::{bits}) "
+        f"| COALESCE(tail.bits, B'0'::{bits}) AS bitmap "
+        f"FROM {car_table} AS car LEFT JOIN tail ON tail.car_id = car.id "
+        f"WHERE car.butler_reservation_origin < %(today)s::date OR tail.car_id IS NOT NULL"
+        f") "
+        f"UPDATE {car_table} AS car SET "
+        f"butler_reservation_bitmap = CASE WHEN position(B'1' IN compacted.bitmap) = 0 THEN NULL ELSE compacted.bitmap END, "
+        f"butler_reservation_origin = CASE WHEN position(B'1' IN compacted.bitmap) = 0 THEN NULL ELSE %(today)s::date END "
+        f"FROM compacted WHERE car.id = compacted.id"
+    )
+    params = {'today': today, 'last_day': today + timedelta(days=BUTLER_RESERVATION_DAYS), 'sources': BUTLER_BOOKING_SOURCES}
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        compacted = cursor.rowcount
+        cursor.execute(
+            f"UPDATE {listing_table} AS listing SET "
+            f"butler_reservation_bitmap = car.butler_reservation_bitmap, butler_reservation_origin = car.butler_reservation_origin "
+            f"FROM {car_table} AS car WHERE listing.car_id = car.id AND ("
+            f"listing.butler_reservation_origin IS DISTINCT FROM car.butler_reservation_origin "
+            f"OR listing.butler_reservation_bitmap IS DISTINCT FROM car.butler_reservation_bitmap)"
+        )
+    return compacted
+
+# Reservation Query
+# <-------------------------------------------------------------------------------------------------------------------------------->
+# 비트맵이 담을 수 있는 날짜 범위: 오늘부터 730일
+def get_reservation_window():
+    today = timezone.localdate()
+    return today, today + timedelta(days=BUTLER_RESERVATION_DAYS - 1)
+
+
+# 요청 날짜들을 가장 이른 날짜 기준 비트 마스크로 만든다.
+# 지난 날짜는 비트맵에서 지워져 예약이 남지 않으므로 빼고, 범위를 넘는 날짜는 판단할 수 없으므로 ValueError를 낸다.
+# 남은 날짜는 모두 범위 안에 있으므로 마스크(730비트)에서 빠지는 날짜가 없다. 남은 날짜가 없으면 None
+def get_reservation_mask(dates):
+    first_day, last_day = get_reservation_window()
+    if max(dates) > last_day:
+        raise ValueError(f"버틀러 예약은 {last_day.isoformat()}까지만 조회할 수 있습니다.")
+    dates = {day for day in dates if day >= first_day}
+    if not dates:
+        return None
+    base = min(dates)
+    offsets = {(day - base).days for day in dates}
+    return base, ''.join('1' if offset in offsets else '0' for offset in range(BUTLER_RESERVATION_DAYS))
+
+
+# 차량별 origin에 맞춰 마스크를 시프트한 뒤 비트맵과 AND 한 번으로 겹침을 확인한다.
+# butler_reservation_origin/bitmap 컬럼을 가진 Car, CarListing 쿼리셋 모두에 쓸 수 있다.
+def filter_butler_reservation_free(queryset, dates):
+    if not dates:
+        return queryset
+    reservation_mask = get_reservation_mask(dates)
+    if reservation_mask is None:
+        return queryset
+    base, mask = reservation_mask
+    table = connection.ops.quote_name(queryset.model._meta.db_table)
+    condition = models.expressions.RawSQL(
+        f"({table}.butler_reservation_bitmap IS NULL OR position(B'1' IN "
+        f"{table}.butler_reservation_bitmap & (%s::bit({BUTLER_RESERVATION_DAYS}) >> (%s::date - {table}.butler_reservation_origin))) = 0)",
+        [mask, base],
+        output_field=models.BooleanField(),
+    )
+    return queryset.filter(condition)
+
+
+def get_butler_reservation_dates(start, end):
+    days = min((end - start).days + 1, BUTLER_RESERVATION_DAYS)
+    return [start + timedelta(days=offset) for offset in range(days)]
+
+
+def filter_butler_free_between(queryset, start, end):
+    return filter_butler_reservation_free(queryset, get_butler_reservation_dates(start, end))
+
+
+def is_butler_free_between(car_id, start, end):
+    return filter_butler_free_between(Car.objects.filter(id=car_id), start, end).exists()
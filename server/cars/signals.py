@@ -0,0 +1,141 @@
+# cars/signals.py
+app_name = "cars"
+
+from django.db.models.signals import pre_save, post_save, post_delete, post_migrate
+from django.dispatch import receiver
+from django.db import connections, transaction
+from django.db.migrations.executor import MigrationExecutor
+
+from .models import Brand, Model, Car, CarListing
+from .caches import bump_catalog_version
+from .listings import LISTING_BRAND_FIELDS, LISTING_MODEL_FIELDS, refresh_car_listings, rebuild_car_listings
+from .pricing import invalidate_pricing_table
+
+# 검색 문서에 들어가는 브랜드/모델 필드. 이 값이 바뀐 경우에만 소속 차량의 검색 인덱스를 다시 만든다.
+SEARCH_BRAND_FIELDS = {'name'}
+SEARCH_MODEL_FIELDS = {'brand', 'name', 'code'}
+
+# 카탈로그 응답(차고/모델/차량 목록과 상세)에 노출되는 차량 필드. 이 값이 바뀐 저장에서만 카탈로그 버전을 올린다.
+# 가능일과 예약 비트맵은 update_available_from / update_butler_reservation_bitmap이 값이 바뀐 경우에만 직접 버전을 올리고,
+# 수정 시각과 검색 인덱스는 응답에 나가지 않는다.
+CATALOG_CAR_FIELDS = {field.name for field in Car._meta.concrete_fields} - {
+    'id', 'modified_at', 'search_document', 'search_vector',
+    'subscription_available_from', 'butler_available_from', 'butler_reservation_origin', 'butler_reservation_bitmap',
+}
+
+# Changed Fields
+# <-------------------------------------------------------------------------------------------------------------------------------->
+# 저장 전 DB 값과 비교해 바뀐 필드 이름을 instance._changed_fields에 남긴다. 새로 만드는 행은 모든 필드가 바뀐 것으로 본다.
+# update_fields로 저장하면 그 필드만, 지연 로딩(defer/only)된 필드는 저장되지 않으므로 비교하지 않는다.
+def get_changed_fields(instance, update_fields=None):
+    deferred_fields = instance.get_deferred_fields()
+    fields = [
+        field for field in instance._meta.concrete_fields
+        if not field.primary_key and field.attname not in deferred_fields and (update_fields is None or field.name in update_fields)
+    ]
+    old_values = None
+    if instance.pk is not None:
+        old_values = type(instance).objects.filter(pk=instance.pk).values(*[field.attname for field in fields]).first()
+    if old_values is None:
+        return {field.name for field in fields}
+    return {field.name for field in fields if old_values[field.attname] != getattr(instance, field.attname)}
+
+
+@receiver(pre_save, sender=Brand)
+@receiver(pre_save, sender=Model)
+@receiver(pre_save, sender=Car)
+def track_changed_fields(sender, instance, raw=False, update_fields=None, **kwargs):
+    if not raw:
+        instance._changed_fields = get_changed_fields(instance, update_fields)
+
+
+# Brand
+# <-------------------------------------------------------------------------------------------------------------------------------->
+@receiver(post_save, sender=Brand)
+def update_search_index_on_brand_save(sender, instance, created, **kwargs):
+    if created or not getattr(instance, '_changed_fields', set()) & SEARCH_BRAND_FIELDS:
+        return
+    Car.objects.filter(model__brand=instance).update_search_index()
+
+
+# 목록 payload에 들어가는 필드가 바뀌면 목록을 고친 뒤 버전을 올리고(refresh_car_listings), 아니면 버전만 올린다.
+@receiver(post_save, sender=Brand)
+def refresh_catalog_on_brand_save(sender, instance, created, **kwargs):
+    if created or not getattr(instance, '_changed_fields', set()) & LISTING_BRAND_FIELDS:
+        transaction.on_commit(bump_catalog_version)
+        return
+    car_ids = list(Car.objects.filter(model__brand=instance).values_list('id', flat=True))
+    transaction.on_commit(lambda: refresh_car_listings(car_ids))
+
+
+@receiver(post_delete, sender=Brand)
+def bump_catalog_version_on_brand_delete(sender, instance, **kwargs):
+    transaction.on_commit(bump_catalog_version)
+
+
+# Model
+# <-------------------------------------------------------------------------------------------------------------------------------->
+@receiver(post_save, sender=Model)
+def update_search_index_on_model_save(sender, instance, created, **kwargs):
+    if created or not getattr(instance, '_changed_fields', set()) & SEARCH_MODEL_FIELDS:
+        return
+    Car.objects.filter(model=instance).update_search_index()
+
+
+# 목록 payload에 들어가는 필드가 바뀌면 목록을 고친 뒤 버전을 올리고(refresh_car_listings), 아니면 버전만 올린다.
+@receiver(post_save, sender=Model)
+def refresh_catalog_on_model_save(sender, instance, created, **kwargs):
+    if created or not getattr(instance, '_changed_fields', set()) & LISTING_MODEL_FIELDS:
+        transaction.on_commit(bump_catalog_version)
+        return
+    car_ids = list(instance.cars.values_list('id', flat=True))
+    transaction.on_commit(lambda: refresh_car_listings(car_ids))
+
+
+@receiver(post_delete, sender=Model)
+def bump_catalog_version_on_model_delete(sender, instance, **kwargs):
+    transaction.on_commit(bump_catalog_version)
+
+
+# Car
+# <-------------------------------------------------------------------------------------------------------------------------------->
+# 목록을 고친 뒤 카탈로그 버전을 올린다. (refresh_car_listings)
+@receiver(post_save, sender=Car)
+def refresh_catalog_on_car_save(sender, instance, **kwargs):
+    if not getattr(instance, '_changed_fields', CATALOG_CAR_FIELDS) & CATALOG_CAR_FIELDS:
+        return
+    car_id = instance.id
+    transaction.on_commit(lambda: refresh_car_listings([car_id]))
+
+
+@receiver(post_save, sender=Car)
+def invalidate_pricing_table_on_car_save(sender, instance, **kwargs):
+    car_id = instance.id
+    transaction.on_commit(lambda: invalidate_pricing_table(car_id))
+
+
+@receiver(post_delete, sender=Car)
+def bump_catalog_version_on_car_delete(sender, instance, **kwargs):
+    transaction.on_commit(bump_catalog_version)
+
+
+@receiver(post_delete, sender=Car)
+def invalidate_pricing_table_on_car_delete(sender, instance, **kwargs):
+    car_id = instance.id
+    transaction.on_commit(lambda: invalidate_pricing_table(car_id))
+
+
+# Listing Backfill
+# <-------------------------------------------------------------------------------------------------------------------------------->
+# payload는 서비스 시리얼라이저의 출력이라 히스토리 모델을 쓰는 데이터 마이그레이션으로는 만들 수 없으므로,
+# migrate가 끝나 모든 마이그레이션이 적용된(현재 모델과 스키마가 같은) 상태에서 목록이 비어 있으면 전체를 채운다.
+# 이후에는 시그널이 목록을 갱신하므로, 처음 배포할 때와 테스트 DB처럼 차량이 없는 경우에는 exists 쿼리만 실행된다.
+@receiver(post_migrate)
+def backfill_car_listings(sender, using, plan=None, **kwargs):
+    if sender.name != 'cars' or not plan or any(backwards for _, backwards in plan):
+        return
+    executor = MigrationExecutor(connections[using])
+    if executor.migration_plan(executor.loader.graph.leaf_nodes()):
+        return
+    if Car.objects.using(using).exists() and not CarListing.objects.using(using).exists():
+        rebuild_car_listings()
@@ -1,3 +1,189 @@
-from django.test import TestCase
+from datetime import date, timedelta
 
-# Create your tests here.
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+from django.test import TestCase, RequestFactory, override_settings
+
+from server.testing import LOCMEM_CACHES
+
+from .models import Brand, Model, Car, CarBooking, CarListing
+from .caches import get_catalog_version, catalog_etag
+from .utils import defer_car_update
+from .bookings import get_booking_period
+from .reservations import BUTLER_RESERVATION_DAYS, compact_butler_reservation_bitmaps
+
+# Garage Query Count
+# <-------------------------------------------------------------------------------------------------------------------------------->
+# 차고 목록의 브랜드/모델 트리는 모델 수와 관계없이 조건부 COUNT 쿼리 한 번으로 만들어야 한다.
+@override_settings(CACHES=LOCMEM_CACHES)
+class GarageQueryCountTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.brand = Brand.objects.create(name='Test Brand', slug='test-brand')
+        cls.create_models(3)
+
+    @classmethod
+    def create_models(cls, count):
+        # 커밋 후 콜백으로 CarListing을 채워 목록 쿼리까지 실행되도록 한다.
+        start = Model.objects.filter(brand=cls.brand).count()
+        with cls.captureOnCommitCallbacks(execute=True):
+            for index in range(start, start + count):
+                cls.create_model_cars(index)
+
+    @classmethod
+    def create_model_cars(cls, index):
+        model = Model.objects.create(brand=cls.brand, name=f'Model {index}')
+        Car.objects.create(model=model, vin_number=f'SUB{index}', retail_price=30000000, is_subscriptable=True, subscription_fee_12=500000)
+        Car.objects.create(model=model, vin_number=f'BUT{index}', retail_price=30000000, is_butler=True, butler_fee=100000)
+        Car.objects.create(model=model, vin_number=f'OFF{index}', retail_price=30000000, is_subscriptable=True, subscription_fee_12=500000, is_active=False)
+
+    def setUp(self):
+        cache.clear()
+
+    def assertGarageNumQueries(self, path, num):
+        # 모델 수를 늘려도 쿼리 수가 같아야 한다. (모델마다 COUNT를 다시 실행하지 않는다)
+        for _ in range(2):
+            cache.clear()
+            with self.assertNumQueries(num):
+                response = self.client.get(path)
+            self.assertEqual(response.status_code, 200)
+            self.create_models(5)
+
+    def test_with_car_counts(self):
+        with self.assertNumQueries(1):
+            models = list(Model.objects.with_car_counts())
+        self.assertEqual(len(models), 3)
+        for model in models:
+            self.assertEqual(model.subscription_car_count, 1)
+            self.assertEqual(model.butler_car_count, 1)
+
+    def test_subscription_garage_query_count(self):
+        self.assertGarageNumQueries('/subscriptions/garages', 3)
+
+    def test_butler_garage_query_count(self):
+        self.assertGarageNumQueries('/butlers/garages', 3)
+
+
+# Catalog Version
+# <-------------------------------------------------------------------------------------------------------------------------------->
+# 차량 저장은 카탈로그 응답에 노출되는 필드가 바뀐 경우에만 카탈로그 버전(차고/모델 캐시와 ETag)을 올린다.
+@override_settings(CACHES=LOCMEM_CACHES)
+class CatalogVersionTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        brand = Brand.objects.create(name='Test Brand', slug='test-brand')
+        model = Model.objects.create(brand=brand, name='Model')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.car = Car.objects.create(model=model, vin_number='VERSION', retail_price=30000000, is_subscriptable=True, subscription_fee_12=500000)
+
+    def save_car(self, **kwargs):
+        version = get_catalog_version()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.car.save(**kwargs)
+        return get_catalog_version() != version
+
+    def test_unchanged_save_keeps_version(self):
+        self.assertFalse(self.save_car())
+
+    def test_bookkeeping_save_keeps_version(self):
+        self.car.subscription_available_from = date(2030, 1, 1)
+        self.assertFalse(self.save_car(update_fields=['subscription_available_from', 'modified_at']))
+
+    def test_catalog_field_save_bumps_version(self):
+        self.car.mileage = 12345
+        self.assertTrue(self.save_car())
+
+    def test_etag_changes_after_listing_refresh(self):
+        # 커밋 후 콜백을 하나씩 실행하며, ETag가 바뀌는 시점에는 목록이 이미 새 값이어야 한다.
+        request = RequestFactory().get('/subscriptions/garages')
+        etag = catalog_etag(request)
+        self.car.mileage = 12345
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.car.save()
+
+        for callback in callbacks:
+            # 실제로는 트랜잭션 밖에서 실행되므로 콜백이 등록한 on_commit도 바로 실행한다.
+            with self.captureOnCommitCallbacks(execute=True):
+                callback()
+            if catalog_etag(request) != etag:
+                listing = CarListing.objects.get(car=self.car, service='subscriptions')
+                self.assertEqual(listing.payload['mileage'], 12345)
+        self.assertNotEqual(catalog_etag(request), etag)
+
+
+# Deferred Car Update
+# <-------------------------------------------------------------------------------------------------------------------------------->
+# 트랜잭션 중 모은 차량 id는 커밋 후 한 번씩만 실행되고, 롤백된 블록에서 모은 id는 다음 트랜잭션으로 넘어가지 않는다.
+class DeferredCarUpdateTest(TestCase):
+    def setUp(self):
+        self.updated = []
+
+    def record(self, car_id):
+        self.updated.append(car_id)
+
+    def test_updates_are_coalesced(self):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            for car_id in (2, 1, 2):
+                defer_car_update(self.record, car_id)
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(self.updated, [1, 2])
+
+    def test_rolled_back_updates_are_dropped(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                defer_car_update(self.record, 1)
+                transaction.set_rollback(True)
+            defer_car_update(self.record, 2)
+        self.assertEqual(self.updated, [2])
+
+
+# Reservation Bitmap Compaction
+# <-------------------------------------------------------------------------------------------------------------------------------->
+# origin을 오늘로 옮기면 지난 날짜 비트는 버리고, 새로 창에 들어온 날짜의 예약은 CarBooking에서 채워야 한다.
+class ReservationCompactionTest(TestCase):
+    def setUp(self):
+        brand = Brand.objects.create(name='Test Brand', slug='test-brand')
+        self.model = Model.objects.create(brand=brand, name='Model')
+        self.today = timezone.localdate()
+
+    def create_car(self, vin_number, origin=None, bitmap=None):
+        car = Car.objects.create(model=self.model, vin_number=vin_number, retail_price=30000000, is_butler=True, butler_fee=100000)
+        Car.objects.filter(pk=car.pk).update(butler_reservation_origin=origin, butler_reservation_bitmap=bitmap)
+        return car
+
+    def book(self, car, source_id, start, end):
+        CarBooking.objects.create(car=car, source='BUTLER', source_id=source_id, period=get_booking_period(start, end))
+
+    def get_reserved_offsets(self, car):
+        car.refresh_from_db()
+        self.assertEqual(car.butler_reservation_origin, self.today)
+        return [offset for offset, bit in enumerate(car.butler_reservation_bitmap) if bit == '1']
+
+    def test_compaction_fills_new_tail_days(self):
+        origin = self.today - timedelta(days=20)
+        car = self.create_car('TAIL', origin, '0' * 25 + '1' + '0' * (BUTLER_RESERVATION_DAYS - 26))
+        self.book(car, 1, origin + timedelta(days=25), origin + timedelta(days=25))
+        # 이전 창(origin + 730일) 밖에서 시작하는 예약
+        self.book(car, 2, self.today + timedelta(days=715), self.today + timedelta(days=716))
+
+        compact_butler_reservation_bitmaps()
+
+        self.assertEqual(self.get_reserved_offsets(car), [5, 715, 716])
+
+    def test_compaction_fills_cars_without_bitmap(self):
+        car = self.create_car('EMPTY')
+        self.book(car, 1, self.today + timedelta(days=100), self.today + timedelta(days=101))
+
+        compact_butler_reservation_bitmaps()
+
+        self.assertEqual(self.get_reserved_offsets(car), [100, 101])
+
+    def test_compaction_clears_past_reservations(self):
+        car = self.create_car('PAST', self.today - timedelta(days=3), '1' + '0' * (BUTLER_RESERVATION_DAYS - 1))
+
+        compact_butler_reservation_bitmaps()
+
+        car.refresh_from_db()
+        self.assertIsNone(car.butler_reservation_bitmap)
+        self.assertIsNone(car.butler_reservation_origin)
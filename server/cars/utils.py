@@ -1,28 +1,70 @@
 # cars/utils.py
 app_name = 'cars'
 
+import weakref
+
+from django.db import models, transaction
+
 from cars.models import Car
-from butlers.utils import get_butler_available_from
-from subscriptions.utils import get_subscription_available_from
+from cars.bookings import get_available_from
+from cars.listings import refresh_car_listings
+from subscriptions.utils import invalidate_home_feed
 
+# 구독/버틀러 가능일은 CarBooking 구간 인덱스 조회 한 번으로 계산한다.
+# 값이 바뀐 경우에만 두 컬럼을 UPDATE 하고, Car.save() 대신 목록 갱신(이후 카탈로그 버전 증가)만 커밋 후 실행한다.
 def update_available_from(car_id):
-    try:
-        car = Car.objects.get(id=car_id)
-    except Car.DoesNotExist:
+    available_from = get_available_from([car_id])[car_id]
+
+    updated = Car.objects.filter(id=car_id).exclude(
+        models.Q(subscription_available_from=available_from) & models.Q(butler_available_from=available_from)
+    ).update(subscription_available_from=available_from, butler_available_from=available_from)
+
+    if updated:
+        transaction.on_commit(lambda: refresh_car_listings([car_id]))
+        transaction.on_commit(invalidate_home_feed)
+
+
+# Deferred Update
+# <-------------------------------------------------------------------------------------------------------------------------------->
+# 트랜잭션 중 시그널마다 차량을 다시 계산하지 않고, 갱신 함수별로 차량 id만 모아 커밋 후 차량당 한 번씩 실행한다.
+# 모은 id는 트랜잭션에 등록된 on_commit 콜백(CarUpdateBatch)이 들고, 연결에는 그 콜백의 약한 참조만 둔다.
+# 커밋되면 콜백이 스스로 참조를 지우고, 롤백(세이브포인트 롤백 포함)되면 Django가 버린 콜백과 함께 참조도 사라지므로
+# 모은 id가 다음 트랜잭션으로 넘어가지 않는다.
+class CarUpdateBatch:
+    def __init__(self):
+        self.updates = {}
+
+    def add(self, update, car_id):
+        self.updates.setdefault(update, set()).add(car_id)
+
+    def __call__(self):
+        connection = transaction.get_connection()
+        if getattr(connection, 'car_update_batch', None) is not None and connection.car_update_batch() is self:
+            connection.car_update_batch = None
+        updates, self.updates = self.updates, {}
+        for update, car_ids in updates.items():
+            for car_id in sorted(car_ids):
+                update(car_id)
+
+
+def get_car_update_batch():
+    connection = transaction.get_connection()
+    if not connection.in_atomic_block:
+        return None
+    batch_ref = getattr(connection, 'car_update_batch', None)
+    return batch_ref() if batch_ref is not None else None
+
+
+def defer_car_update(update, car_id):
+    batch = get_car_update_batch()
+    if batch is not None:
+        batch.add(update, car_id)
         return
 
-    subscription_available_from = get_subscription_available_from(car)
-    butler_available_from = get_butler_available_from(car)
-
-    if subscription_available_from is None and butler_available_from is None:
-        latest_available_from = None
-    elif subscription_available_from is None:
-        latest_available_from = butler_available_from
-    elif butler_available_from is None:
-        latest_available_from = subscription_available_from
-    else:
-        latest_available_from = max(subscription_available_from, butler_available_from)
-
-    car.subscription_available_from = latest_available_from
-    car.butler_available_from = latest_available_from
-    car.save()
\ No newline at end of file
+    # 트랜잭션 밖이면 on_commit이 바로 실행하므로 id를 먼저 담아 둔다.
+    batch = CarUpdateBatch()
+    batch.add(update, car_id)
+    connection = transaction.get_connection()
+    if connection.in_atomic_block:
+        connection.car_update_batch = weakref.ref(batch)
+    transaction.on_commit(batch)
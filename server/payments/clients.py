@@ -0,0 +1,161 @@
+# payments/clients.py
+app_name = 'payments'
+
+import os
+import time
+import httpx
+import asyncio
+import logging
+import threading
+import requests
+
+from requests.adapters import HTTPAdapter
+
+from server.settings.base import (
+    TOSS_API_SECRET_BASE64, PORTONE_API_SECRET, TOSS_API_URL, PORTONE_API_URL,
+    PAYMENT_HTTP_CONNECT_TIMEOUT, PAYMENT_HTTP_READ_TIMEOUT, PAYMENT_HTTP_MAX_RETRIES, PAYMENT_HTTP_POOL_SIZE, PAYMENT_HTTP_SLOW_MS,
+)
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+RETRY_BACKOFF = 0.5
+IDEMPOTENT_METHODS = {'GET', 'HEAD', 'PUT', 'DELETE'}
+
+logger = logging.getLogger(__name__)
+
+# Payment Gateway Client
+# <-------------------------------------------------------------------------------------------------------------------------------->
+# 결제사별 keep-alive 세션 풀을 재사용해 호출마다 TLS 핸드셰이크를 다시 하지 않고, 모든 호출에 연결/읽기 타임아웃을 건다.
+# 멱등한 호출(GET/DELETE 또는 Idempotency-Key 헤더가 있는 요청)만 연결 오류/타임아웃/429/5xx에서 지수 백오프로 재시도한다.
+# 세션은 프로세스마다 처음 호출할 때 만들어 Celery prefork/gunicorn 워커가 부모의 소켓을 공유하지 않게 한다.
+class PaymentGatewayClient:
+    def __init__(self, vendor, base_url, authorization):
+        self.vendor = vendor
+        self.base_url = base_url.rstrip('/')
+        self.authorization = authorization
+        self.timeout = (PAYMENT_HTTP_CONNECT_TIMEOUT, PAYMENT_HTTP_READ_TIMEOUT)
+        self.max_retries = PAYMENT_HTTP_MAX_RETRIES
+        self._session = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._metrics = {}
+
+    @property
+    def session(self):
+        if self._session is None or self._pid != os.getpid():
+            with self._lock:
+                if self._session is None or self._pid != os.getpid():
+                    session = requests.Session()
+                    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=PAYMENT_HTTP_POOL_SIZE, max_retries=0)
+                    session.mount('https://', adapter)
+                    session.mount('http://', adapter)
+                    session.headers.update({'Authorization': self.authorization, 'Content-Type': 'application/json'})
+                    self._session, self._pid = session, os.getpid()
+        return self._session
+
+    def request(self, method, path, operation, headers=None, idempotent=None, **kwargs):
+        if idempotent is None:
+            idempotent = method in IDEMPOTENT_METHODS or 'Idempotency-Key' in (headers or {})
+        retries = self.max_retries if idempotent else 0
+        url = f"{self.base_url}{path}"
+
+        for attempt in range(retries + 1):
+            started = time.perf_counter()
+            try:
+                response = self.session.request(method, url, headers=headers, timeout=self.timeout, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                self.record(operation, started, error=True, retried=attempt < retries)
+                if attempt == retries:
+                    raise
+            else:
+                error = response.status_code >= 500 or response.status_code in RETRY_STATUSES
+                self.record(operation, started, error=error, retried=error and attempt < retries)
+                if not error or attempt == retries:
+                    return response
+            time.sleep(RETRY_BACKOFF * (2 ** attempt))
+
+    def get(self, path, operation, **kwargs):
+        return self.request('GET', path, operation, **kwargs)
+
+    def post(self, path, operation, **kwargs):
+        return self.request('POST', path, operation, **kwargs)
+
+    def delete(self, path, operation, **kwargs):
+        return self.request('DELETE', path, operation, **kwargs)
+
+    # Metrics
+    # <---------------------------------------------------------------------------------------------------------------------------->
+    # 프로세스 단위로 호출별 횟수/오류/재시도/지연(ms)을 모은다. 기준보다 느린 호출은 경고 로그로 남긴다.
+    def record(self, operation, started, error=False, retried=False):
+        elapsed = (time.perf_counter() - started) * 1000
+        with self._lock:
+            metric = self._metrics.setdefault(operation, {'count': 0, 'errors': 0, 'retries': 0, 'total_ms': 0.0, 'max_ms': 0.0})
+            metric['count'] += 1
+            metric['errors'] += int(error)
+            metric['retries'] += int(retried)
+            metric['total_ms'] += elapsed
+            metric['max_ms'] = max(metric['max_ms'], elapsed)
+        if elapsed >= PAYMENT_HTTP_SLOW_MS:
+            logger.warning("[%s] %s 응답 지연: %.0fms", self.vendor, operation, elapsed)
+
+    def get_metrics(self):
+        with self._lock:
+            return {
+                operation: {**metric, 'avg_ms': metric['total_ms'] / metric['count'] if metric['count'] else 0.0}
+                for operation, metric in self._metrics.items()
+            }
+
+
+# Async Payment Gateway Client
+# <-------------------------------------------------------------------------------------------------------------------------------->
+# 배치 하나(이벤트 루프 하나) 동안 쓰는 httpx 비동기 클라이언트. 한 프로세스에서 수백 건을 동시에 호출할 때 쓴다.
+# 연결 풀 크기는 배치 동시성에 맞추고, 타임아웃/재시도 규칙과 지표는 같은 결제사의 동기 클라이언트를 따른다.
+class AsyncPaymentGatewayClient:
+    def __init__(self, client, max_connections=PAYMENT_HTTP_POOL_SIZE):
+        self.client = client
+        connect_timeout, read_timeout = client.timeout
+        self.http = httpx.AsyncClient(
+            base_url=client.base_url,
+            headers={'Authorization': client.authorization, 'Content-Type': 'application/json'},
+            timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+        )
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.http.aclose()
+
+    async def request(self, method, path, operation, headers=None, idempotent=None, **kwargs):
+        if idempotent is None:
+            idempotent = method in IDEMPOTENT_METHODS or 'Idempotency-Key' in (headers or {})
+        retries = self.client.max_retries if idempotent else 0
+
+        for attempt in range(retries + 1):
+            started = time.perf_counter()
+            try:
+                response = await self.http.request(method, path, headers=headers, **kwargs)
+            except httpx.TransportError:
+                self.client.record(operation, started, error=True, retried=attempt < retries)
+                if attempt == retries:
+                    raise
+            else:
+                error = response.status_code >= 500 or response.status_code in RETRY_STATUSES
+                self.client.record(operation, started, error=error, retried=error and attempt < retries)
+                if not error or attempt == retries:
+                    return response
+            await asyncio.sleep(RETRY_BACKOFF * (2 ** attempt))
+
+    async def get(self, path, operation, **kwargs):
+        return await self.request('GET', path, operation, **kwargs)
+
+    async def post(self, path, operation, **kwargs):
+        return await self.request('POST', path, operation, **kwargs)
+
+
+toss_client = PaymentGatewayClient('TOSS', TOSS_API_URL, f'Basic {TOSS_API_SECRET_BASE64}')
+portone_client = PaymentGatewayClient('PORTONE', PORTONE_API_URL, f'PortOne {PORTONE_API_SECRET}')
+
+
+def get_gateway_metrics():
+    return {client.vendor: client.get_metrics() for client in (toss_client, portone_client)}
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2025-11-21 10:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0002_alter_payment_merchant_id'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='payment',
+            name='order_id',
+            field=models.CharField(db_index=True, max_length=64),
+        ),
+    ]
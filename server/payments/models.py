@@ -65,7 +65,7 @@ class Payment(models.Model):
     status = models.CharField(max_length=20, choices=STATUS_CHOICES)
 
     type = models.CharField(max_length=20, choices=TYPE_CHOICES)
-    order_id = models.CharField(max_length=64)
+    order_id = models.CharField(max_length=64, db_index=True)
     order_name = models.CharField(max_length=100)
     merchant_id = models.CharField(max_length=64)
     
@@ -1,30 +1,29 @@
 # payments/utils.py
 app_name = 'payments'
 
+import sys
 import uuid
+import httpx
+import asyncio
 import requests
 from datetime import datetime
 
 from django.utils import timezone as django_timezone
 
-from server.settings.base import TOSS_API_SECRET_BASE64, PORTONE_API_SECRET
+from server.settings.base import PAYMENT_BATCH_CONCURRENCY
 from .models import Billing, Payment
+from .clients import AsyncPaymentGatewayClient, toss_client, portone_client
 
 # Billing
 def create_toss_billing(user, auth_key, customer_key):
-    url = "https://api.tosspayments.com/v1/billing/authorizations/issue"
-    
-    headers = {
-        'Authorization': f'Basic {TOSS_API_SECRET_BASE64}',
-        'Content-Type': 'application/json'
-    }
     data = {
         "authKey": auth_key,
         "customerKey": customer_key
     }
     
     try:
-        response = requests.post(url, headers=headers, json=data)
+        # authKey는 한 번만 발급에 쓸 수 있으므로 멱등키로 보내 재시도해도 같은 빌링키를 받는다.
+        response = toss_client.post('/v1/billing/authorizations/issue', 'billing_issue', json=data, headers={'Idempotency-Key': auth_key})
         response.raise_for_status()
         response_data = response.json()
         if 'error' in response_data:
@@ -59,15 +58,87 @@ def create_toss_billing(user, auth_key, customer_key):
         raise Exception(f"Unexpected error creating billing key: {str(e)}")
 
 
-def payment_toss_billing(user, billing, amount, order_id, order_name, tax_free_amount=0, tax_exemption_amount=0):
-    url = f"https://api.tosspayments.com/v1/billing/{billing.billing_key}"
+# 토스 빌링 결제 응답으로 저장 전 Payment를 만든다. 동기/비동기 결제가 함께 쓴다.
+def build_toss_billing_payment(user, billing, response_data):
+    if 'error' in response_data:
+        error_code = response_data.get('error', {}).get('code', 'UNKNOWN')
+        error_message = response_data.get('error', {}).get('message', 'Unknown error')
+        raise ValueError(f"Toss Payments API error: {error_code} - {error_message}")
+
+    requested_at_str = response_data.get('requestedAt', '').replace('+09:00', '')
+    requested_at = django_timezone.make_aware(datetime.fromisoformat(requested_at_str))
+    approved_at = None
+    if response_data.get('approvedAt'):
+        approved_at_str = response_data.get('approvedAt', '').replace('+09:00', '')
+        approved_at = django_timezone.make_aware(datetime.fromisoformat(approved_at_str))
     
-    headers = {
-        'Authorization': f'Basic {TOSS_API_SECRET_BASE64}',
-        'Content-Type': 'application/json'
-    }
+    # Extract card information
+    card_info = response_data.get('card') or {}
     
-    data = {
+    # Extract EasyPay information
+    easypay_info = response_data.get('easyPay') or {}
+    
+    # Extract receipt and checkout URLs
+    receipt_info = response_data.get('receipt') or {}
+    checkout_info = response_data.get('checkout') or {}
+    
+    # Create Payment object
+    return Payment(
+        user=user,
+        billing=billing,
+        vender='TOSS',
+        payment_key=response_data.get('paymentKey'),
+        status=response_data.get('status'),
+        type=response_data.get('type'),
+        order_id=response_data.get('orderId'),
+        order_name=response_data.get('orderName'),
+        merchant_id=response_data.get('mId'),
+        currency=response_data.get('currency'),
+        method=response_data.get('method'),
+        total_amount=response_data.get('totalAmount'),
+        balance_amount=response_data.get('balanceAmount'),
+        supplied_amount=response_data.get('suppliedAmount'),
+        vat=response_data.get('vat'),
+        tax_exemption_amount=response_data.get('taxExemptionAmount'),
+        tax_free_amount=response_data.get('taxFreeAmount'),
+        
+        # Card information
+        card_issuer_code=card_info.get('issuerCode'),
+        card_acquirer_code=card_info.get('acquirerCode'),
+        card_number=card_info.get('number'),
+        card_installment_plan_months=card_info.get('installmentPlanMonths'),
+        card_is_interest_free=card_info.get('isInterestFree'),
+        card_interest_payer=card_info.get('interestPayer'),
+        card_approve_no=card_info.get('approveNo'),
+        card_use_card_point=card_info.get('useCardPoint'),
+        card_type=card_info.get('cardType'),
+        card_owner_type=card_info.get('ownerType'),
+        card_acquire_status=card_info.get('acquireStatus'),
+        card_amount=card_info.get('amount'),
+        
+        # EasyPay information
+        easypay_provider=easypay_info.get('provider'),
+        easypay_amount=easypay_info.get('amount'),
+        easypay_discount_amount=easypay_info.get('discountAmount'),
+        
+        # Other information
+        country=response_data.get('country'),
+        is_partial_cancelable=response_data.get('isPartialCancelable'),
+        use_escrow=response_data.get('useEscrow'),
+        culture_expense=response_data.get('cultureExpense'),
+        receipt_url=receipt_info.get('url'),
+        checkout_url=checkout_info.get('url'),
+        last_transaction_key=response_data.get('lastTransactionKey'),
+        secret=response_data.get('secret'),
+        version=response_data.get('version'),
+        
+        requested_at=requested_at,
+        approved_at=approved_at,
+    )
+
+
+def get_toss_billing_data(user, billing, amount, order_id, order_name, tax_free_amount=0, tax_exemption_amount=0):
+    return {
         "customerKey": billing.customer_key,
         "amount": amount,
         "orderId": order_id,
@@ -77,88 +148,18 @@ def payment_toss_billing(user, billing, amount, order_id, order_name, tax_free_a
         "customerEmail": user.email,
         "customerName": user.name,
     }
+
+
+def payment_toss_billing(user, billing, amount, order_id, order_name, tax_free_amount=0, tax_exemption_amount=0):
+    data = get_toss_billing_data(user, billing, amount, order_id, order_name, tax_free_amount, tax_exemption_amount)
     
     try:
-        response = requests.post(url, headers=headers, json=data)
+        # 같은 주문번호로 다시 요청하면 토스가 첫 요청의 결과를 돌려주므로 재시도해도 이중 결제되지 않는다.
+        response = toss_client.post(f'/v1/billing/{billing.billing_key}', 'billing_payment', json=data, headers={'Idempotency-Key': order_id})
         response.raise_for_status()
-        response_data = response.json()
-        
-        if 'error' in response_data:
-            error_code = response_data.get('error', {}).get('code', 'UNKNOWN')
-            error_message = response_data.get('error', {}).get('message', 'Unknown error')
-            raise ValueError(f"Toss Payments API error: {error_code} - {error_message}")
-
-        requested_at_str = response_data.get('requestedAt', '').replace('+09:00', '')
-        requested_at = django_timezone.make_aware(datetime.fromisoformat(requested_at_str))
-        approved_at = None
-        if response_data.get('approvedAt'):
-            approved_at_str = response_data.get('approvedAt', '').replace('+09:00', '')
-            approved_at = django_timezone.make_aware(datetime.fromisoformat(approved_at_str))
-        
-        # Extract card information
-        card_info = response_data.get('card') or {}
-        
-        # Extract EasyPay information
-        easypay_info = response_data.get('easyPay') or {}
-        
-        # Extract receipt and checkout URLs
-        receipt_info = response_data.get('receipt') or {}
-        checkout_info = response_data.get('checkout') or {}
-        
-        # Create Payment object
-        payment = Payment.objects.create(
-            user=user,
-            billing=billing,
-            vender='TOSS',
-            payment_key=response_data.get('paymentKey'),
-            status=response_data.get('status'),
-            type=response_data.get('type'),
-            order_id=response_data.get('orderId'),
-            order_name=response_data.get('orderName'),
-            merchant_id=response_data.get('mId'),
-            currency=response_data.get('currency'),
-            method=response_data.get('method'),
-            total_amount=response_data.get('totalAmount'),
-            balance_amount=response_data.get('balanceAmount'),
-            supplied_amount=response_data.get('suppliedAmount'),
-            vat=response_data.get('vat'),
-            tax_exemption_amount=response_data.get('taxExemptionAmount'),
-            tax_free_amount=response_data.get('taxFreeAmount'),
-            
-            # Card information
-            card_issuer_code=card_info.get('issuerCode'),
-            card_acquirer_code=card_info.get('acquirerCode'),
-            card_number=card_info.get('number'),
-            card_installment_plan_months=card_info.get('installmentPlanMonths'),
-            card_is_interest_free=card_info.get('isInterestFree'),
-            card_interest_payer=card_info.get('interestPayer'),
-            card_approve_no=card_info.get('approveNo'),
-            card_use_card_point=card_info.get('useCardPoint'),
-            card_type=card_info.get('cardType'),
-            card_owner_type=card_info.get('ownerType'),
-            card_acquire_status=card_info.get('acquireStatus'),
-            card_amount=card_info.get('amount'),
-            
-            # EasyPay information
-            easypay_provider=easypay_info.get('provider'),
-            easypay_amount=easypay_info.get('amount'),
-            easypay_discount_amount=easypay_info.get('discountAmount'),
-            
-            # Other information
-            country=response_data.get('country'),
-            is_partial_cancelable=response_data.get('isPartialCancelable'),
-            use_escrow=response_data.get('useEscrow'),
-            culture_expense=response_data.get('cultureExpense'),
-            receipt_url=receipt_info.get('url'),
-            checkout_url=checkout_info.get('url'),
-            last_transaction_key=response_data.get('lastTransactionKey'),
-            secret=response_data.get('secret'),
-            version=response_data.get('version'),
-            
-            requested_at=requested_at,
-            approved_at=approved_at,
-        )
         
+        payment = build_toss_billing_payment(user, billing, response.json())
+        payment.save()
         return payment
         
     except requests.exceptions.RequestException as e:
@@ -172,15 +173,8 @@ def payment_toss_billing(user, billing, amount, order_id, order_name, tax_free_a
 
 
 def delete_toss_billing(billing_key):
-    url = f"https://api.tosspayments.com/v1/billing/{billing_key}"
-    
-    headers = {
-        'Authorization': f'Basic {TOSS_API_SECRET_BASE64}',
-        'Content-Type': 'application/json'
-    }
-    
     try:
-        response = requests.delete(url, headers=headers)
+        response = toss_client.delete(f'/v1/billing/{billing_key}', 'billing_delete')
         response.raise_for_status()
         
         if response.status_code == 200:
@@ -208,15 +202,8 @@ def create_portone_billing(user, billing_key):
     return billing
 
 
-def payment_portone_billing(user, billing, order_id, order_name, amount, currency="KRW"):
-    payment_url = f"https://api.portone.io/payments/{order_id}/billing-key"
-    
-    headers = {
-        'Authorization': f'PortOne {PORTONE_API_SECRET}',
-        'Content-Type': 'application/json'
-    }
-    
-    payment_data = {
+def get_portone_billing_data(user, billing, order_name, amount, currency="KRW"):
+    return {
         "billingKey": billing.billing_key,
         "orderName": order_name,
         "customer": {
@@ -229,95 +216,104 @@ def payment_portone_billing(user, billing, order_id, order_name, amount, currenc
         },
         "currency": currency
     }
+
+
+# 포트원 결제 내역 응답으로 저장 전 Payment를 만든다. 동기/비동기 결제가 함께 쓴다.
+def build_portone_billing_payment(user, billing, payment_detail):
+    method_info = payment_detail.get('method', {})
+    amount_info = payment_detail.get('amount', {})
+    
+    # 상태 매핑 (PortOne -> Django 모델)
+    status_mapping = {
+        'READY': 'READY',
+        'PAID': 'DONE',
+        'CANCELLED': 'CANCELED',
+        'PARTIAL_CANCELLED': 'PARTIAL_CANCELED',
+        'FAILED': 'ABORTED',
+        'PAY_PENDING': 'IN_PROGRESS',
+        'VIRTUAL_ACCOUNT_ISSUED': 'WAITING_FOR_DEPOSIT'
+    }
+    
+    mapped_status = status_mapping.get(payment_detail.get('status'), 'READY')
+    
+    # 날짜 파싱
+    requested_at = datetime.fromisoformat(payment_detail.get('requestedAt', '').replace('Z', '+00:00'))
+    approved_at = None
+    if payment_detail.get('paidAt'):
+        approved_at = datetime.fromisoformat(payment_detail.get('paidAt', '').replace('Z', '+00:00'))
+    
+    # Payment 객체 생성
+    return Payment(
+        user=user,
+        billing=billing,
+        vender='PORTONE',
+        payment_key=payment_detail.get('transactionId'),
+        status=mapped_status,
+        type='BILLING',
+        order_id=payment_detail.get('id'),
+        order_name=payment_detail.get('orderName'),
+        merchant_id=payment_detail.get('merchantId'),
+        currency=payment_detail.get('currency'),
+        method=method_info.get('type') if method_info else None,
+        total_amount=amount_info.get('total', 0),
+        balance_amount=amount_info.get('balance', 0),
+        supplied_amount=amount_info.get('supplied', 0),
+        vat=amount_info.get('vat', 0),
+        tax_exemption_amount=amount_info.get('taxExemption', 0),
+        tax_free_amount=amount_info.get('taxFree', 0),
+        
+        # 카드 정보
+        card_issuer_code=method_info.get('issuerCode') if method_info else None,
+        card_acquirer_code=method_info.get('acquirerCode') if method_info else None,
+        card_number=method_info.get('number') if method_info else None,
+        card_installment_plan_months=method_info.get('installmentPlanMonths') if method_info else None,
+        card_is_interest_free=method_info.get('isInterestFree') if method_info else None,
+        card_interest_payer=method_info.get('interestPayer') if method_info else None,
+        card_approve_no=method_info.get('approveNo') if method_info else None,
+        card_use_card_point=method_info.get('useCardPoint') if method_info else None,
+        card_type=method_info.get('cardType') if method_info else None,
+        card_owner_type=method_info.get('ownerType') if method_info else None,
+        card_acquire_status=method_info.get('acquireStatus') if method_info else None,
+        card_amount=method_info.get('amount') if method_info else None,
+        
+        # 기타 정보
+        country=payment_detail.get('country', 'KR'),
+        is_partial_cancelable=payment_detail.get('isPartialCancelable', True),
+        use_escrow=payment_detail.get('escrow', {}).get('status') == 'REGISTERED' if payment_detail.get('escrow') else False,
+        culture_expense=payment_detail.get('isCulturalExpense', False),
+        receipt_url=payment_detail.get('receiptUrl'),
+        checkout_url=None,
+        last_transaction_key=payment_detail.get('transactionId'),
+        secret=None,
+        version='2022-11-16',
+        
+        requested_at=requested_at,
+        approved_at=approved_at,
+        cancelled_at=None,
+    )
+
+
+def payment_portone_billing(user, billing, order_id, order_name, amount, currency="KRW"):
+    payment_data = get_portone_billing_data(user, billing, order_name, amount, currency)
     
     try:
-        response = requests.post(payment_url, headers=headers, json=payment_data)
-        response.raise_for_status()
+        # 결제 ID(order_id)가 같으면 포트원이 중복 결제를 막으므로 멱등한 호출로 재시도한다.
+        response = portone_client.post(f'/payments/{order_id}/billing-key', 'billing_key_payment', json=payment_data, idempotent=True)
+        # 409(ALREADY_PAID)는 같은 결제 ID로 이미 결제된 경우이므로 재시도로 보고 결제 내역 조회로 넘어간다.
+        if response.status_code != 409:
+            response.raise_for_status()
         
-        if not response.ok:
+        if not response.ok and response.status_code != 409:
             raise ValueError(f"Payment request failed: {response.status_code}")
         
-        detail_url = f"https://api.portone.io/payments/{order_id}"
-        
-        detail_response = requests.get(detail_url, headers=headers)
+        detail_response = portone_client.get(f'/payments/{order_id}', 'payment_detail')
         detail_response.raise_for_status()
         
         if not detail_response.ok:
             raise ValueError(f"Payment detail request failed: {detail_response.status_code}")
         
-        payment_detail = detail_response.json()
-        method_info = payment_detail.get('method', {})
-        amount_info = payment_detail.get('amount', {})
-        
-        # 상태 매핑 (PortOne -> Django 모델)
-        status_mapping = {
-            'READY': 'READY',
-            'PAID': 'DONE',
-            'CANCELLED': 'CANCELED',
-            'PARTIAL_CANCELLED': 'PARTIAL_CANCELED',
-            'FAILED': 'ABORTED',
-            'PAY_PENDING': 'IN_PROGRESS',
-            'VIRTUAL_ACCOUNT_ISSUED': 'WAITING_FOR_DEPOSIT'
-        }
-        
-        mapped_status = status_mapping.get(payment_detail.get('status'), 'READY')
-        
-        # 날짜 파싱
-        requested_at = datetime.fromisoformat(payment_detail.get('requestedAt', '').replace('Z', '+00:00'))
-        approved_at = None
-        if payment_detail.get('paidAt'):
-            approved_at = datetime.fromisoformat(payment_detail.get('paidAt', '').replace('Z', '+00:00'))
-        
-        # Payment 객체 생성
-        payment = Payment.objects.create(
-            user=user,
-            billing=billing,
-            vender='PORTONE',
-            payment_key=payment_detail.get('transactionId'),
-            status=mapped_status,
-            type='BILLING',
-            order_id=payment_detail.get('id'),
-            order_name=payment_detail.get('orderName'),
-            merchant_id=payment_detail.get('merchantId'),
-            currency=payment_detail.get('currency'),
-            method=method_info.get('type') if method_info else None,
-            total_amount=amount_info.get('total', 0),
-            balance_amount=amount_info.get('balance', 0),
-            supplied_amount=amount_info.get('supplied', 0),
-            vat=amount_info.get('vat', 0),
-            tax_exemption_amount=amount_info.get('taxExemption', 0),
-            tax_free_amount=amount_info.get('taxFree', 0),
-            
-            # 카드 정보
-            card_issuer_code=method_info.get('issuerCode') if method_info else None,
-            card_acquirer_code=method_info.get('acquirerCode') if method_info else None,
-            card_number=method_info.get('number') if method_info else None,
-            card_installment_plan_months=method_info.get('installmentPlanMonths') if method_info else None,
-            card_is_interest_free=method_info.get('isInterestFree') if method_info else None,
-            card_interest_payer=method_info.get('interestPayer') if method_info else None,
-            card_approve_no=method_info.get('approveNo') if method_info else None,
-            card_use_card_point=method_info.get('useCardPoint') if method_info else None,
-            card_type=method_info.get('cardType') if method_info else None,
-            card_owner_type=method_info.get('ownerType') if method_info else None,
-            card_acquire_status=method_info.get('acquireStatus') if method_info else None,
-            card_amount=method_info.get('amount') if method_info else None,
-            
-            # 기타 정보
-            country=payment_detail.get('country', 'KR'),
-            is_partial_cancelable=payment_detail.get('isPartialCancelable', True),
-            use_escrow=payment_detail.get('escrow', {}).get('status') == 'REGISTERED' if payment_detail.get('escrow') else False,
-            culture_expense=payment_detail.get('isCulturalExpense', False),
-            receipt_url=payment_detail.get('receiptUrl'),
-            checkout_url=None,
-            last_transaction_key=payment_detail.get('transactionId'),
-            secret=None,
-            version='2022-11-16',
-            
-            requested_at=requested_at,
-            approved_at=approved_at,
-            cancelled_at=None,
-        )
-        
+        payment = build_portone_billing_payment(user, billing, detail_response.json())
+        payment.save()
         return payment
         
     except requests.exceptions.RequestException as e:
@@ -331,15 +327,8 @@ def payment_portone_billing(user, billing, order_id, order_name, amount, currenc
 
 
 def delete_portone_billing(billing_key):
-    url = f"https://api.portone.io/billing-keys/{billing_key}"
-    
-    headers = {
-        'Authorization': f'PortOne {PORTONE_API_SECRET}',
-        'Content-Type': 'application/json'
-    }
-    
     try:
-        response = requests.delete(url, headers=headers)
+        response = portone_client.delete(f'/billing-keys/{billing_key}', 'billing_delete')
         response.raise_for_status()
         if response.status_code == 200:
             return True
@@ -356,14 +345,14 @@ def delete_portone_billing(billing_key):
         raise Exception(f"Unexpected error deleting billing key: {str(e)}")
 
 
-def payment_dummy_billing(user, billing, order_id, order_name, amount, currency="KRW"):
+def build_dummy_payment(user, order_id, order_name, amount, currency="KRW"):
     now = django_timezone.now()
     payment_key = f"dummy_{uuid.uuid4()}"
 
     vat = int(amount * 0.1)
     supplied_amount = max(0, amount - vat)
 
-    payment = Payment.objects.create(
+    return Payment(
         user=user,
         vender='TOSS',
         payment_key=payment_key,
@@ -394,11 +383,15 @@ def payment_dummy_billing(user, billing, order_id, order_name, amount, currency=
         cancelled_at=None,
     )
 
+
+def payment_dummy_billing(user, billing, order_id, order_name, amount, currency="KRW"):
+    payment = build_dummy_payment(user, order_id, order_name, amount, currency)
+    payment.save()
     return payment
 
 
-def payment_billing(user, billing, amount, order_name, currency="KRW"):
-    order_id = str(uuid.uuid4())
+def payment_billing(user, billing, amount, order_name, currency="KRW", order_id=None):
+    order_id = order_id or str(uuid.uuid4())
     
     if amount == 0:
         return payment_dummy_billing(
@@ -439,15 +432,101 @@ def inactivate_billing(billing):
         raise ValueError(f"Unsupported billing vendor: {billing.vender}")
 
 
+# Async Billing
+# 동기 결제는 워커 프로세스당 한 번에 결제 한 건만 기다리므로, 여러 건을 한 이벤트 루프에서 동시에 호출하고
+# 응답으로 만든 Payment를 bulk_create 한 번으로 저장한다. 이벤트 루프 안에서는 DB에 접근하지 않는다.
+async def payment_toss_billing_async(client, user, billing, amount, order_id, order_name):
+    data = get_toss_billing_data(user, billing, amount, order_id, order_name)
+
+    try:
+        response = await client.post(f'/v1/billing/{billing.billing_key}', 'billing_payment', json=data, headers={'Idempotency-Key': order_id})
+        response.raise_for_status()
+        return build_toss_billing_payment(user, billing, response.json())
+
+    except httpx.HTTPError as e:
+        raise requests.RequestException(f"Failed to process payment: {str(e)}")
+
+
+async def payment_portone_billing_async(client, user, billing, order_id, order_name, amount, currency="KRW"):
+    payment_data = get_portone_billing_data(user, billing, order_name, amount, currency)
+
+    try:
+        response = await client.post(f'/payments/{order_id}/billing-key', 'billing_key_payment', json=payment_data, idempotent=True)
+        if response.status_code != 409:
+            response.raise_for_status()
+
+        detail_response = await client.get(f'/payments/{order_id}', 'payment_detail')
+        detail_response.raise_for_status()
+        return build_portone_billing_payment(user, billing, detail_response.json())
+
+    except httpx.HTTPError as e:
+        raise requests.RequestException(f"Failed to process PortOne billing payment: {str(e)}")
+
+
+# 동시 호출 수는 세마포어로, 초당 호출 수(rate_limit)는 호출 시각을 1/rate_limit 간격으로 배정해 제한한다.
+async def charge_billing_batch(items, concurrency, rate_limit=None, currency="KRW"):
+    semaphore = asyncio.Semaphore(concurrency)
+    interval = 1 / rate_limit if rate_limit else 0
+    next_at = 0.0
+
+    async def throttle():
+        nonlocal next_at
+        now = asyncio.get_running_loop().time()
+        wait = next_at - now
+        next_at = max(now, next_at) + interval
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    async with AsyncPaymentGatewayClient(toss_client, concurrency) as toss, AsyncPaymentGatewayClient(portone_client, concurrency) as portone:
+        async def charge(user, billing, amount, order_name, order_id):
+            async with semaphore:
+                await throttle()
+                try:
+                    if amount == 0:
+                        return build_dummy_payment(user, order_id, order_name, amount, currency)
+                    elif billing.vender == 'TOSS':
+                        return await payment_toss_billing_async(toss, user, billing, amount, order_id, order_name)
+                    elif billing.vender == 'PORTONE':
+                        return await payment_portone_billing_async(portone, user, billing, order_id, order_name, amount, currency)
+                    else:
+                        raise ValueError(f"Unsupported billing vendor: {billing.vender}")
+                except Exception as e:
+                    return e
+
+        return await asyncio.gather(*(charge(*item) for item in items))
+
+
+# 배치마다 asyncio.run으로 새 이벤트 루프를 띄우므로 prefork 워커(CELERY_WORKER_POOL)에서만 실행한다.
+# gevent/eventlet 풀은 소켓을 몽키 패치하고 이미 실행 중인 루프 안에서는 asyncio.run을 쓸 수 없으므로 결제 전에 실패시킨다.
+def check_billing_batch_runtime():
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        pass
+    else:
+        raise RuntimeError("이벤트 루프가 실행 중인 스레드에서는 정기 결제 배치를 실행할 수 없습니다. prefork 워커에서 실행하세요.")
+
+    gevent_monkey, eventlet_patcher = sys.modules.get('gevent.monkey'), sys.modules.get('eventlet.patcher')
+    if (gevent_monkey and gevent_monkey.is_module_patched('socket')) or (eventlet_patcher and eventlet_patcher.is_monkey_patched('socket')):
+        raise RuntimeError("gevent/eventlet 워커에서는 정기 결제 배치를 실행할 수 없습니다. prefork 워커(-P prefork)에서 실행하세요.")
+
+
+# items: (billing, amount, order_name) 또는 주문번호(멱등키)를 지정한 (billing, amount, order_name, order_id) 목록
+# 결과는 items 순서대로 저장된 Payment 또는 해당 건의 예외이다.
+def payment_billing_batch(items, concurrency=PAYMENT_BATCH_CONCURRENCY, rate_limit=None, currency="KRW"):
+    check_billing_batch_runtime()
+    # 이벤트 루프 안에서 지연 로딩이 일어나지 않도록 결제자 정보는 미리 읽어 둔다.
+    prepared = [
+        (billing.user, billing, amount, order_name, order_id[0] if order_id else str(uuid.uuid4()))
+        for billing, amount, order_name, *order_id in items
+    ]
+    results = asyncio.run(charge_billing_batch(prepared, concurrency, rate_limit, currency))
+    Payment.objects.bulk_create([result for result in results if isinstance(result, Payment)])
+    return results
+
+
 # Payment
 def confirm_toss_payment(user, payment_key, amount, order_id):    
-    url = "https://api.tosspayments.com/v1/payments/confirm"
-    
-    headers = {
-        'Authorization': f'Basic {TOSS_API_SECRET_BASE64}',
-        'Content-Type': 'application/json'
-    }
-
     data = {
         "paymentKey": payment_key,
         "orderId" : order_id,
@@ -455,7 +534,8 @@ def confirm_toss_payment(user, payment_key, amount, order_id):
     }
 
     try:
-        response = requests.post(url, headers=headers, json=data)
+        # paymentKey당 승인은 한 번이므로 멱등키로 보내 재시도해도 이중 승인되지 않는다.
+        response = toss_client.post('/v1/payments/confirm', 'payment_confirm', json=data, headers={'Idempotency-Key': payment_key})
         response.raise_for_status()
         response_data = response.json()
 
@@ -0,0 +1,45 @@
+# server/codes.py
+app_name = "server"
+
+import random, string
+
+from django.db import transaction
+
+CODE_CHARACTERS = string.ascii_uppercase + string.digits
+CODE_LENGTH = 8
+CODE_BATCH_SIZE = 5000
+
+# Coupon Code
+# <-------------------------------------------------------------------------------------------------------------------------------->
+# 후보 코드를 배치 단위로 만들고, 배치마다 code__in 쿼리 한 번으로 기존 코드와의 충돌을 걸러낸다.
+def generate_unique_codes(model, count, length=CODE_LENGTH, batch_size=CODE_BATCH_SIZE):
+    codes = set()
+    while len(codes) < count:
+        size = min(batch_size, count - len(codes))
+        candidates = {''.join(random.choices(CODE_CHARACTERS, k=length)) for _ in range(size)} - codes
+        taken = set(model.objects.filter(code__in=candidates).values_list('code', flat=True))
+        codes |= candidates - taken
+    return list(codes)
+
+
+# 템플릿 쿠폰의 설정을 복제해 count개의 쿠폰을 새 코드로 생성한다.
+# 배치마다 bulk_create(ignore_conflicts=True)로 넣고, 조회 이후 다른 요청과 겹쳐 건너뛴 코드는
+# 이 쿠폰 설정으로 다시 조회되지 않으므로 모자란 만큼 다음 배치에서 채운다.
+def bulk_create_coupons(template, count, batch_size=CODE_BATCH_SIZE, **overrides):
+    model = type(template)
+    values = {
+        field.attname: getattr(template, field.attname)
+        for field in model._meta.concrete_fields
+        if field.editable and not field.primary_key
+    }
+    values.update(overrides)
+    model(code='', **values).clean()
+    lookups = {f'{name}__isnull' if value is None else name: True if value is None else value for name, value in values.items()}
+
+    created = 0
+    with transaction.atomic():
+        while created < count:
+            codes = generate_unique_codes(model, min(batch_size, count - created), batch_size=batch_size)
+            model.objects.bulk_create([model(code=code, **values) for code in codes], batch_size=batch_size, ignore_conflicts=True)
+            created += model.objects.filter(code__in=codes, **lookups).count()
+    return created
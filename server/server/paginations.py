@@ -0,0 +1,159 @@
+# server/paginations.py
+app_name = "server"
+
+import json, base64, hashlib
+
+from django.db.models import F, Q
+from django.core.cache import cache
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.utils.urls import replace_query_param
+
+# Keyset Pagination
+# <-------------------------------------------------------------------------------------------------------------------------------->
+# (정렬 필드, id) 기준 keyset 페이지네이션. OFFSET/COUNT 없이 페이지 깊이와 무관하게 일정한 비용으로 조회한다.
+class KeysetPagination(BasePagination):
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    count_query_param = 'with_count'
+    count_timeout = 60
+    invalid_cursor_message = 'Invalid cursor'
+
+    def __init__(self, sort_field='created_at', descending=True):
+        self.sort_field = sort_field
+        self.descending = descending
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.count = self.get_count(queryset) if request.query_params.get(self.count_query_param) else None
+
+        cursor = self.decode_cursor(request)
+        if cursor is None:
+            value, pk, reverse = None, None, False
+        else:
+            value, pk, reverse = cursor
+            value = self.get_cursor_value(queryset.model, value)
+
+        # 이전 페이지는 정렬을 뒤집어 조회한 뒤 다시 뒤집는다.
+        descending = self.descending != reverse
+        nulls_last = not reverse
+        if cursor is not None:
+            queryset = queryset.filter(self.get_keyset_filter(value, pk, descending, nulls_last))
+        queryset = queryset.order_by(*self.get_ordering(descending, nulls_last))
+
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+
+        if reverse:
+            results.reverse()
+            self.has_next = cursor is not None
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = cursor is not None
+
+        self.page = results
+        return results
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+            if page_size > 0:
+                return min(page_size, self.max_page_size)
+        except (KeyError, ValueError):
+            pass
+        return self.page_size
+
+    def get_ordering(self, descending, nulls_last):
+        direction = 'desc' if descending else 'asc'
+        nulls = {'nulls_last': True} if nulls_last else {'nulls_first': True}
+        return (getattr(F(self.sort_field), direction)(**nulls), getattr(F('id'), direction)())
+
+    def get_keyset_filter(self, value, pk, descending, nulls_last):
+        field = self.sort_field
+        lookup = 'lt' if descending else 'gt'
+
+        if value is None:
+            condition = Q(**{f'{field}__isnull': True, f'id__{lookup}': pk})
+            if not nulls_last:
+                condition |= Q(**{f'{field}__isnull': False})
+            return condition
+
+        condition = Q(**{f'{field}__{lookup}': value}) | Q(**{field: value, f'id__{lookup}': pk})
+        if nulls_last:
+            condition |= Q(**{f'{field}__isnull': True})
+        return condition
+
+    def get_count(self, queryset):
+        # 정확한 COUNT 대신 짧은 TTL로 캐시한 추정치
+        key = 'pagination:count:' + hashlib.md5(str(queryset.query).encode()).hexdigest()
+        return cache.get_or_set(key, queryset.count, self.count_timeout)
+
+    def encode_cursor(self, obj, reverse):
+        value = getattr(obj, self.sort_field)
+        if hasattr(value, 'isoformat'):
+            value = value.isoformat()
+        payload = json.dumps({'v': value, 'id': obj.pk, 'r': reverse}, separators=(',', ':'))
+        return base64.urlsafe_b64encode(payload.encode()).decode()
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded.encode()).decode())
+            return payload['v'], int(payload['id']), bool(payload.get('r', False))
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+
+    # 커서 값은 정렬 필드 타입의 스칼라만 허용한다. dict/list 등 조작된 값은 ORM에 넘기지 않고 404로 처리한다.
+    def get_cursor_value(self, model, value):
+        if value is None:
+            return None
+        if isinstance(value, bool) or not isinstance(value, (str, int, float)):
+            raise NotFound(self.invalid_cursor_message)
+        try:
+            return model._meta.get_field(self.sort_field).to_python(value)
+        except FieldDoesNotExist:
+            return value
+        except (TypeError, ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_next_cursor(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_cursor(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_next_link(self):
+        cursor = self.get_next_cursor()
+        if cursor is None:
+            return None
+        return replace_query_param(self.base_url, self.cursor_query_param, cursor)
+
+    def get_previous_link(self):
+        cursor = self.get_previous_cursor()
+        if cursor is None:
+            return None
+        return replace_query_param(self.base_url, self.cursor_query_param, cursor)
+
+    def get_pagination_info(self):
+        return {
+            'count': self.count,
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'next_cursor': self.get_next_cursor(),
+            'previous_cursor': self.get_previous_cursor(),
+            'page_size': self.page_size,
+        }
@@ -0,0 +1,31 @@
+# server/renderers.py
+app_name = "server"
+
+import orjson
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+# orjson은 datetime/date/time을 DRF와 다르게(UTC 'Z' 처리 등) 직렬화하므로 DRF 인코더로 넘기고,
+# Decimal, lazy string 등 orjson이 모르는 타입도 DRF 인코더의 default를 그대로 사용한다.
+ORJSON_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+
+# JavaScript 호환을 위해 DRF와 동일하게 U+2028 / U+2029는 이스케이프한다.
+LINE_SEPARATOR = '\u2028'.encode()
+PARAGRAPH_SEPARATOR = '\u2029'.encode()
+
+class ORJSONRenderer(JSONRenderer):
+    default = staticmethod(JSONEncoder().default)
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        # indent 요청(Browsable API, ?indent=) 및 ASCII 출력 설정은 기존 렌더러로 처리
+        if self.ensure_ascii or self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        ret = orjson.dumps(data, default=self.default, option=ORJSON_OPTIONS)
+        if LINE_SEPARATOR in ret or PARAGRAPH_SEPARATOR in ret:
+            ret = ret.replace(LINE_SEPARATOR, b'\\u2028').replace(PARAGRAPH_SEPARATOR, b'\\u2029')
+        return ret
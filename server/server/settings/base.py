@@ -15,6 +15,7 @@ from pathlib import Path
 from datetime import timedelta
 
 from celery.schedules import crontab
+from celery.utils.time import rate
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -37,6 +38,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
 
     # Installed apps
     'rest_framework',
@@ -59,6 +61,15 @@ REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': ('rest_framework_simplejwt.authentication.JWTAuthentication',),   # JWT
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",                                       # Swagger
     'EXCEPTION_HANDLER': 'server.exceptions.custom_exception_handler',                                  # Custom Exception Handler
+    'DEFAULT_RENDERER_CLASSES': (
+        'server.renderers.ORJSONRenderer',                                                              # orjson
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'server.parsers.ORJSONParser',                                                                  # orjson
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ),
 }
 
 
@@ -167,6 +178,28 @@ CELERY_BEAT_SCHEDULE = {
         'task': 'subscriptions.tasks.perform_billing',
         'schedule': crontab(hour='12,18' , minute=0),
     },
+    'compact_butler_reservation_bitmaps': {
+        'task': 'butlers.tasks.compact_reservation_bitmaps',
+        'schedule': crontab(hour=0, minute=5),
+    },
+}
+# 결제사별 정기 결제 배치 태스크는 전용 큐로 보내고, 배치 안에서 결제사 허용량에 맞춰 동시 호출 수와 초당 호출 수를 제한한다.
+CELERY_TASK_ROUTES = {
+    'subscriptions.tasks.charge_toss_installments': {'queue': 'billing_toss'},
+    'subscriptions.tasks.charge_portone_installments': {'queue': 'billing_portone'},
+}
+# 정기 결제 배치는 태스크마다 asyncio 이벤트 루프를 띄우므로 워커는 prefork 풀로 실행한다. (gevent/eventlet 풀에서는 배치가 실패한다)
+CELERY_WORKER_POOL = 'prefork'
+BILLING_BATCH_SIZE = int(os.getenv('BILLING_BATCH_SIZE', '200'))
+BILLING_VENDOR_LIMITS = {
+    'TOSS': {
+        'concurrency': int(os.getenv('TOSS_BILLING_CONCURRENCY', '20')),
+        'rate_limit': rate(os.getenv('TOSS_BILLING_RATE_LIMIT', '20/s')),
+    },
+    'PORTONE': {
+        'concurrency': int(os.getenv('PORTONE_BILLING_CONCURRENCY', '10')),
+        'rate_limit': rate(os.getenv('PORTONE_BILLING_RATE_LIMIT', '10/s')),
+    },
 }
 
 
@@ -190,6 +223,14 @@ NICE_PRODUCT_ID = os.getenv('NICE_PRODUCT_ID')
 PORTONE_API_SECRET = os.getenv('PORTONE_API_SECRET')
 TOSS_API_SECRET = os.getenv('TOSS_API_SECRET')
 TOSS_API_SECRET_BASE64 = os.getenv('TOSS_API_SECRET_BASE64')
+TOSS_API_URL = os.getenv('TOSS_API_URL', 'https://api.tosspayments.com')
+PORTONE_API_URL = os.getenv('PORTONE_API_URL', 'https://api.portone.io')
+PAYMENT_HTTP_CONNECT_TIMEOUT = float(os.getenv('PAYMENT_HTTP_CONNECT_TIMEOUT', '3'))
+PAYMENT_HTTP_READ_TIMEOUT = float(os.getenv('PAYMENT_HTTP_READ_TIMEOUT', '30'))
+PAYMENT_HTTP_MAX_RETRIES = int(os.getenv('PAYMENT_HTTP_MAX_RETRIES', '2'))
+PAYMENT_HTTP_POOL_SIZE = int(os.getenv('PAYMENT_HTTP_POOL_SIZE', '16'))
+PAYMENT_HTTP_SLOW_MS = float(os.getenv('PAYMENT_HTTP_SLOW_MS', '3000'))
+PAYMENT_BATCH_CONCURRENCY = int(os.getenv('PAYMENT_BATCH_CONCURRENCY', '100'))
 
 
 # Authenticaion User Model
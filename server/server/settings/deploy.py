@@ -26,4 +26,12 @@ WSGI_APPLICATION = 'server.wsgi.deploy.application'
 
 # Celery
 CELERY_BROKER_URL = 'redis://redis:6379/0'
-CELERY_RESULT_BACKEND = 'redis://redis:6379/0'
\ No newline at end of file
+CELERY_RESULT_BACKEND = 'redis://redis:6379/0'
+
+# Cache
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': 'redis://redis:6379/1',
+    }
+}
\ No newline at end of file
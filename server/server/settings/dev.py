@@ -10,4 +10,12 @@ WSGI_APPLICATION = 'server.wsgi.dev.application'
 
 # Celery
 CELERY_BROKER_URL = 'redis://localhost:6379/0'
-CELERY_RESULT_BACKEND = 'redis://localhost:6379/0'
\ No newline at end of file
+CELERY_RESULT_BACKEND = 'redis://localhost:6379/0'
+
+# Cache
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': 'redis://localhost:6379/1',
+    }
+}
\ No newline at end of file
@@ -0,0 +1,7 @@
+# server/testing.py
+app_name = "server"
+
+# Test Settings
+# <-------------------------------------------------------------------------------------------------------------------------------->
+# 카탈로그 캐시(버전/ETag/차고 목록)를 거치는 뷰 테스트가 Redis 없이 돌도록 @override_settings(CACHES=LOCMEM_CACHES)로 쓴다.
+LOCMEM_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
@@ -2,8 +2,10 @@
 app_name = 'subscriptions'
 
 from django.contrib import admin
+from django.db import transaction
 
-from .models import Subscription, SubscriptionRequest, SubscriptionReview, SubscriptionLike, SubscriptionReviewLike, SubscriptionModelRequest, SubscriptionCoupon, SubscriptionUserCoupon
+from .models import Subscription, SubscriptionRequest, SubscriptionReview, SubscriptionLike, SubscriptionReviewLike, SubscriptionModelRequest, SubscriptionCoupon, SubscriptionUserCoupon, SubscriptionCouponCampaign, SubscriptionInstallment, BillingRun, BillingAttempt
+from .tasks import issue_coupon_campaign
 
 @admin.register(SubscriptionRequest)
 class SubscriptionRequestAdmin(admin.ModelAdmin):
@@ -45,6 +47,17 @@ class SubscriptionRequestAdmin(admin.ModelAdmin):
         )
         
 
+class SubscriptionInstallmentInline(admin.TabularInline):
+    model = SubscriptionInstallment
+    extra = 0
+    can_delete = False
+    fields = ['sequence', 'due_date', 'amount', 'status', 'payment', 'paid_at']
+    readonly_fields = ['sequence', 'due_date', 'payment', 'paid_at']
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
 @admin.register(Subscription)
 class SubscriptionAdmin(admin.ModelAdmin):
     list_display = ['id', 'request', 'start_date', 'end_date', 'last_payment_date', 'schedule_payment_date', 'is_current', 'duration_days', 'is_active']
@@ -52,6 +65,7 @@ class SubscriptionAdmin(admin.ModelAdmin):
     search_fields = ['request__user__username', 'request__user__email', 'request__car__model__name', 'request__car__model__brand__name', 'request__car__vin_number']
     readonly_fields = ['created_at', 'modified_at', 'is_current', 'duration_days']
     list_editable = ['is_active']
+    inlines = [SubscriptionInstallmentInline]
     
     fieldsets = (
         ('Basic Information', {
@@ -176,10 +190,10 @@ class SubscriptionModelRequestAdmin(admin.ModelAdmin):
 
 @admin.register(SubscriptionCoupon)
 class SubscriptionCouponAdmin(admin.ModelAdmin):
-    list_display = ['id', 'code', 'name', 'description', 'discount_type', 'discount_rate', 'max_discount', 'discount', 'valid_from', 'valid_to', 'is_active']
+    list_display = ['id', 'code', 'name', 'description', 'discount_type', 'discount_rate', 'max_discount', 'discount', 'issued_count', 'redeemed_count', 'valid_from', 'valid_to', 'is_active']
     list_filter = ['is_active', 'valid_from', 'valid_to', 'discount_type']
     search_fields = ['code', 'name', 'description']
-    readonly_fields = ['code', 'created_at', 'modified_at']
+    readonly_fields = ['code', 'issued_count', 'redeemed_count', 'created_at', 'modified_at']
     list_editable = ['is_active']
 
     fieldsets = (
@@ -196,7 +210,7 @@ class SubscriptionCouponAdmin(admin.ModelAdmin):
             'fields': ('valid_from', 'valid_to', 'is_active')
         }),
         ('System Information', {
-            'fields': ('code', 'created_at', 'modified_at'),
+            'fields': ('code', 'issued_count', 'redeemed_count', 'created_at', 'modified_at'),
             'classes': ('collapse',)
         }),
     )
@@ -236,4 +250,72 @@ class SubscriptionUserCouponAdmin(admin.ModelAdmin):
     is_valid.short_description = 'Valid'
 
     def get_queryset(self, request):
-        return super().get_queryset(request).select_related('user', 'coupon')
\ No newline at end of file
+        return super().get_queryset(request).select_related('user', 'coupon')
+
+
+@admin.register(SubscriptionCouponCampaign)
+class SubscriptionCouponCampaignAdmin(admin.ModelAdmin):
+    list_display = ['id', 'name', 'coupon', 'segment', 'status', 'issued_count', 'skipped_count', 'last_user_id', 'created_at', 'finished_at']
+    list_filter = ['status', 'segment', 'created_at']
+    search_fields = ['name', 'coupon__code', 'coupon__name']
+    readonly_fields = ['status', 'last_user_id', 'issued_count', 'skipped_count', 'error', 'created_at', 'modified_at', 'finished_at']
+    actions = ['start_campaigns']
+
+    fieldsets = (
+        ('Basic Information', {
+            'fields': ('name', 'coupon')
+        }),
+        ('Segment', {
+            'fields': ('segment', 'segment_params')
+        }),
+        ('Progress', {
+            'fields': ('status', 'last_user_id', 'issued_count', 'skipped_count', 'error', 'finished_at')
+        }),
+        ('System Information', {
+            'fields': ('created_at', 'modified_at'),
+            'classes': ('collapse',)
+        }),
+    )
+
+    @admin.action(description='선택한 캠페인 발급 시작/재개')
+    def start_campaigns(self, request, queryset):
+        # 워커 중단으로 RUNNING에 멈춘 캠페인도 재개할 수 있다 (청크 발급은 캠페인 행 잠금으로 중복 실행에 안전).
+        campaigns = list(queryset.exclude(status='COMPLETED'))
+        for campaign in campaigns:
+            campaign.set_status('PENDING')
+            transaction.on_commit(lambda campaign_id=campaign.id: issue_coupon_campaign.delay(campaign_id))
+        self.message_user(request, f"{len(campaigns)}개의 캠페인 발급을 시작했습니다.")
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('coupon')
+
+
+class BillingAttemptInline(admin.TabularInline):
+    model = BillingAttempt
+    extra = 0
+    can_delete = False
+    fields = ['subscription', 'installment', 'cycle_date', 'sequence', 'idempotency_key', 'amount', 'status', 'payment', 'error', 'finished_at']
+    readonly_fields = fields
+    show_change_link = True
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(BillingRun)
+class BillingRunAdmin(admin.ModelAdmin):
+    list_display = ['id', 'billing_date', 'status', 'paid_count', 'failed_count', 'pending_count', 'created_at', 'finished_at']
+    list_filter = ['status', 'billing_date']
+    readonly_fields = ['billing_date', 'status', 'paid_count', 'failed_count', 'pending_count', 'created_at', 'modified_at', 'finished_at']
+    inlines = [BillingAttemptInline]
+
+
+@admin.register(BillingAttempt)
+class BillingAttemptAdmin(admin.ModelAdmin):
+    list_display = ['id', 'run', 'subscription', 'cycle_date', 'sequence', 'amount', 'status', 'payment', 'created_at', 'finished_at']
+    list_filter = ['status', 'cycle_date', 'created_at']
+    search_fields = ['idempotency_key', 'subscription__request__user__username', 'subscription__request__user__email']
+    readonly_fields = ['run', 'subscription', 'installment', 'payment', 'cycle_date', 'sequence', 'idempotency_key', 'amount', 'status', 'error', 'claimed_at', 'created_at', 'modified_at', 'finished_at']
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('run', 'payment', 'subscription__request__user')
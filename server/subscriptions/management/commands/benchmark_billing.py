@@ -0,0 +1,103 @@
+# subscriptions/management/commands/benchmark_billing.py
+app_name = 'subscriptions'
+
+import time, datetime
+
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import connection
+from django.utils import timezone
+from django.core.management.base import BaseCommand, CommandError
+
+from server.settings.base import BILLING_BATCH_SIZE, BILLING_VENDOR_LIMITS, TOSS_API_URL
+from accounts.models import User
+from cars.models import Car
+from payments.models import Billing, Payment
+from subscriptions.models import SubscriptionRequest, Subscription, SubscriptionInstallment, BillingRun
+from subscriptions.tasks import charge_due_installments
+
+EMAIL_PREFIX = 'benchmark-billing-'
+BENCHMARK_BILLING_DATE = datetime.date(2000, 1, 1)
+
+class Command(BaseCommand):
+    help = (
+        "정기 결제 회차를 결제사(TOSS_API_URL)에 한 건씩 순서대로 호출하는 방식과, 배치 태스크 하나의 동시 호출, "
+        "chord처럼 배치를 여러 워커에 나눠 실행하는 방식으로 각각 결제해 초당 처리 건수를 비교합니다. "
+        "실제 결제가 일어나므로 테스트용 결제사 서버를 대상으로만 실행하세요. 생성한 데이터는 측정 후 삭제합니다."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--installments', type=int, default=1000, help="방식마다 결제할 회차 수")
+        parser.add_argument('--workers', type=int, default=4, help="chord 분산을 흉내 낼 워커 수")
+        parser.add_argument('--no-rate-limit', action='store_true', help="BILLING_VENDOR_LIMITS의 초당 호출 수 제한 없이 측정")
+
+    # 방식마다 새 사용자/결제 수단/구독/회차를 만든다. 워커 스레드가 읽을 수 있도록 커밋한다.
+    def seed(self, label, count, car):
+        today = timezone.now().date()
+        users = User.objects.bulk_create([
+            User(email=f'{EMAIL_PREFIX}{label}-{index}@example.com', name='benchmark', username=f'bb-{label[:4]}-{index}')
+            for index in range(count)
+        ], batch_size=1000)
+        billings = Billing.objects.bulk_create([
+            Billing(user=user, vender='TOSS', customer_key='benchmark-billing', billing_key=f'benchmark-{user.id}') for user in users
+        ], batch_size=1000)
+        requests = SubscriptionRequest.objects.bulk_create([
+            SubscriptionRequest(user=user, car=car, month=12, billing=billing, start_date=today, end_date=today + datetime.timedelta(days=365), is_active=False)
+            for user, billing in zip(users, billings)
+        ], batch_size=1000)
+        subscriptions = Subscription.objects.bulk_create([
+            Subscription(request=request, start_date=request.start_date, end_date=request.end_date, schedule_payment_date=today) for request in requests
+        ], batch_size=1000)
+        installments = SubscriptionInstallment.objects.bulk_create([
+            SubscriptionInstallment(subscription=subscription, sequence=1, due_date=today, amount=500000) for subscription in subscriptions
+        ], batch_size=1000)
+        return [installment.id for installment in installments]
+
+    def cleanup(self):
+        Payment.objects.filter(billing__customer_key='benchmark-billing').delete()
+        User.objects.filter(email__startswith=EMAIL_PREFIX).delete()
+        BillingRun.objects.filter(billing_date=BENCHMARK_BILLING_DATE).delete()
+
+    def charge_batches(self, batches, run_id, workers, limits):
+        def charge(batch):
+            try:
+                return charge_due_installments(batch, run_id, **limits)
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(workers) as pool:
+            return [result for results in pool.map(charge, batches) for result in results]
+
+    def handle(self, *args, **options):
+        count = options['installments']
+        car = Car.objects.filter(is_subscriptable=True).first()
+        if car is None:
+            raise CommandError("구독 가능한 차량이 없습니다.")
+
+        limits = dict(BILLING_VENDOR_LIMITS['TOSS'])
+        if options['no_rate_limit']:
+            limits['rate_limit'] = None
+        modes = [
+            ('serial', {'concurrency': 1, 'rate_limit': limits['rate_limit']}, 1),
+            ('batch', limits, 1),
+            ('chord', limits, options['workers']),
+        ]
+
+        self.stdout.write(f"결제사 {TOSS_API_URL}, 회차 {count}건, 배치 크기 {BILLING_BATCH_SIZE}, 한도 {limits}")
+        self.cleanup()
+        run = BillingRun.objects.create(billing_date=BENCHMARK_BILLING_DATE)
+        try:
+            for label, mode_limits, workers in modes:
+                installment_ids = self.seed(label, count, car)
+                batches = [installment_ids[offset:offset + BILLING_BATCH_SIZE] for offset in range(0, count, BILLING_BATCH_SIZE)]
+
+                started = time.perf_counter()
+                results = self.charge_batches(batches, run.id, workers, mode_limits)
+                elapsed = time.perf_counter() - started
+
+                paid = sum(1 for result in results if result['status'] == 'PAID')
+                if paid != count:
+                    raise CommandError(f"{label}: {count}건 중 {paid}건만 결제되었습니다.")
+                self.stdout.write(f"{label} (concurrency {mode_limits['concurrency']}, workers {workers}): {elapsed:.1f}s, {count / elapsed:.1f}건/s")
+        finally:
+            self.cleanup()
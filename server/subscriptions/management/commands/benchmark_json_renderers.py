@@ -0,0 +1,66 @@
+# subscriptions/management/commands/benchmark_json_renderers.py
+app_name = 'subscriptions'
+
+import io, time, tracemalloc
+
+from django.db.models import Exists, OuterRef
+from django.core.management.base import BaseCommand, CommandError
+
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from server.utils import SuccessResponseBuilder
+from server.parsers import ORJSONParser
+from server.renderers import ORJSONRenderer
+from cars.models import Model, Car, CarListing
+from cars.projections import project_models
+from subscriptions.serializers import SubscriptionBrandSerializer, SubscriptionCarSerializer
+
+class Command(BaseCommand):
+    help = "차고 목록/모델 목록 응답을 DRF 기본 JSON 렌더러·파서와 orjson 렌더러·파서로 각각 처리해 시간/메모리를 비교합니다."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=50)
+        parser.add_argument('--cars', type=int, default=500, help="차고 목록 응답에 넣을 차량 수 (CarListing payload를 반복해 채움)")
+
+    def get_payloads(self, car_count):
+        listings = list(CarListing.objects.filter(service='subscriptions').values_list('payload', flat=True))
+        if not listings:
+            raise CommandError("CarListing 행이 없습니다. rebuild_car_listings를 먼저 실행하세요.")
+        garage = [listings[index % len(listings)] for index in range(car_count)]
+
+        cars = Car.objects.filter(is_active=True, is_subscriptable=True)
+        models = Model.objects.filter(Exists(cars.filter(model=OuterRef('pk')))).order_by('brand__name', 'name')
+        model_list = project_models(models, cars, SubscriptionBrandSerializer.Meta.fields, SubscriptionCarSerializer.Meta.fields)
+        return [
+            (f'garage ({car_count} cars)', SuccessResponseBuilder().with_data({'cars': garage}).build()),
+            (f'model list ({len(model_list)} models)', SuccessResponseBuilder().with_data({'models': model_list}).build()),
+        ]
+
+    def measure(self, function, repeat):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            result = function()
+        elapsed = (time.perf_counter() - started) / repeat
+
+        tracemalloc.start()
+        function()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return result, elapsed * 1000, peak / 1024
+
+    def handle(self, *args, **options):
+        repeat = options['repeat']
+        for label, payload in self.get_payloads(options['cars']):
+            expected = JSONRenderer().render(payload)
+            for renderer in (JSONRenderer(), ORJSONRenderer()):
+                rendered, elapsed, peak = self.measure(lambda: renderer.render(payload), repeat)
+                if rendered != expected:
+                    raise CommandError(f"{type(renderer).__name__}의 출력이 DRF 기본 렌더러와 다릅니다.")
+                self.stdout.write(f"{label} render {type(renderer).__name__}: {elapsed:.2f} ms, peak {peak:.0f} KiB, {len(rendered) / 1024:.0f} KiB")
+
+            for parser in (JSONParser(), ORJSONParser()):
+                parsed, elapsed, peak = self.measure(lambda: parser.parse(io.BytesIO(expected)), repeat)
+                if JSONRenderer().render(parsed) != expected:
+                    raise CommandError(f"{type(parser).__name__}의 파싱 결과가 원본과 다릅니다.")
+                self.stdout.write(f"{label} parse {type(parser).__name__}: {elapsed:.2f} ms, peak {peak:.0f} KiB")
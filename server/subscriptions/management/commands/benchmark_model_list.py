@@ -0,0 +1,88 @@
+# subscriptions/management/commands/benchmark_model_list.py
+app_name = 'subscriptions'
+
+import time, random, datetime, tracemalloc
+
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Prefetch
+from django.core.management.base import BaseCommand, CommandError
+
+from rest_framework.renderers import JSONRenderer
+
+from accounts.models import User
+from cars.models import Brand, Model, Car
+from cars.projections import project_models
+from subscriptions.models import SubscriptionRequest
+from subscriptions.serializers import SubscriptionBrandSerializer, SubscriptionCarSerializer, SubscriptionModelListSerializer
+
+class Command(BaseCommand):
+    help = "구독 모델 목록을 prefetch + 시리얼라이저(이전 방식)와 values() 프로젝션으로 각각 만들어 시간/메모리를 비교합니다."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=3)
+        parser.add_argument('--cars', type=int, default=0, help="측정용 차량을 추가로 생성 (측정 후 롤백)")
+        parser.add_argument('--requests', type=int, default=0, help="측정용 구독 신청을 추가로 생성 (측정 후 롤백)")
+
+    # 이전 ModelListAPIView 구현: 차량마다 신청/구독까지 prefetch 한 뒤 시리얼라이저로 변환
+    def serialize_models(self):
+        models = Model.objects.filter(cars__is_active=True, cars__is_subscriptable=True).select_related('brand').prefetch_related(
+            Prefetch('cars', queryset=Car.objects.filter(is_active=True, is_subscriptable=True).prefetch_related('subscription_requests', 'subscription_requests__subscriptions'))
+        ).distinct().order_by('brand__name', 'name')
+        return SubscriptionModelListSerializer(models, many=True).data
+
+    def project_models(self):
+        cars = Car.objects.filter(is_active=True, is_subscriptable=True)
+        models = Model.objects.filter(Exists(cars.filter(model=OuterRef('pk')))).order_by('brand__name', 'name')
+        return project_models(models, cars, SubscriptionBrandSerializer.Meta.fields, SubscriptionCarSerializer.Meta.fields)
+
+    def seed(self, car_count, request_count):
+        brands = Brand.objects.bulk_create([Brand(name=f'Benchmark {index}', slug=f'benchmark-{index}') for index in range(10)])
+        models = Model.objects.bulk_create([
+            Model(brand=brands[index % 10], name=f'Model {index}', slug=f'benchmark-model-{index}', code=f'B{index}')
+            for index in range(100)
+        ])
+        cars = Car.objects.bulk_create([
+            Car(
+                model=models[index % 100], vin_number=f'BENCHMARK{index}', retail_price=30000000, release_date=datetime.date(2022, 1, 1),
+                is_subscriptable=True, subscription_fee_12=500000, subscription_fee_minimum=500000, tax=0, acquisition_tax=0,
+            )
+            for index in range(car_count)
+        ], batch_size=1000)
+        if request_count and cars:
+            user = User.objects.first()
+            if user is None:
+                raise CommandError("구독 신청을 만들 사용자가 없습니다.")
+            SubscriptionRequest.objects.bulk_create([
+                SubscriptionRequest(user=user, car=random.choice(cars), month=12, start_date=datetime.date(2026, 1, 1), end_date=datetime.date(2027, 1, 1))
+                for _ in range(request_count)
+            ], batch_size=5000)
+
+    def measure(self, build, repeat):
+        renderer = JSONRenderer()
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            renderer.render(build())
+            timings.append(time.perf_counter() - started)
+
+        # tracemalloc은 실행 시간을 늘리므로 메모리는 따로 한 번 측정한다.
+        tracemalloc.start()
+        renderer.render(build())
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return min(timings) * 1000, peak / 1024 / 1024
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            if options['cars']:
+                self.seed(options['cars'], options['requests'])
+            self.stdout.write(f"차량 {Car.objects.count()}대, 구독 신청 {SubscriptionRequest.objects.count()}건")
+
+            renderer = JSONRenderer()
+            if renderer.render(self.serialize_models()) != renderer.render(self.project_models()):
+                raise CommandError("두 방식의 응답이 다릅니다.")
+
+            for label, build in [('prefetch + serializer', self.serialize_models), ('values() projection', self.project_models)]:
+                elapsed, peak = self.measure(build, options['repeat'])
+                self.stdout.write(f"{label}: {elapsed:.0f} ms (best of {options['repeat']}), peak {peak:.1f} MiB")
+            transaction.set_rollback(True)
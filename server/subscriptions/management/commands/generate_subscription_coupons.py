@@ -0,0 +1,30 @@
+# subscriptions/management/commands/generate_subscription_coupons.py
+app_name = 'subscriptions'
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+from server.codes import CODE_BATCH_SIZE, bulk_create_coupons
+from subscriptions.models import SubscriptionCoupon
+
+class Command(BaseCommand):
+    help = "템플릿 구독 쿠폰의 설정을 복제해 고유 코드를 가진 쿠폰을 대량 생성합니다."
+
+    def add_arguments(self, parser):
+        parser.add_argument('template_code', help="복제할 템플릿 쿠폰 코드")
+        parser.add_argument('count', type=int, help="생성할 쿠폰 수")
+        parser.add_argument('--name', help="생성할 쿠폰 이름 (기본값: 템플릿 쿠폰 이름)")
+        parser.add_argument('--batch-size', type=int, default=CODE_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        try:
+            template = SubscriptionCoupon.objects.get(code=options['template_code'])
+        except SubscriptionCoupon.DoesNotExist:
+            raise CommandError(f"템플릿 쿠폰을 찾을 수 없습니다: {options['template_code']}")
+
+        overrides = {'name': options['name']} if options['name'] else {}
+        try:
+            count = bulk_create_coupons(template, options['count'], batch_size=options['batch_size'], **overrides)
+        except ValidationError as e:
+            raise CommandError(f"쿠폰 설정이 올바르지 않습니다: {'; '.join(e.messages)}")
+        self.stdout.write(self.style.SUCCESS(f"{count}개의 쿠폰을 생성했습니다."))
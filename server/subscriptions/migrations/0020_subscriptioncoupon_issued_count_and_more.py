@@ -0,0 +1,37 @@
+# Generated by Django 5.2.4 on 2025-11-15 09:42
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_coupon_counts(apps, schema_editor):
+    SubscriptionCoupon = apps.get_model('subscriptions', 'SubscriptionCoupon')
+    SubscriptionUserCoupon = apps.get_model('subscriptions', 'SubscriptionUserCoupon')
+
+    counts = SubscriptionUserCoupon.objects.filter(coupon=OuterRef('pk')).values('coupon')
+    SubscriptionCoupon.objects.update(
+        issued_count=Coalesce(Subquery(counts.annotate(count=Count('id')).values('count')), 0),
+        redeemed_count=Coalesce(Subquery(counts.annotate(count=Count('id', filter=Q(used_at__isnull=False))).values('count')), 0),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('subscriptions', '0019_subscriptioncoupon_subs_coupon_brand_ids_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='subscriptioncoupon',
+            name='issued_count',
+            field=models.IntegerField(default=0, editable=False, verbose_name='Issued Count'),
+        ),
+        migrations.AddField(
+            model_name='subscriptioncoupon',
+            name='redeemed_count',
+            field=models.IntegerField(default=0, editable=False, verbose_name='Redeemed Count'),
+        ),
+        migrations.RunPython(backfill_coupon_counts, migrations.RunPython.noop),
+    ]
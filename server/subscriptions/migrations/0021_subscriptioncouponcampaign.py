@@ -0,0 +1,37 @@
+# Generated by Django 5.2.4 on 2025-11-17 11:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('subscriptions', '0020_subscriptioncoupon_issued_count_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SubscriptionCouponCampaign',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, verbose_name='Name')),
+                ('segment', models.CharField(choices=[('ALL', 'All Users'), ('MODEL_LIKE', 'Model Likers'), ('USER_IDS', 'User IDs')], default='ALL', max_length=20)),
+                ('segment_params', models.JSONField(blank=True, default=dict, verbose_name='Segment Params')),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('RUNNING', 'Running'), ('COMPLETED', 'Completed'), ('FAILED', 'Failed')], default='PENDING', editable=False, max_length=20)),
+                ('last_user_id', models.IntegerField(default=0, editable=False, verbose_name='Last User ID')),
+                ('issued_count', models.IntegerField(default=0, editable=False, verbose_name='Issued Count')),
+                ('skipped_count', models.IntegerField(default=0, editable=False, verbose_name='Skipped Count')),
+                ('error', models.TextField(blank=True, editable=False, verbose_name='Error')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('modified_at', models.DateTimeField(auto_now=True)),
+                ('finished_at', models.DateTimeField(blank=True, editable=False, null=True)),
+                ('coupon', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='campaigns', to='subscriptions.subscriptioncoupon')),
+            ],
+            options={
+                'verbose_name': 'Coupon Campaign',
+                'verbose_name_plural': 'Coupon Campaigns',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 5.2.4 on 2025-11-21 10:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0003_alter_payment_order_id'),
+        ('subscriptions', '0021_subscriptioncouponcampaign'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BillingRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('billing_date', models.DateField(unique=True, verbose_name='Billing Date')),
+                ('status', models.CharField(choices=[('RUNNING', 'Running'), ('COMPLETED', 'Completed'), ('INTERRUPTED', 'Interrupted')], default='RUNNING', editable=False, max_length=20)),
+                ('paid_count', models.IntegerField(default=0, editable=False, verbose_name='Paid Count')),
+                ('failed_count', models.IntegerField(default=0, editable=False, verbose_name='Failed Count')),
+                ('pending_count', models.IntegerField(default=0, editable=False, verbose_name='Pending Count')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('modified_at', models.DateTimeField(auto_now=True)),
+                ('finished_at', models.DateTimeField(blank=True, editable=False, null=True)),
+            ],
+            options={
+                'verbose_name': 'Billing Run',
+                'verbose_name_plural': 'Billing Runs',
+                'ordering': ['-billing_date'],
+            },
+        ),
+        migrations.CreateModel(
+            name='BillingAttempt',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cycle_date', models.DateField(verbose_name='Cycle Date')),
+                ('sequence', models.PositiveSmallIntegerField(default=1, verbose_name='Sequence')),
+                ('idempotency_key', models.CharField(max_length=64, unique=True, verbose_name='Idempotency Key')),
+                ('amount', models.IntegerField(blank=True, null=True, verbose_name='Amount')),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('PAID', 'Paid'), ('FAILED', 'Failed')], default='PENDING', max_length=20)),
+                ('error', models.TextField(blank=True, verbose_name='Error')),
+                ('claimed_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('modified_at', models.DateTimeField(auto_now=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('payment', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='billing_attempts', to='payments.payment')),
+                ('subscription', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='billing_attempts', to='subscriptions.subscription')),
+                ('run', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attempts', to='subscriptions.billingrun')),
+            ],
+            options={
+                'verbose_name': 'Billing Attempt',
+                'verbose_name_plural': 'Billing Attempts',
+                'ordering': ['-created_at'],
+                'unique_together': {('subscription', 'cycle_date', 'sequence')},
+            },
+        ),
+    ]
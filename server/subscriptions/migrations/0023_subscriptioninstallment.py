@@ -0,0 +1,97 @@
+# Generated by Django 5.2.4 on 2025-11-21 15:26
+
+from datetime import timedelta
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def get_installment_dates(start_date, end_date):
+    cycles = max(1, -(-(end_date - start_date).days // 30))
+    return [start_date + timedelta(days=30 * cycle) for cycle in range(cycles)]
+
+
+def backfill_installments(apps, schema_editor):
+    # 기존 구독의 회차를 만든다. 다음 결제일(schedule_payment_date) 이전 회차는 결제 완료로,
+    # 다음 결제일이 없는 구독은 결제 내역이 있으면 첫 회차만 결제 완료로 본다.
+    Subscription = apps.get_model('subscriptions', 'Subscription')
+    SubscriptionInstallment = apps.get_model('subscriptions', 'SubscriptionInstallment')
+    CarSubscriptionFee = apps.get_model('cars', 'CarSubscriptionFee')
+    Payment = apps.get_model('payments', 'Payment')
+
+    from cars.pricing import EMPTY_PRICING_TABLE, lookup_fee
+
+    # 금액은 결제 시점과 같은 규칙(cars.pricing: 0원 구간 제외, 기간 이하에서 가장 긴 구간)으로 정한다.
+    tiers = {}
+    for car_id, months, fee in CarSubscriptionFee.objects.filter(fee__gt=0).values_list('car_id', 'months', 'fee').order_by('car_id', 'months'):
+        tiers.setdefault(car_id, []).append((months, fee))
+    tables = {car_id: tuple(zip(*rows)) for car_id, rows in tiers.items()}
+    paid_subscription_ids = set(Payment.objects.exclude(subscription_id=None).values_list('subscription_id', flat=True))
+
+    subscriptions = (
+        Subscription.objects.exclude(start_date=None).exclude(end_date=None)
+        .values_list('id', 'start_date', 'end_date', 'schedule_payment_date', 'request__car_id', 'request__month')
+    )
+    installments = []
+    for subscription_id, start_date, end_date, schedule_payment_date, car_id, month in subscriptions.iterator():
+        amount = lookup_fee(tables.get(car_id, EMPTY_PRICING_TABLE), month)
+        for sequence, due_date in enumerate(get_installment_dates(start_date, end_date), start=1):
+            if schedule_payment_date is not None:
+                paid = due_date < schedule_payment_date
+            else:
+                paid = sequence == 1 and subscription_id in paid_subscription_ids
+            # 결제되지 않은 첫 회차는 할인이 적용되도록 금액을 비워 결제 시 계산한다. (Subscription.create_installments와 같은 규칙)
+            installments.append(SubscriptionInstallment(
+                subscription_id=subscription_id, sequence=sequence, due_date=due_date,
+                amount=None if sequence == 1 and not paid else amount, status='PAID' if paid else 'PENDING',
+            ))
+        if len(installments) >= 5000:
+            SubscriptionInstallment.objects.bulk_create(installments)
+            installments = []
+    SubscriptionInstallment.objects.bulk_create(installments)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cars', '0018_backfill_carsubscriptionfee'),
+        ('payments', '0003_alter_payment_order_id'),
+        ('subscriptions', '0022_billingrun_billingattempt'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SubscriptionInstallment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sequence', models.PositiveSmallIntegerField(verbose_name='Sequence')),
+                ('due_date', models.DateField(verbose_name='Due Date')),
+                ('amount', models.IntegerField(blank=True, null=True, verbose_name='Amount')),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('PAID', 'Paid'), ('CANCELED', 'Canceled')], default='PENDING', max_length=20)),
+                ('paid_at', models.DateTimeField(blank=True, null=True, verbose_name='Paid At')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('modified_at', models.DateTimeField(auto_now=True)),
+                ('payment', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='installments', to='payments.payment')),
+                ('subscription', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='installments', to='subscriptions.subscription')),
+            ],
+            options={
+                'verbose_name': 'Subscription Installment',
+                'verbose_name_plural': 'Subscription Installments',
+                'ordering': ['subscription', 'sequence'],
+            },
+        ),
+        migrations.AddField(
+            model_name='billingattempt',
+            name='installment',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='billing_attempts', to='subscriptions.subscriptioninstallment'),
+        ),
+        migrations.AddIndex(
+            model_name='subscriptioninstallment',
+            index=models.Index(fields=['status', 'due_date'], name='subs_installment_due_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='subscriptioninstallment',
+            unique_together={('subscription', 'sequence')},
+        ),
+        migrations.RunPython(backfill_installments, migrations.RunPython.noop),
+    ]
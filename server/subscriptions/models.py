@@ -1,19 +1,43 @@
 # subscriptions/models.py
 app_name = 'subscriptions'
 
-import random, string
-
 from datetime import timedelta
 
-from django.db import models
+from django.db import IntegrityError, models, transaction
 from django.utils import timezone
 from django.core.exceptions import ValidationError
+from django.contrib.postgres.indexes import GinIndex
 
+from server.codes import generate_unique_codes
 from cars.models import Car, Model
 from accounts.models import User
 from payments.models import Billing, Payment
 from payments.utils import payment_billing
 
+class SubscriptionCouponQuerySet(models.QuerySet):
+    def applicable_to(self, car):
+        # 대상 지정이 없는 쿠폰 + 차량/모델/브랜드 중 하나라도 대상으로 지정한 쿠폰
+        # 각 조건은 JSON 목록 GIN 인덱스(@>)와 미지정 쿠폰 부분 인덱스로 처리된다.
+        return self.filter(
+            models.Q(brand_ids=[], model_ids=[], car_ids=[]) |
+            models.Q(brand_ids__contains=[car.model.brand_id]) |
+            models.Q(model_ids__contains=[car.model_id]) |
+            models.Q(car_ids__contains=[car.id])
+        )
+
+    def valid_now(self):
+        now = timezone.now()
+        return self.filter(is_active=True, valid_from__lte=now, valid_to__gte=now)
+
+
+class SubscriptionUserCouponQuerySet(models.QuerySet):
+    def usable(self):
+        return self.filter(is_active=True, used_at__isnull=True, coupon__in=SubscriptionCoupon.objects.valid_now())
+
+    def applicable_to(self, car):
+        return self.filter(coupon__in=SubscriptionCoupon.objects.applicable_to(car))
+
+
 class SubscriptionCoupon(models.Model):
     TYPE_CHOICES = [
         ('PERCENTAGE', 'Percentage'),
@@ -41,6 +65,8 @@ class SubscriptionCoupon(models.Model):
 
     usage_limit = models.IntegerField(verbose_name="Usage Limit", default=1)                            # Usage Limit
     usage_limit_per_user = models.IntegerField(verbose_name="Usage Limit Per User", default=1)          # Usage Limit Per User
+    issued_count = models.IntegerField(verbose_name="Issued Count", default=0, editable=False)          # Issued Count (<= Usage Limit)
+    redeemed_count = models.IntegerField(verbose_name="Redeemed Count", default=0, editable=False)      # Redeemed Count
 
     valid_from = models.DateTimeField(verbose_name="Valid From", default=timezone.now)                  # Valid From
     valid_to = models.DateTimeField(verbose_name="Valid To")                                            # Valid To
@@ -50,20 +76,24 @@ class SubscriptionCoupon(models.Model):
 
     is_active = models.BooleanField(default=True)
 
+    objects = SubscriptionCouponQuerySet.as_manager()
+
     class Meta:
         verbose_name = "Coupon"
         verbose_name_plural = "Coupons"
         ordering = ['-created_at']
+        indexes = [
+            GinIndex(fields=['brand_ids'], name='subs_coupon_brand_ids_idx', opclasses=['jsonb_path_ops']),
+            GinIndex(fields=['model_ids'], name='subs_coupon_model_ids_idx', opclasses=['jsonb_path_ops']),
+            GinIndex(fields=['car_ids'], name='subs_coupon_car_ids_idx', opclasses=['jsonb_path_ops']),
+            models.Index(fields=['id'], name='subs_coupon_untargeted_idx', condition=models.Q(brand_ids=[], model_ids=[], car_ids=[])),
+        ]
 
     def __str__(self):
         return f"{self.name} ({self.code})"
 
     def generate_code(self):
-        characters = string.ascii_uppercase + string.digits
-        while True:
-            code = ''.join(random.choice(characters) for _ in range(8))
-            if not SubscriptionCoupon.objects.filter(code=code).exists():
-                return code
+        return generate_unique_codes(SubscriptionCoupon, 1)[0]
 
     def clean(self):
         # 할인 타입에 따른 필수 필드 검사
@@ -134,6 +164,16 @@ class SubscriptionCoupon(models.Model):
             return "무료"
         return "할인 없음"
     
+    def apply_discount(self, amount):
+        # 월 구독료에 할인을 적용한 금액 (0 미만 보정은 호출하는 쪽에서 한다)
+        if self.discount_type == 'PERCENTAGE':
+            return amount - min(int(amount * (self.discount_rate / 100)), self.max_discount)
+        elif self.discount_type == 'FIXED':
+            return amount - self.discount
+        elif self.discount_type == 'FREE':
+            return 0
+        return amount
+
     @property
     def is_specific(self):
         if not self.brand_ids and not self.model_ids and not self.car_ids:
@@ -152,6 +192,8 @@ class SubscriptionUserCoupon(models.Model):
 
     is_active = models.BooleanField(default=True)
 
+    objects = SubscriptionUserCouponQuerySet.as_manager()
+
     class Meta:
         verbose_name = "User Coupon"
         verbose_name_plural = "User Coupons"
@@ -177,13 +219,22 @@ class SubscriptionUserCoupon(models.Model):
     def use_coupon(self):
         if not self.is_valid:
             raise ValueError("사용할 수 없는 쿠폰입니다.")
-        
-        self.used_at = timezone.now()
-        self.save()
+
+        # 미사용 -> 사용 전환과 사용 횟수 증가를 각각 조건부 UPDATE 한 번으로 처리해 동시에 사용해도 중복 집계되지 않는다.
+        used_at = timezone.now()
+        with transaction.atomic():
+            if not SubscriptionUserCoupon.objects.filter(pk=self.pk, used_at__isnull=True).update(used_at=used_at, modified_at=used_at):
+                raise ValueError("이미 사용된 쿠폰입니다.")
+            if not SubscriptionCoupon.objects.filter(pk=self.coupon_id, redeemed_count__lt=models.F('usage_limit')).update(redeemed_count=models.F('redeemed_count') + 1):
+                raise ValueError("쿠폰 사용 한도를 초과했습니다.")
+        self.used_at = used_at
 
     def return_coupon(self):
+        modified_at = timezone.now()
+        with transaction.atomic():
+            if SubscriptionUserCoupon.objects.filter(pk=self.pk, used_at__isnull=False).update(used_at=None, modified_at=modified_at):
+                SubscriptionCoupon.objects.filter(pk=self.coupon_id, redeemed_count__gt=0).update(redeemed_count=models.F('redeemed_count') - 1)
         self.used_at = None
-        self.save()
 
     def clean(self):
         # 쿠폰이 존재하는지 확인
@@ -194,32 +245,125 @@ class SubscriptionUserCoupon(models.Model):
         if not self.user:
             raise ValidationError("사용자를 선택해야 합니다.")
         
-        # 이미 같은 사용자가 같은 쿠폰을 가지고 있는지 확인 (새로 생성되는 경우에만)
-        if self.pk is None:  # 새로 생성되는 경우에만
-            if SubscriptionUserCoupon.objects.filter(user=self.user, coupon=self.coupon, used_at=None).exists():
+        # 보유 여부/사용자당 사용 제한 확인 (새로 생성되는 경우에만, 한 번의 집계 쿼리)
+        if self.pk is None:
+            counts = SubscriptionUserCoupon.objects.filter(user=self.user, coupon=self.coupon).aggregate(
+                total=models.Count('id'),
+                unused=models.Count('id', filter=models.Q(used_at__isnull=True)),
+            )
+            if counts['unused']:
                 raise ValidationError("이미 해당 쿠폰을 보유하고 있습니다.")
-        
-        # 쿠폰의 전체 사용 제한 확인 (현재 레코드 제외)
-        used_count = SubscriptionUserCoupon.objects.filter(
-            coupon=self.coupon,
-        ).exclude(pk=self.pk).count()
-        
-        if used_count >= self.coupon.usage_limit:
-            raise ValidationError(f"이 쿠폰은 이미 최대 사용 횟수({self.coupon.usage_limit}회)에 도달했습니다.")
-        
-        # 사용자당 사용 제한 확인 (현재 레코드 제외)
-        user_used_count = SubscriptionUserCoupon.objects.filter(
-            user=self.user,
-            coupon=self.coupon,
-        ).exclude(pk=self.pk).count()
-        
-        if user_used_count >= self.coupon.usage_limit_per_user:
-            raise ValidationError(f"이 쿠폰은 사용자당 최대 {self.coupon.usage_limit_per_user}회까지 사용할 수 있습니다.")
+            if counts['total'] >= self.coupon.usage_limit_per_user:
+                raise ValidationError(f"이 쿠폰은 사용자당 최대 {self.coupon.usage_limit_per_user}회까지 사용할 수 있습니다.")
+
+    def save(self, *args, **kwargs):
+        self.clean()
+        if self.pk is not None:
+            return super().save(*args, **kwargs)
+
+        # 쿠폰 전체 사용 제한: 발급 횟수 검사와 증가를 UPDATE ... WHERE issued_count < usage_limit 한 번으로 처리한다.
+        with transaction.atomic():
+            if not SubscriptionCoupon.objects.filter(pk=self.coupon_id, issued_count__lt=models.F('usage_limit')).update(issued_count=models.F('issued_count') + 1):
+                raise ValidationError(f"이 쿠폰은 이미 최대 사용 횟수({self.coupon.usage_limit}회)에 도달했습니다.")
+            super().save(*args, **kwargs)
+
+
+class SubscriptionCouponCampaign(models.Model):
+    SEGMENT_CHOICES = [
+        ('ALL', 'All Users'),                   # 전체 활성 사용자
+        ('MODEL_LIKE', 'Model Likers'),         # segment_params: {"model_id": 1}
+        ('USER_IDS', 'User IDs'),               # segment_params: {"user_ids": [1, 2, 3]}
+    ]
+    STATUS_CHOICES = [
+        ('PENDING', 'Pending'),
+        ('RUNNING', 'Running'),
+        ('COMPLETED', 'Completed'),
+        ('FAILED', 'Failed'),
+    ]
+    CHUNK_SIZE = 1000
+
+    coupon = models.ForeignKey(SubscriptionCoupon, on_delete=models.CASCADE, related_name='campaigns')
+    name = models.CharField(max_length=50, verbose_name="Name")
+    segment = models.CharField(max_length=20, choices=SEGMENT_CHOICES, default='ALL')
+    segment_params = models.JSONField(verbose_name="Segment Params", default=dict, blank=True)
+
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='PENDING', editable=False)
+    last_user_id = models.IntegerField(verbose_name="Last User ID", default=0, editable=False)          # 재개 지점 (처리 완료된 마지막 사용자 ID)
+    issued_count = models.IntegerField(verbose_name="Issued Count", default=0, editable=False)
+    skipped_count = models.IntegerField(verbose_name="Skipped Count", default=0, editable=False)
+    error = models.TextField(verbose_name="Error", blank=True, editable=False)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    modified_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True, editable=False)
+
+    class Meta:
+        verbose_name = "Coupon Campaign"
+        verbose_name_plural = "Coupon Campaigns"
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.name} ({self.coupon.code}) - {self.status}"
+
+    def clean(self):
+        if self.segment == 'MODEL_LIKE' and not self.segment_params.get('model_id'):
+            raise ValidationError("모델 좋아요 대상 캠페인은 segment_params에 model_id가 필요합니다.")
+        if self.segment == 'USER_IDS' and not self.segment_params.get('user_ids'):
+            raise ValidationError("사용자 지정 캠페인은 segment_params에 user_ids가 필요합니다.")
 
     def save(self, *args, **kwargs):
         self.clean()
         super().save(*args, **kwargs)
 
+    def get_users(self):
+        if self.segment == 'MODEL_LIKE':
+            return User.objects.filter(id__in=SubscriptionLike.objects.filter(model_id=self.segment_params['model_id']).values('user_id'))
+        if self.segment == 'USER_IDS':
+            return User.objects.filter(id__in=self.segment_params['user_ids'])
+        return User.objects.filter(is_active=True)
+
+    def issue_next_chunk(self, chunk_size=CHUNK_SIZE):
+        # 다음 사용자 ID 청크를 발급하고 진행 상황을 같은 트랜잭션에 기록한다. 더 발급할 대상이 없으면 False
+        with transaction.atomic():
+            # 같은 캠페인 태스크가 중복 실행돼도 같은 청크를 두 번 발급하지 않도록 캠페인 행을 잠그고 진행 상황을 다시 읽는다.
+            progress = SubscriptionCouponCampaign.objects.select_for_update().values('last_user_id', 'issued_count', 'skipped_count').get(pk=self.pk)
+            self.last_user_id, self.issued_count, self.skipped_count = progress['last_user_id'], progress['issued_count'], progress['skipped_count']
+            coupon = SubscriptionCoupon.objects.select_for_update().get(pk=self.coupon_id)
+            user_ids = list(self.get_users().filter(id__gt=self.last_user_id).order_by('id').values_list('id', flat=True)[:chunk_size])
+            remaining = coupon.usage_limit - coupon.issued_count
+            if not user_ids or remaining <= 0:
+                return False
+
+            # 사용자당 제한/미사용 보유 여부를 청크 단위 집계 한 번으로 확인
+            holdings = SubscriptionUserCoupon.objects.filter(coupon=coupon, user_id__in=user_ids).values('user_id').annotate(
+                total=models.Count('id'),
+                unused=models.Count('id', filter=models.Q(used_at__isnull=True)),
+            )
+            blocked = {row['user_id'] for row in holdings if row['unused'] or row['total'] >= coupon.usage_limit_per_user}
+            eligible = [user_id for user_id in user_ids if user_id not in blocked]
+
+            # 쿠폰 전체 사용 제한을 넘으면 남은 수량만큼만 발급하고 그 사용자까지만 처리한 것으로 기록
+            if len(eligible) > remaining:
+                eligible = eligible[:remaining]
+                user_ids = user_ids[:user_ids.index(eligible[-1]) + 1]
+
+            SubscriptionUserCoupon.objects.bulk_create([SubscriptionUserCoupon(user_id=user_id, coupon=coupon) for user_id in eligible])
+            SubscriptionCoupon.objects.filter(pk=coupon.pk).update(issued_count=models.F('issued_count') + len(eligible))
+
+            self.last_user_id = user_ids[-1]
+            self.issued_count += len(eligible)
+            self.skipped_count += len(user_ids) - len(eligible)
+            SubscriptionCouponCampaign.objects.filter(pk=self.pk).update(
+                last_user_id=self.last_user_id, issued_count=self.issued_count, skipped_count=self.skipped_count, modified_at=timezone.now(),
+            )
+        return True
+
+    def set_status(self, status, error=''):
+        self.status = status
+        self.error = error
+        self.finished_at = timezone.now() if status in ('COMPLETED', 'FAILED') else None
+        SubscriptionCouponCampaign.objects.filter(pk=self.pk).update(status=status, error=error, finished_at=self.finished_at, modified_at=timezone.now())
+
 
 class SubscriptionRequest(models.Model):
     id = models.AutoField(primary_key=True)
@@ -281,58 +425,34 @@ class Subscription(models.Model):
         verbose_name_plural = "Subscriptions"
         ordering = ['-created_at']
 
-    def payment(self):
-        if self.request.billing:
-            month = self.request.month
-            car = self.request.car
+    def get_payment_amount(self):
+        month = self.request.month
+        car = self.request.car
+        
+        base_amount = car.get_subscription_fee(month)
+        if base_amount is None:
+            raise ValidationError(f"해당 차량({car.model.brand.name} {car.model.name})의 {month}개월 구독료 정보가 없습니다.")
+        
+        if self.last_payment_date is None:
+            if self.request.coupon:
+                base_amount = self.request.coupon.coupon.apply_discount(base_amount)
             
-            if month >= 96 and car.subscription_fee_96:
-                base_amount = car.subscription_fee_96
-            elif month >= 84 and car.subscription_fee_84:
-                base_amount = car.subscription_fee_84
-            elif month >= 72 and car.subscription_fee_72:
-                base_amount = car.subscription_fee_72
-            elif month >= 60 and car.subscription_fee_60:
-                base_amount = car.subscription_fee_60
-            elif month >= 48 and car.subscription_fee_48:
-                base_amount = car.subscription_fee_48
-            elif month >= 36 and car.subscription_fee_36:
-                base_amount = car.subscription_fee_36
-            elif month >= 24 and car.subscription_fee_24:
-                base_amount = car.subscription_fee_24
-            elif month >= 12 and car.subscription_fee_12:
-                base_amount = car.subscription_fee_12
-            elif month >= 6 and car.subscription_fee_6:
-                base_amount = car.subscription_fee_6
-            elif month >= 3 and car.subscription_fee_3:
-                base_amount = car.subscription_fee_3
-            elif month >= 1 and car.subscription_fee_1:
-                base_amount = car.subscription_fee_1
-            else:
-                raise ValidationError(f"해당 차량({car.model.brand.name} {car.model.name})의 {month}개월 구독료 정보가 없습니다.")
+            if self.request.point:
+                point_amount = self.request.point.amount
+                base_amount -= point_amount
             
-            if self.last_payment_date is None:
-                if self.request.coupon:
-                    coupon = self.request.coupon.coupon
-                    if coupon.discount_type == 'PERCENTAGE':
-                        discount = int(base_amount * (coupon.discount_rate / 100))
-                        discount_amount = min(discount, coupon.max_discount)
-                        base_amount -= discount_amount
-                    elif coupon.discount_type == 'FIXED':
-                        base_amount -= coupon.discount
-                    elif coupon.discount_type == 'FREE':
-                        base_amount = 0
-                
-                if self.request.point:
-                    point_amount = self.request.point.amount
-                    base_amount -= point_amount
-                
-                amount = max(0, base_amount)
-            else: 
-                amount = base_amount
-
-            order_name = f"{self.request.car.model.brand.name} {self.request.car.model.name} ({self.start_date} ~ {self.end_date})"
-            payment_result = payment_billing(self.request.user, self.request.billing, amount, order_name)
+            return max(0, base_amount)
+        return base_amount
+
+    def get_order_name(self):
+        return f"{self.request.car.model.brand.name} {self.request.car.model.name} ({self.start_date} ~ {self.end_date})"
+
+    def payment(self, order_id=None, amount=None):
+        if self.request.billing:
+            if amount is None:
+                amount = self.get_payment_amount()
+
+            payment_result = payment_billing(self.request.user, self.request.billing, amount, self.get_order_name(), order_id=order_id)
             self.last_payment_date = timezone.now()
             return payment_result
 
@@ -355,6 +475,7 @@ class Subscription(models.Model):
         if not self.end_date and self.start_date and self.request.month:
             self.end_date = self.start_date + timedelta(days=30 * self.request.month)
 
+        is_new = self._state.adding
         super().save(*args, **kwargs)
         
         if hasattr(self, '_payment_result') and self._payment_result:
@@ -367,6 +488,32 @@ class Subscription(models.Model):
             self.request.payment.subscription = self
             self.request.payment.save()
 
+        if is_new:
+            self.create_installments(getattr(self, '_payment_result', None) or self.request.payment)
+
+    def get_installment_dates(self):
+        # 시작일부터 30일 간격으로 종료일 전까지의 결제 예정일
+        if self.start_date is None or self.end_date is None:
+            return []
+        cycles = max(1, -(-(self.end_date - self.start_date).days // 30))
+        return [self.start_date + timedelta(days=30 * cycle) for cycle in range(cycles)]
+
+    def create_installments(self, first_payment=None):
+        # 구독 생성 시 회차별 결제 예정(예정일, 금액)을 미리 만든다. 생성 시 결제된 첫 회차는 결제 완료로 기록한다.
+        # 결제되지 않은 첫 회차는 쿠폰/포인트 할인이 적용되도록 금액을 비워, 결제 시 get_payment_amount()로 계산한다.
+        base_amount = self.request.car.get_subscription_fee(self.request.month)
+        installments = [
+            SubscriptionInstallment(subscription=self, sequence=sequence, due_date=due_date, amount=None if sequence == 1 else base_amount)
+            for sequence, due_date in enumerate(self.get_installment_dates(), start=1)
+        ]
+        if installments and first_payment:
+            first = installments[0]
+            first.amount = first_payment.total_amount
+            first.status = 'PAID'
+            first.payment = first_payment
+            first.paid_at = first_payment.approved_at or timezone.now()
+        SubscriptionInstallment.objects.bulk_create(installments)
+
     def __str__(self):
         return f"{self.request.user.username} - {self.request.car.model.brand.name} {self.request.car.model.name} ({self.start_date} ~ {self.end_date})"
     
@@ -384,6 +531,194 @@ class Subscription(models.Model):
         return (self.end_date - self.start_date).days
 
 
+class SubscriptionInstallmentQuerySet(models.QuerySet):
+    def due(self, today):
+        # (status, due_date) 인덱스 범위 스캔 한 번으로 오늘까지 결제 예정인 회차를 고른다. 결제 수단이 없는 구독은 자동 결제 대상이 아니다.
+        return self.filter(status='PENDING', due_date__lte=today, subscription__is_active=True, subscription__request__billing__isnull=False)
+
+
+class SubscriptionInstallment(models.Model):
+    STATUS_CHOICES = [
+        ('PENDING', 'Pending'),
+        ('PAID', 'Paid'),
+        ('CANCELED', 'Canceled'),
+    ]
+
+    subscription = models.ForeignKey(Subscription, on_delete=models.CASCADE, related_name='installments')
+    payment = models.ForeignKey(Payment, on_delete=models.SET_NULL, related_name='installments', null=True, blank=True)
+    sequence = models.PositiveSmallIntegerField(verbose_name="Sequence")
+    due_date = models.DateField(verbose_name="Due Date")
+    amount = models.IntegerField(verbose_name="Amount", null=True, blank=True)     # NULL이면 결제 시 계산 (미결제 첫 회차의 할인 또는 요금표에 요금이 없는 경우)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='PENDING')
+    paid_at = models.DateTimeField(verbose_name="Paid At", null=True, blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    modified_at = models.DateTimeField(auto_now=True)
+
+    objects = SubscriptionInstallmentQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = "Subscription Installment"
+        verbose_name_plural = "Subscription Installments"
+        ordering = ['subscription', 'sequence']
+        unique_together = ('subscription', 'sequence')
+        indexes = [
+            models.Index(fields=['status', 'due_date'], name='subs_installment_due_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.subscription_id} #{self.sequence} ({self.due_date}) - {self.status}"
+
+
+class BillingRun(models.Model):
+    STATUS_CHOICES = [
+        ('RUNNING', 'Running'),
+        ('COMPLETED', 'Completed'),
+        ('INTERRUPTED', 'Interrupted'),     # 집계 전에 중단되고 다음 날 실행으로 넘어간 실행
+    ]
+
+    billing_date = models.DateField(unique=True, verbose_name="Billing Date")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='RUNNING', editable=False)
+    paid_count = models.IntegerField(verbose_name="Paid Count", default=0, editable=False)
+    failed_count = models.IntegerField(verbose_name="Failed Count", default=0, editable=False)
+    pending_count = models.IntegerField(verbose_name="Pending Count", default=0, editable=False)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    modified_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True, editable=False)
+
+    class Meta:
+        verbose_name = "Billing Run"
+        verbose_name_plural = "Billing Runs"
+        ordering = ['-billing_date']
+
+    def __str__(self):
+        return f"{self.billing_date} - {self.status}"
+
+    @classmethod
+    def start(cls, billing_date):
+        # 결제일당 실행 하나를 두고, 같은 날 다시 실행하면 이어서 진행한다. 집계 전에 멈춘 이전 날짜의 실행은 중단으로 마감한다.
+        for run in cls.objects.filter(status='RUNNING', billing_date__lt=billing_date):
+            run.finish('INTERRUPTED')
+        run, _ = cls.objects.get_or_create(billing_date=billing_date)
+        if run.status != 'RUNNING':
+            cls.objects.filter(pk=run.pk).update(status='RUNNING', finished_at=None, modified_at=timezone.now())
+            run.status, run.finished_at = 'RUNNING', None
+        return run
+
+    def finish(self, status='COMPLETED'):
+        # 카운트는 이 실행에 속한 시도 원장에서 다시 집계하므로 중간에 끊긴 실행도 정확하게 마감된다.
+        counts = self.attempts.aggregate(
+            paid=models.Count('id', filter=models.Q(status='PAID')),
+            failed=models.Count('id', filter=models.Q(status='FAILED')),
+            pending=models.Count('id', filter=models.Q(status='PENDING')),
+        )
+        self.status = status
+        self.paid_count, self.failed_count, self.pending_count = counts['paid'], counts['failed'], counts['pending']
+        self.finished_at = timezone.now()
+        BillingRun.objects.filter(pk=self.pk).update(
+            status=status, paid_count=self.paid_count, failed_count=self.failed_count, pending_count=self.pending_count,
+            finished_at=self.finished_at, modified_at=self.finished_at,
+        )
+
+
+class BillingAttempt(models.Model):
+    STATUS_CHOICES = [
+        ('PENDING', 'Pending'),             # 결제사 호출 전 기록 또는 결과를 알 수 없는 상태 (같은 멱등키로 재개)
+        ('PAID', 'Paid'),
+        ('FAILED', 'Failed'),               # 결제사가 거절했거나 호출 전에 실패 (다음 실행에서 새 시퀀스로 재시도)
+    ]
+    CLAIM_TIMEOUT = timedelta(minutes=10)
+
+    run = models.ForeignKey(BillingRun, on_delete=models.CASCADE, related_name='attempts')
+    subscription = models.ForeignKey(Subscription, on_delete=models.CASCADE, related_name='billing_attempts')
+    installment = models.ForeignKey(SubscriptionInstallment, on_delete=models.SET_NULL, related_name='billing_attempts', null=True, blank=True)
+    payment = models.ForeignKey(Payment, on_delete=models.SET_NULL, related_name='billing_attempts', null=True, blank=True)
+    cycle_date = models.DateField(verbose_name="Cycle Date")                                    # 이번 시도가 결제하는 예정일
+    sequence = models.PositiveSmallIntegerField(verbose_name="Sequence", default=1)
+    idempotency_key = models.CharField(max_length=64, unique=True, verbose_name="Idempotency Key")  # 결제사 주문번호/멱등키
+    amount = models.IntegerField(verbose_name="Amount", null=True, blank=True)
+
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='PENDING')
+    error = models.TextField(verbose_name="Error", blank=True)
+    claimed_at = models.DateTimeField(null=True, blank=True)                                   # 처리 중인 워커의 점유 시각
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    modified_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Billing Attempt"
+        verbose_name_plural = "Billing Attempts"
+        ordering = ['-created_at']
+        unique_together = ('subscription', 'cycle_date', 'sequence')
+
+    def __str__(self):
+        return f"{self.idempotency_key} - {self.status}"
+
+    @staticmethod
+    def get_idempotency_key(subscription_id, cycle_date, sequence):
+        return f"subscription-{subscription_id}-{cycle_date:%Y%m%d}-{sequence}"
+
+    @classmethod
+    def claim(cls, run, installment):
+        # 결제사 호출 전에 이번 주기의 시도를 기록하고 점유한다. 처리할 필요가 없으면 None
+        # - 이미 결제된 주기이거나 다른 워커가 점유 중이면 None
+        # - 결과를 모르는 PENDING 시도는 같은 멱등키로 이어서 처리 (중단된 실행의 재개)
+        # - 거절된 시도 뒤에는 다음 시퀀스의 새 멱등키로 다시 시도
+        now = timezone.now()
+        subscription_id, cycle_date = installment.subscription_id, installment.due_date
+        try:
+            with transaction.atomic():
+                latest = cls.objects.select_for_update().filter(subscription_id=subscription_id, cycle_date=cycle_date).order_by('-sequence').first()
+                if latest and latest.status == 'PAID':
+                    return None
+                if latest and latest.status == 'PENDING':
+                    if latest.claimed_at and latest.claimed_at > now - cls.CLAIM_TIMEOUT:
+                        return None
+                    cls.objects.filter(pk=latest.pk).update(run=run, claimed_at=now, modified_at=now)
+                    latest.run, latest.claimed_at = run, now
+                    return latest
+
+                sequence = latest.sequence + 1 if latest else 1
+                return cls.objects.create(
+                    run=run, subscription_id=subscription_id, installment=installment, cycle_date=cycle_date, sequence=sequence, claimed_at=now,
+                    idempotency_key=cls.get_idempotency_key(subscription_id, cycle_date, sequence),
+                )
+        except IntegrityError:
+            # 같은 주기의 첫 시도를 다른 워커가 먼저 기록한 경우
+            return None
+
+    def set_amount(self, amount):
+        self.amount = amount
+        BillingAttempt.objects.filter(pk=self.pk).update(amount=amount, modified_at=timezone.now())
+
+    def complete(self, installment, payment):
+        # 결제 기록, 회차 결제 완료, 구독 다음 결제일(남은 첫 회차 예정일), 시도 마감을 한 트랜잭션으로 처리한다.
+        now = timezone.now()
+        with transaction.atomic():
+            SubscriptionInstallment.objects.filter(pk=installment.pk).update(status='PAID', payment=payment, paid_at=now, modified_at=now)
+            next_due = SubscriptionInstallment.objects.filter(subscription_id=installment.subscription_id, status='PENDING').order_by('due_date').values('due_date')[:1]
+            # save()는 신청 활성/비활성 시그널을 거치며 차량 가능일/목록을 다시 계산하므로 결제일 컬럼만 직접 UPDATE 한다.
+            Subscription.objects.filter(pk=installment.subscription_id).update(
+                last_payment_date=now,
+                schedule_payment_date=models.Subquery(next_due),
+                modified_at=now,
+            )
+            if payment:
+                Payment.objects.filter(pk=payment.pk).update(subscription_id=installment.subscription_id, modified_at=now)
+            self.set_result('PAID', payment=payment)
+
+    def set_result(self, status, error='', payment=None):
+        now = timezone.now()
+        self.status, self.error, self.payment = status, error, payment
+        self.claimed_at = None
+        self.finished_at = now if status != 'PENDING' else None
+        BillingAttempt.objects.filter(pk=self.pk).update(
+            status=status, error=error, payment=payment, claimed_at=None, finished_at=self.finished_at, modified_at=now,
+        )
+
+
 class SubscriptionLike(models.Model):
     id = models.AutoField(primary_key=True)
     model = models.ForeignKey(Model, on_delete=models.CASCADE, related_name='subscription_likes')
@@ -3,7 +3,15 @@ app_name = 'subscriptions'
 
 from rest_framework.pagination import PageNumberPagination
 
+from server.paginations import KeysetPagination
+
 class SubscriptionPagination(PageNumberPagination):
     page_size = 20
     page_size_query_param = 'page_size'
-    max_page_size = 100
\ No newline at end of file
+    max_page_size = 100
+
+
+class SubscriptionCursorPagination(KeysetPagination):
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
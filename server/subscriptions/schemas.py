@@ -58,6 +58,15 @@ class SubscriptionRequestCreateSerializer(serializers.Serializer):
     billing_key = serializers.CharField(help_text="결제 키")
 
 
+class SubscriptionQuoteItemRequestSerializer(serializers.Serializer):
+    car_id = serializers.IntegerField(help_text="차량 ID")
+    month = serializers.IntegerField(help_text="구독 개월 수")
+
+
+class SubscriptionQuoteRequestSerializer(serializers.Serializer):
+    quotes = SubscriptionQuoteItemRequestSerializer(many=True, help_text="견적할 (차량 ID, 개월 수) 목록 (최대 100개)")
+
+
 class CouponAddSerializer(serializers.Serializer):
     coupon_code = serializers.CharField(help_text="쿠폰 코드")
 
@@ -136,6 +145,28 @@ class GarageSchema:
                     description="구독 가능한 상품만 표시",
                     examples=[OpenApiExample("사용 예시", value=True)]
                 ),
+                OpenApiParameter(
+                    name="pagination",
+                    type=OpenApiTypes.STR,
+                    location=OpenApiParameter.QUERY,
+                    description="페이지네이션 방식 (cursor 지정 시 정렬 필드 + id 기준 커서 페이지네이션)",
+                    enum=["page", "cursor"],
+                    default="page",
+                    examples=[OpenApiExample("커서 모드 예시", value="cursor")]
+                ),
+                OpenApiParameter(
+                    name="cursor",
+                    type=OpenApiTypes.STR,
+                    location=OpenApiParameter.QUERY,
+                    description="pagination_info의 next_cursor / previous_cursor 값",
+                ),
+                OpenApiParameter(
+                    name="with_count",
+                    type=OpenApiTypes.BOOL,
+                    location=OpenApiParameter.QUERY,
+                    description="커서 모드에서 캐시된 전체 개수 추정치 포함 여부",
+                    examples=[OpenApiExample("사용 예시", value=True)]
+                ),
             ],
             'responses': {
                 200: SuccessResponseSerializer,
@@ -233,6 +264,166 @@ class GarageSchema:
             ]
         }
     
+    @staticmethod
+    def get_garage_facets():
+        return {
+            'summary': "차고 필터 집계 조회",
+            'description': "현재 필터 조건에 해당하는 차량 수를 브랜드, 모델, 개월수, 연료 타입, 구독 가능 여부별로 한 번에 조회합니다. 필터 파라미터는 차고 목록 조회와 동일합니다.",
+            'parameters': [
+                OpenApiParameter(
+                    name="brand",
+                    type=OpenApiTypes.STR,
+                    location=OpenApiParameter.QUERY,
+                    description="브랜드 슬러그로 필터링 (여러 개 가능)",
+                    many=True,
+                    examples=[OpenApiExample("브랜드 예시", value=["bmw", "tesla"])]
+                ),
+                OpenApiParameter(
+                    name="model",
+                    type=OpenApiTypes.STR,
+                    location=OpenApiParameter.QUERY,
+                    description="모델 슬러그로 필터링 (여러 개 가능)",
+                    many=True,
+                    examples=[OpenApiExample("모델 예시", value=["bmw-x5-bmw_x5", "tesla-model3-tesla_model3"])]
+                ),
+                OpenApiParameter(
+                    name="month",
+                    type=OpenApiTypes.INT,
+                    location=OpenApiParameter.QUERY,
+                    description="구독 개월수로 필터링 (여러 개 가능)",
+                    many=True,
+                    examples=[OpenApiExample("개월수 예시", value=[12, 24, 36])]
+                ),
+                OpenApiParameter(
+                    name="available_only",
+                    type=OpenApiTypes.BOOL,
+                    location=OpenApiParameter.QUERY,
+                    description="구독 가능한 상품만 집계",
+                    examples=[OpenApiExample("사용 예시", value=True)]
+                ),
+            ],
+            'responses': {
+                200: SuccessResponseSerializer,
+                500: ErrorResponseSerializer,
+            },
+            'examples': [
+                CommonExamples.success_example(
+                    message="차고 필터 집계 조회 성공",
+                    data={
+                        "facets": {
+                            "total": 8,
+                            "brands": [
+                                {"slug": "bmw", "count": 5},
+                                {"slug": "tesla", "count": 3}
+                            ],
+                            "models": [
+                                {"slug": "bmw-x3-bmw_x3", "count": 2},
+                                {"slug": "bmw-x5-bmw_x5", "count": 3},
+                                {"slug": "tesla-model3-tesla_model3", "count": 3}
+                            ],
+                            "months": [
+                                {"month": 1, "count": 8},
+                                {"month": 12, "count": 6}
+                            ],
+                            "fuel_types": [
+                                {"fuel_type": "ELECTRIC", "count": 3},
+                                {"fuel_type": "GASOLINE", "count": 5}
+                            ],
+                            "availability": {"available": 6, "unavailable": 2}
+                        }
+                    }
+                ),
+                CommonExamples.error_example(
+                    message="차고 필터 집계를 불러오는 중 오류가 발생했습니다.",
+                    errors={"detail": "Database connection error"}
+                )
+            ]
+        }
+    
+    @staticmethod
+    def get_garage_search():
+        return {
+            'summary': "차량 검색",
+            'description': "브랜드명, 모델명/코드, 세부 모델, 트림, 색상으로 구독 가능한 차량을 검색합니다. 관련도 순으로 정렬되며 차고 목록 조회와 동일한 필터를 사용할 수 있습니다.",
+            'parameters': [
+                OpenApiParameter(
+                    name="q",
+                    type=OpenApiTypes.STR,
+                    location=OpenApiParameter.QUERY,
+                    description="검색어",
+                    required=True,
+                    examples=[OpenApiExample("검색어 예시", value="그랜저 하이브리드")]
+                ),
+                OpenApiParameter(
+                    name="brand",
+                    type=OpenApiTypes.STR,
+                    location=OpenApiParameter.QUERY,
+                    description="브랜드 슬러그로 필터링 (여러 개 가능)",
+                    many=True,
+                    examples=[OpenApiExample("브랜드 예시", value=["hyundai", "bmw"])]
+                ),
+                OpenApiParameter(
+                    name="model",
+                    type=OpenApiTypes.STR,
+                    location=OpenApiParameter.QUERY,
+                    description="모델 슬러그로 필터링 (여러 개 가능)",
+                    many=True,
+                    examples=[OpenApiExample("모델 예시", value=["hyundai-grandeur"])]
+                ),
+                OpenApiParameter(
+                    name="month",
+                    type=OpenApiTypes.INT,
+                    location=OpenApiParameter.QUERY,
+                    description="구독 개월수로 필터링 (여러 개 가능)",
+                    many=True,
+                    examples=[OpenApiExample("개월수 예시", value=[12, 24, 36])]
+                ),
+                OpenApiParameter(
+                    name="available_only",
+                    type=OpenApiTypes.BOOL,
+                    location=OpenApiParameter.QUERY,
+                    description="구독 가능한 상품만 표시",
+                    examples=[OpenApiExample("사용 예시", value=True)]
+                ),
+            ],
+            'responses': {
+                200: SuccessResponseSerializer,
+                400: ErrorResponseSerializer,
+                500: ErrorResponseSerializer,
+            },
+            'examples': [
+                CommonExamples.success_example(
+                    message="차량 검색 성공",
+                    data={
+                        "cars": [
+                            {
+                                "id": 1,
+                                "sub_model": "2.5 하이브리드",
+                                "trim": "캘리그래피",
+                                "color": "블랙",
+                                "mileage": 12000,
+                                "subscription_fee_1": 900000,
+                                "subscription_fee_12": 750000,
+                                "subscription_fee_minimum": 750000
+                            }
+                        ],
+                        "pagination_info": {
+                            "count": 1,
+                            "next": None,
+                            "previous": None,
+                            "page_size": 20,
+                            "current_page": 1,
+                            "total_pages": 1
+                        }
+                    }
+                ),
+                CommonExamples.error_example(
+                    message="검색어를 입력해주세요.",
+                    errors={"q": "필수 항목입니다."}
+                )
+            ]
+        }
+    
     @staticmethod
     def get_model_list():
         return {
@@ -648,6 +839,46 @@ class CouponSchema:
             ]
         }
     
+    @staticmethod
+    def get_car_coupon_list():
+        return {
+            'summary': "차량 적용 가능 쿠폰 목록 조회",
+            'description': "사용자의 미사용 유효 쿠폰 중 해당 차량(및 차량의 모델/브랜드)에 적용 가능한 쿠폰 목록을 조회합니다.",
+            'responses': {
+                200: SuccessResponseSerializer,
+                401: ErrorResponseSerializer,
+                404: ErrorResponseSerializer,
+                500: ErrorResponseSerializer,
+            },
+            'examples': [
+                CommonExamples.success_example(
+                    message="차량 적용 가능 쿠폰 목록 조회 성공",
+                    data={
+                        "coupons": [
+                            {
+                                "id": 1,
+                                "user": 1,
+                                "coupon": {
+                                    "id": 1,
+                                    "code": "WELCOME10",
+                                    "name": "신규 가입 할인",
+                                    "discount_type": "PERCENTAGE",
+                                    "discount_rate": 10,
+                                    "is_specific": False
+                                },
+                                "used_at": None,
+                                "is_active": True
+                            }
+                        ]
+                    }
+                ),
+                CommonExamples.error_example(
+                    message="요청하신 차량을 찾을 수 없습니다.",
+                    errors={"detail": "Car not found"}
+                )
+            ]
+        }
+
     @staticmethod
     def get_coupon_detail():
         return {
@@ -850,6 +1081,34 @@ class SubscriptionSchema:
             ]
         }
     
+    @staticmethod
+    def create_subscription_quotes():
+        return {
+            'summary': "구독료 일괄 견적",
+            'description': "여러 (차량, 개월 수) 조합의 월 구독료와 총 구독료를 한 번에 조회합니다. 구독 불가 차량이나 해당 구간 요금이 없으면 is_available이 false입니다.",
+            'request': SubscriptionQuoteRequestSerializer,
+            'responses': {
+                200: SuccessResponseSerializer,
+                400: ErrorResponseSerializer,
+                500: ErrorResponseSerializer,
+            },
+            'examples': [
+                CommonExamples.success_example(
+                    message="구독료 견적 조회 성공",
+                    data={
+                        "quotes": [
+                            {"car_id": 1, "month": 12, "fee": 350000, "total_amount": 4200000, "is_available": True},
+                            {"car_id": 2, "month": 2, "fee": None, "total_amount": None, "is_available": False}
+                        ]
+                    }
+                ),
+                CommonExamples.error_example(
+                    message="입력 정보가 올바르지 않습니다.",
+                    errors={"quotes": ["This field is required."]}
+                )
+            ]
+        }
+
     @staticmethod
     def get_subscription_request_detail():
         return {
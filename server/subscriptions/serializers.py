@@ -27,7 +27,10 @@ class SimpleSubscriptionModelSerializer(serializers.ModelSerializer):
         fields = ['id', 'name', 'image', 'front_image', 'rear_image', 'code', 'slug', 'car_count']
     
     def get_car_count(self, obj):
-        return obj.cars.filter(is_active=True, is_subscriptable=True).count()
+        car_count = getattr(obj, 'subscription_car_count', None)
+        if car_count is None:
+            return obj.cars.filter(is_active=True, is_subscriptable=True).count()
+        return car_count
 
 
 class SubscriptionModelSerializer(SimpleSubscriptionModelSerializer):
@@ -190,43 +193,14 @@ class SubscriptionRequestSerializer(serializers.ModelSerializer):
             car = subscription_request.car
             
             # Match month to subscription fee
-            if month >= 96 and car.subscription_fee_96:
-                base_amount_per_month = car.subscription_fee_96
-            elif month >= 84 and car.subscription_fee_84:
-                base_amount_per_month = car.subscription_fee_84
-            elif month >= 72 and car.subscription_fee_72:
-                base_amount_per_month = car.subscription_fee_72
-            elif month >= 60 and car.subscription_fee_60:
-                base_amount_per_month = car.subscription_fee_60
-            elif month >= 48 and car.subscription_fee_48:
-                base_amount_per_month = car.subscription_fee_48
-            elif month >= 36 and car.subscription_fee_36:
-                base_amount_per_month = car.subscription_fee_36
-            elif month >= 24 and car.subscription_fee_24:
-                base_amount_per_month = car.subscription_fee_24
-            elif month >= 12 and car.subscription_fee_12:
-                base_amount_per_month = car.subscription_fee_12
-            elif month >= 6 and car.subscription_fee_6:
-                base_amount_per_month = car.subscription_fee_6
-            elif month >= 3 and car.subscription_fee_3:
-                base_amount_per_month = car.subscription_fee_3
-            elif month >= 1 and car.subscription_fee_1:
-                base_amount_per_month = car.subscription_fee_1
-            else:
+            base_amount_per_month = car.get_subscription_fee(month)
+            if base_amount_per_month is None:
                 raise serializers.ValidationError(f"해당 차량({car.model.brand.name} {car.model.name})의 {month}개월 구독료 정보가 없습니다.")
             
             # Apply coupon discount first
             discounted_amount_per_month = base_amount_per_month
             if user_coupon:
-                coupon = user_coupon.coupon
-                if coupon.discount_type == 'PERCENTAGE':
-                    discount = int(base_amount_per_month * (coupon.discount_rate / 100))
-                    discount_amount = min(discount, coupon.max_discount)
-                    discounted_amount_per_month -= discount_amount
-                elif coupon.discount_type == 'FIXED':
-                    discounted_amount_per_month -= coupon.discount
-                elif coupon.discount_type == 'FREE':
-                    discounted_amount_per_month = 0
+                discounted_amount_per_month = user_coupon.coupon.apply_discount(base_amount_per_month)
             
             # Apply point discount to first month
             first_month_amount = max(0, discounted_amount_per_month - (point_amount if point_amount else 0))
@@ -282,6 +256,19 @@ class SubscriptionSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("Start date must be before end date")
         
         return data
+
+
+# Quote Serializer
+# <-------------------------------------------------------------------------------------------------------------------------------->
+class SubscriptionQuoteItemSerializer(serializers.Serializer):
+    car_id = serializers.IntegerField(min_value=1)
+    month = serializers.IntegerField(min_value=1)
+
+
+class SubscriptionQuoteSerializer(serializers.Serializer):
+    MAX_QUOTES = 100
+
+    quotes = serializers.ListField(child=SubscriptionQuoteItemSerializer(), allow_empty=False, max_length=MAX_QUOTES)
     
 
 # Review Serializer
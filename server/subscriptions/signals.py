@@ -3,11 +3,15 @@ app_name = "subscriptions"
 
 from django.db.models.signals import pre_save, post_save, post_delete
 from django.dispatch import receiver
-from django.db import transaction
+from django.db import models, transaction
+from django.db.models.functions import Greatest
 
-from cars.utils import update_available_from
+from cars.models import Brand, Model, Car
+from cars.utils import update_available_from, defer_car_update
+from cars.bookings import sync_car_booking, delete_car_booking
 
-from .models import SubscriptionRequest, Subscription
+from .models import SubscriptionRequest, Subscription, SubscriptionCoupon, SubscriptionUserCoupon
+from .utils import invalidate_home_feed
 
 # Subscription Request
 # <-------------------------------------------------------------------------------------------------------------------------------->
@@ -45,9 +49,15 @@ def handle_point_transaction(sender, instance, **kwargs):
         instance.point.save()
 
 
+# 예약 구간 동기화는 가능일 재계산보다 먼저 등록해야 한다.
+@receiver(post_save, sender=SubscriptionRequest)
+def sync_car_booking_on_request_save(sender, instance, **kwargs):
+    sync_car_booking('SUBSCRIPTION_REQUEST', instance.id, instance.car_id, instance.start_date, instance.end_date, instance.is_active)
+
+
 @receiver(post_save, sender=SubscriptionRequest)
 def update_car_available_from_on_request_save(sender, instance, **kwargs):
-    update_available_from(instance.car.id)
+    defer_car_update(update_available_from, instance.car_id)
 
 
 @receiver(post_delete, sender=SubscriptionRequest)
@@ -62,9 +72,14 @@ def return_point_on_delete(sender, instance, **kwargs):
         instance.point.delete()
 
 
+@receiver(post_delete, sender=SubscriptionRequest)
+def delete_car_booking_on_request_delete(sender, instance, **kwargs):
+    delete_car_booking('SUBSCRIPTION_REQUEST', instance.id)
+
+
 @receiver(post_delete, sender=SubscriptionRequest)
 def update_car_available_from_on_request_delete(sender, instance, **kwargs):
-    update_available_from(instance.car.id)
+    defer_car_update(update_available_from, instance.car_id)
 
 
 # Subscription
@@ -87,11 +102,45 @@ def handle_request_inactivation(sender, instance, **kwargs):
         transaction.on_commit(inactivate_request_after_commit)
 
 
+# 구독은 활성 여부와 관계없이 기간 동안 차량을 점유한다. (기존 가능일 계산과 동일)
+@receiver(post_save, sender=Subscription)
+def sync_car_booking_on_subscription_save(sender, instance, **kwargs):
+    sync_car_booking('SUBSCRIPTION', instance.id, instance.request.car_id, instance.start_date, instance.end_date)
+
+
 @receiver(post_save, sender=Subscription)
 def update_car_available_from_on_subscription_save(sender, instance, **kwargs):
-    update_available_from(instance.request.car.id)
+    defer_car_update(update_available_from, instance.request.car_id)
+
+
+@receiver(post_delete, sender=Subscription)
+def delete_car_booking_on_subscription_delete(sender, instance, **kwargs):
+    delete_car_booking('SUBSCRIPTION', instance.id)
 
 
 @receiver(post_delete, sender=Subscription)
 def update_car_available_from_on_subscription_delete(sender, instance, **kwargs):
-    update_available_from(instance.request.car.id)
\ No newline at end of file
+    defer_car_update(update_available_from, instance.request.car_id)
+
+
+# Coupon
+# <-------------------------------------------------------------------------------------------------------------------------------->
+# 발급된 쿠폰이 삭제되면 발급/사용 횟수를 되돌린다. 어긋난 행이 있어도 각 횟수는 0 아래로 내려가지 않는다.
+@receiver(post_delete, sender=SubscriptionUserCoupon)
+def release_coupon_counts_on_delete(sender, instance, **kwargs):
+    counts = {'issued_count': Greatest(models.F('issued_count') - 1, 0)}
+    if instance.used_at is not None:
+        counts['redeemed_count'] = Greatest(models.F('redeemed_count') - 1, 0)
+    SubscriptionCoupon.objects.filter(pk=instance.coupon_id).update(**counts)
+
+
+# Home Feed
+# <-------------------------------------------------------------------------------------------------------------------------------->
+@receiver(post_save, sender=Car)
+@receiver(post_delete, sender=Car)
+@receiver(post_save, sender=Model)
+@receiver(post_delete, sender=Model)
+@receiver(post_save, sender=Brand)
+@receiver(post_delete, sender=Brand)
+def invalidate_home_feed_on_catalog_change(sender, instance, **kwargs):
+    transaction.on_commit(invalidate_home_feed)
@@ -1,13 +1,24 @@
 # subscriptions/tasks.py
 app_name = "subscriptions"
 
-from celery import shared_task
-from datetime import timedelta
+import time
+import httpx
+import logging
+import requests
+
+from celery import chord, shared_task
 
 from django.utils import timezone
-from django.db.models import Q
+from django.core.exceptions import ValidationError
+
+from server.settings.base import BILLING_BATCH_SIZE, BILLING_VENDOR_LIMITS, PAYMENT_BATCH_CONCURRENCY
+from payments.models import Payment
+from payments.utils import payment_billing_batch
+from .models import SubscriptionCouponCampaign, SubscriptionInstallment, BillingRun, BillingAttempt
+
+CAMPAIGN_TIME_BUDGET = 30
 
-from .models import Subscription
+logger = logging.getLogger(__name__)
 
 
 from django.core.mail import send_mail
@@ -24,27 +35,165 @@ def send_subscription_email(email, text):
     return True
 
 
-@shared_task
-def perform_billing():
-    now = timezone.now()
-    today = now.date()
-    due_filters = (
-        Q(is_active=True)
-        & Q(start_date__isnull=False)
-        & Q(end_date__gte=today)
-        & Q(schedule_payment_date__lte=today)
+# Recurring Billing
+# <-------------------------------------------------------------------------------------------------------------------------------->
+# 결제 예정 회차를 결제사별 배치 태스크로 나눠 chord로 병렬 실행하고, 모든 결과를 summarize_billing에서 집계한다.
+# 배치 태스크는 CELERY_TASK_ROUTES로 전용 큐(billing_toss, billing_portone)에 보내고, 배치 안의 결제는
+# payment_billing_batch가 한 이벤트 루프에서 BILLING_VENDOR_LIMITS의 동시 호출 수/초당 호출 수 안에서 동시에 호출한다.
+# 결제 시도는 BillingRun/BillingAttempt 원장에 결제사 호출 전에 기록되므로, 실행이 중단돼도 같은 날 다시 실행하면
+# 이미 결제된 회차는 건너뛰고 결과를 모르는 시도는 같은 멱등키로 이어서 처리한다.
+
+# 결제사 응답을 받지 못해 결제 여부를 알 수 없는 오류. 새 멱등키로 재시도하면 이중 결제될 수 있으므로 시도를 PENDING으로 남긴다.
+def is_unknown_outcome(error):
+    cause = error.__cause__ or error.__context__
+    if isinstance(cause, (requests.Timeout, requests.ConnectionError, httpx.TransportError)):
+        return True
+    if isinstance(cause, (requests.HTTPError, httpx.HTTPStatusError)):
+        return cause.response is not None and cause.response.status_code >= 500
+    return False
+
+
+# 결제 결과(Payment 또는 예외)로 시도를 마감한다. 실패는 chord 전체를 실패시키지 않도록 원장에 기록하고 결과로 돌려준다.
+def finish_attempt(installment, attempt, outcome):
+    if isinstance(outcome, Payment) and outcome.status != 'DONE':
+        outcome = ValueError(f"결제가 완료되지 않았습니다: {outcome.status}")
+
+    if isinstance(outcome, Exception):
+        status = 'PENDING' if is_unknown_outcome(outcome) else 'FAILED'
+        attempt.set_result(status, error=str(outcome))
+        return {'installment_id': installment.id, 'status': status, 'error': str(outcome)}
+
+    attempt.complete(installment, outcome)
+    return {'installment_id': installment.id, 'status': 'PAID'}
+
+
+def charge_due_installments(installment_ids, run_id, concurrency=PAYMENT_BATCH_CONCURRENCY, rate_limit=None):
+    today = timezone.now().date()
+    run = BillingRun(pk=run_id)
+    installments = (
+        SubscriptionInstallment.objects
+        .due(today)
+        .filter(id__in=installment_ids)
+        .select_related('subscription__request__user', 'subscription__request__billing__user', 'subscription__request__car__model__brand')
+        .in_bulk()
     )
 
-    subscriptions = Subscription.objects.filter(due_filters)
-    for subscription in subscriptions:
+    results, claimed = [], []
+    for installment_id in installment_ids:
+        installment = installments.get(installment_id)
+        # 다른 실행에서 이미 결제됐거나 해지된 구독의 회차, 또는 다른 워커가 처리 중인 시도
+        attempt = BillingAttempt.claim(run, installment) if installment else None
+        if attempt is None:
+            results.append({'installment_id': installment_id, 'status': 'SKIPPED'})
+            continue
+        claimed.append((installment, attempt))
+
+    # 이전 실행이 결제 후 원장 마감 전에 중단된 시도는 결제사를 다시 호출하지 않고 마감만 한다.
+    payments = {payment.order_id: payment for payment in Payment.objects.filter(order_id__in=[attempt.idempotency_key for _, attempt in claimed])}
+
+    charges, items = [], []
+    for installment, attempt in claimed:
+        subscription = installment.subscription
+        if attempt.idempotency_key in payments:
+            results.append(finish_attempt(installment, attempt, payments[attempt.idempotency_key]))
+            continue
         try:
-            payment_result = subscription.payment()
-            subscription.schedule_payment_date = subscription.start_date + timedelta(days=30)
-            subscription.save(update_fields=["last_payment_date", "schedule_payment_date", "modified_at"])
+            if not subscription.request.billing:
+                raise ValidationError("등록된 결제 수단이 없습니다.")
+            attempt.amount = installment.amount if installment.amount is not None else subscription.get_payment_amount()
+        except Exception as e:
+            results.append(finish_attempt(installment, attempt, e))
+            continue
+        charges.append((installment, attempt))
+        items.append((subscription.request.billing, attempt.amount, subscription.get_order_name(), attempt.idempotency_key))
+
+    # 결제사 호출 전에 금액을 원장에 기록한다.
+    BillingAttempt.objects.bulk_update([attempt for _, attempt in charges], ['amount'])
+    outcomes = payment_billing_batch(items, concurrency=concurrency, rate_limit=rate_limit) if items else []
+    for (installment, attempt), outcome in zip(charges, outcomes):
+        results.append(finish_attempt(installment, attempt, outcome))
+    return results
+
+
+@shared_task
+def charge_toss_installments(installment_ids, run_id):
+    return charge_due_installments(installment_ids, run_id, **BILLING_VENDOR_LIMITS['TOSS'])
+
+
+@shared_task
+def charge_portone_installments(installment_ids, run_id):
+    return charge_due_installments(installment_ids, run_id, **BILLING_VENDOR_LIMITS['PORTONE'])
+
+
+# 결제사별 배치 태스크. 여기 없는 결제사는 전용 큐와 호출 한도가 없으므로 perform_billing이 실행 전에 실패시킨다.
+BILLING_TASKS = {
+    'TOSS': charge_toss_installments,
+    'PORTONE': charge_portone_installments,
+}
+
+
+@shared_task
+def summarize_billing(batches, run_id):
+    run = BillingRun.objects.get(pk=run_id)
+    run.finish()
+
+    results = [result for batch in batches for result in batch]
+    summary = {'billing_date': run.billing_date.isoformat(), 'total': len(results), 'PAID': 0, 'FAILED': 0, 'PENDING': 0, 'SKIPPED': 0}
+    for result in results:
+        summary[result['status']] += 1
+    summary['failed'] = [result for result in results if result['status'] in ('FAILED', 'PENDING')]
+    # 실패했거나 결과를 알 수 없는 결제가 있으면 확인이 필요하므로 경고로 남긴다.
+    level = logging.WARNING if summary['failed'] else logging.INFO
+    logger.log(
+        level, "정기 결제 완료 (%s): 전체 %d건, 성공 %d건, 실패 %d건, 확인 필요 %d건, 건너뜀 %d건",
+        summary['billing_date'], summary['total'], summary['PAID'], summary['FAILED'], summary['PENDING'], summary['SKIPPED'],
+    )
+    return summary
+
+
+@shared_task
+def perform_billing():
+    today = timezone.now().date()
+    due_installments = SubscriptionInstallment.objects.due(today).order_by('due_date').values_list('id', 'subscription__request__billing__vender')
+
+    installment_ids = {}
+    for installment_id, vender in due_installments:
+        installment_ids.setdefault(vender, []).append(installment_id)
+
+    unknown_venders = sorted(set(installment_ids) - set(BILLING_TASKS))
+    if unknown_venders:
+        raise ValueError(f"정기 결제 태스크가 없는 결제사입니다: {', '.join(unknown_venders)}")
+
+    run = BillingRun.start(today)
+    charges = [
+        BILLING_TASKS[vender].s(ids[offset:offset + BILLING_BATCH_SIZE], run.id)
+        for vender, ids in installment_ids.items()
+        for offset in range(0, len(ids), BILLING_BATCH_SIZE)
+    ]
+    if not charges:
+        return summarize_billing([], run.id)
+    chord(charges)(summarize_billing.s(run.id))
+    return sum(len(ids) for ids in installment_ids.values())
+
+
+# 쿠폰 캠페인 발급: 시간 예산 안에서 청크를 반복 발급하고, 남은 대상은 다음 태스크로 넘겨 워커를 오래 점유하지 않는다.
+# 진행 상황은 청크마다 발급과 같은 트랜잭션에 기록되므로 중단되더라도 다시 실행하면 이어서 발급한다.
+@shared_task
+def issue_coupon_campaign(campaign_id):
+    campaign = SubscriptionCouponCampaign.objects.get(pk=campaign_id)
+    if campaign.status == 'COMPLETED':
+        return campaign.issued_count
 
-            if payment_result:
-                payment_result.subscription = subscription
-                payment_result.save(update_fields=["subscription", "modified_at"])
+    campaign.set_status('RUNNING')
+    deadline = time.monotonic() + CAMPAIGN_TIME_BUDGET
+    try:
+        while time.monotonic() < deadline:
+            if not campaign.issue_next_chunk():
+                campaign.set_status('COMPLETED')
+                return campaign.issued_count
+    except Exception as e:
+        campaign.set_status('FAILED', str(e))
+        raise
 
-        except Exception:
-            continue
\ No newline at end of file
+    issue_coupon_campaign.delay(campaign_id)
+    return campaign.issued_count
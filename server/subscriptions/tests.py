@@ -1,3 +1,132 @@
-from django.test import TestCase
+import threading
 
-# Create your tests here.
+from datetime import timedelta
+from unittest import mock
+
+from django.db import connections
+from django.utils import timezone
+from django.test import TestCase, TransactionTestCase, override_settings
+
+from server.testing import LOCMEM_CACHES
+from accounts.models import User
+from cars.models import Brand, Model, Car
+from payments.models import Billing
+
+from .models import SubscriptionCoupon, SubscriptionUserCoupon, SubscriptionRequest, Subscription, BillingRun
+from .tasks import charge_due_installments
+
+THREADS = 8
+
+# Coupon Concurrency
+# <-------------------------------------------------------------------------------------------------------------------------------->
+# 스레드마다 별도 DB 연결로 use_coupon을 동시에 호출해, 사용 횟수 한도(usage_limit)가 조건부 UPDATE로 지켜지는지 확인한다.
+class CouponConcurrencyTest(TransactionTestCase):
+    def setUp(self):
+        self.users = [User.objects.create(email=f'race-{index}@example.com', name='race', username=f'race-{index}') for index in range(THREADS)]
+        self.coupon = SubscriptionCoupon.objects.create(
+            name='race', description='race', discount_type='FIXED', discount=1000,
+            usage_limit=1, valid_to=timezone.now() + timedelta(days=1),
+        )
+
+    def race(self, user_coupon_ids):
+        barrier = threading.Barrier(len(user_coupon_ids))
+        lock = threading.Lock()
+        results = []
+
+        def use_coupon(user_coupon_id):
+            user_coupon = SubscriptionUserCoupon.objects.select_related('coupon').get(pk=user_coupon_id)
+            barrier.wait()
+            try:
+                user_coupon.use_coupon()
+                result = 'used'
+            except ValueError:
+                result = 'rejected'
+            except Exception as e:
+                result = repr(e)
+            finally:
+                connections.close_all()
+            with lock:
+                results.append(result)
+
+        threads = [threading.Thread(target=use_coupon, args=(user_coupon_id,)) for user_coupon_id in user_coupon_ids]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def test_same_user_coupon_is_redeemed_once(self):
+        user_coupon = SubscriptionUserCoupon.objects.create(user=self.users[0], coupon=self.coupon)
+
+        results = self.race([user_coupon.pk] * THREADS)
+
+        self.assertEqual(sorted(results), ['rejected'] * (THREADS - 1) + ['used'])
+        self.coupon.refresh_from_db()
+        self.assertEqual(self.coupon.redeemed_count, 1)
+
+    def test_usage_limit_is_redeemed_once(self):
+        # 발급은 모두 허용한 뒤 한도를 1로 낮춰, 서로 다른 사용자 쿠폰이 동시에 사용되어도 한 번만 집계되는지 확인한다.
+        SubscriptionCoupon.objects.filter(pk=self.coupon.pk).update(usage_limit=THREADS)
+        user_coupons = [SubscriptionUserCoupon.objects.create(user=user, coupon=self.coupon) for user in self.users]
+        SubscriptionCoupon.objects.filter(pk=self.coupon.pk).update(usage_limit=1)
+
+        results = self.race([user_coupon.pk for user_coupon in user_coupons])
+
+        self.assertEqual(sorted(results), ['rejected'] * (THREADS - 1) + ['used'])
+        self.coupon.refresh_from_db()
+        self.assertEqual(self.coupon.redeemed_count, 1)
+        self.assertEqual(SubscriptionUserCoupon.objects.filter(coupon=self.coupon, used_at__isnull=False).count(), 1)
+
+    def test_delete_does_not_make_counts_negative(self):
+        user_coupon = SubscriptionUserCoupon.objects.create(user=self.users[0], coupon=self.coupon)
+        user_coupon.use_coupon()
+        # 사용 횟수만 어긋난 행
+        SubscriptionCoupon.objects.filter(pk=self.coupon.pk).update(redeemed_count=0)
+
+        user_coupon.delete()
+
+        self.coupon.refresh_from_db()
+        self.assertEqual(self.coupon.issued_count, 0)
+        self.assertEqual(self.coupon.redeemed_count, 0)
+
+
+# Installment Amount
+# <-------------------------------------------------------------------------------------------------------------------------------->
+# 생성 시 결제되지 않은 첫 회차는 결제 시점에 get_payment_amount()로 계산해 쿠폰/포인트 할인을 적용해야 한다.
+@override_settings(CACHES=LOCMEM_CACHES)
+class InstallmentAmountTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(email='installment@example.com', name='installment', username='installment')
+        brand = Brand.objects.create(name='Test Brand', slug='test-brand')
+        model = Model.objects.create(brand=brand, name='Model')
+        car = Car.objects.create(model=model, vin_number='INSTALLMENT', retail_price=30000000, is_subscriptable=True, subscription_fee_12=500000)
+        coupon = SubscriptionCoupon.objects.create(
+            name='installment', description='installment', discount_type='FIXED', discount=100000,
+            valid_to=timezone.now() + timedelta(days=1),
+        )
+        user_coupon = SubscriptionUserCoupon.objects.create(user=self.user, coupon=coupon)
+        self.request = SubscriptionRequest.objects.create(user=self.user, car=car, month=12, coupon=user_coupon)
+
+    def charge(self, subscription):
+        # 결제사 호출 대신 결제 금액만 기록한다.
+        charged = []
+        def payment_billing_batch(items, **kwargs):
+            charged.extend(amount for _, amount, *_ in items)
+            return [ValueError("test") for _ in items]
+
+        run = BillingRun.start(timezone.now().date())
+        with mock.patch('subscriptions.tasks.payment_billing_batch', payment_billing_batch):
+            charge_due_installments(list(subscription.installments.filter(sequence=1).values_list('id', flat=True)), run.id)
+        return charged
+
+    def test_unpaid_first_installment_is_discounted(self):
+        # 결제 수단 없이 만든 구독에 나중에 결제 수단을 등록한 경우
+        subscription = Subscription.objects.create(request=self.request, start_date=timezone.now().date())
+        first, second = subscription.installments.order_by('sequence')[:2]
+        self.assertIsNone(first.amount)
+        self.assertEqual(second.amount, 500000)
+
+        self.request.billing = Billing.objects.create(user=self.user, vender='TOSS', billing_key='installment')
+        self.request.save()
+
+        self.assertEqual(self.charge(subscription), [400000])
@@ -1,34 +1,208 @@
 # subscriptions/utils.py
 app_name = 'subscriptions'
 
-from datetime import timedelta
+import json, hashlib
 
-from django.db import models
+from django.db import models, connection
 from django.utils import timezone
+from django.core.cache import cache
 
-from .models import Subscription, SubscriptionRequest
-
-def get_subscription_available_from(car):
-    now = timezone.now().date()
-    latest_end_date = None
-    
-    subscriptions = Subscription.objects.filter(request__car=car, end_date__gte=now)
-    if subscriptions.exists():
-        latest_subscription_end = subscriptions.aggregate(max_end=models.Max('end_date'))['max_end']
-        if latest_subscription_end:
-            latest_end_date = latest_subscription_end
-    
-    subscription_requests = SubscriptionRequest.objects.filter(car=car, end_date__gte=now, is_active=True)
-    if subscription_requests.exists():
-        latest_request_end = subscription_requests.aggregate(max_end=models.Max('end_date'))['max_end']
-        if latest_request_end:
-            if latest_end_date is None or latest_request_end > latest_end_date:
-                latest_end_date = latest_request_end
-    
-    if latest_end_date is None:
-        subscription_available_from = None
-
-    else:
-        subscription_available_from = latest_end_date + timedelta(days=1)
-
-    return subscription_available_from
\ No newline at end of file
+from cars.models import Car, CarSubscriptionFee, CarListing
+from cars.caches import get_catalog_version, get_or_refresh, expire_cached
+from cars.pricing import get_pricing_tables, lookup_fee
+
+GARAGE_FACETS_TIMEOUT = 60
+HOME_FEED_KEY = 'subscriptions:home_feed'
+HOME_FEED_TIMEOUT = 60 * 5
+HOME_FEED_STALE_TIMEOUT = 60 * 60
+
+# Garage Filter
+# <-------------------------------------------------------------------------------------------------------------------------------->
+def get_garage_filters(query_params):
+    # 캐시 키로도 사용되므로 순서/중복에 무관하게 정규화
+    months = {int(month) for month in query_params.getlist('month') if month.isdigit()}
+    return {
+        'brands': sorted(set(query_params.getlist('brand'))),
+        'models': sorted(set(query_params.getlist('model'))),
+        'months': sorted(months & set(Car.SUBSCRIPTION_MONTHS)),
+        'available_only': bool(query_params.get('available_only')),
+    }
+
+
+def filter_garage_cars(cars_queryset, filters):
+    # (brand OR model) AND (month_option_1 OR month_option_2 ...)
+    if filters['brands'] or filters['models']:
+        filter_conditions = models.Q()
+        if filters['brands']:
+            filter_conditions |= models.Q(model__brand__slug__in=filters['brands'])
+        if filters['models']:
+            filter_conditions |= models.Q(model__slug__in=filters['models'])
+        cars_queryset = cars_queryset.filter(filter_conditions)
+
+    # month_option_1 OR month_option_2 ... -> CarSubscriptionFee (months, car) 인덱스 조회
+    if filters['months']:
+        cars_queryset = cars_queryset.filter(
+            models.Exists(CarSubscriptionFee.objects.filter(car=models.OuterRef('pk'), months__in=filters['months']))
+        )
+
+    if filters['available_only']:
+        today = timezone.localdate()
+        cars_queryset = cars_queryset.filter(
+            models.Q(subscription_available_from__isnull=True) |
+            models.Q(subscription_available_from__lte=today)
+        )
+    return cars_queryset
+
+
+def filter_garage_listings(listings_queryset, filters):
+    # filter_garage_cars와 동일한 조건을 CarListing의 비정규화 컬럼에 적용
+    if filters['brands'] or filters['models']:
+        filter_conditions = models.Q()
+        if filters['brands']:
+            filter_conditions |= models.Q(brand_slug__in=filters['brands'])
+        if filters['models']:
+            filter_conditions |= models.Q(model_slug__in=filters['models'])
+        listings_queryset = listings_queryset.filter(filter_conditions)
+
+    if filters['months']:
+        month_conditions = models.Q()
+        for month in filters['months']:
+            month_conditions |= models.Q(subscription_months__contains=[month])
+        listings_queryset = listings_queryset.filter(month_conditions)
+
+    if filters['available_only']:
+        today = timezone.localdate()
+        listings_queryset = listings_queryset.filter(
+            models.Q(subscription_available_from__isnull=True) |
+            models.Q(subscription_available_from__lte=today)
+        )
+    return listings_queryset
+
+
+# Garage Facets
+# <-------------------------------------------------------------------------------------------------------------------------------->
+# GROUPING(brand_slug, model_slug, months, fuel_type, is_available) 값 -> facet 이름
+FACET_GROUPINGS = {
+    0b01111: 'brands',
+    0b10111: 'models',
+    0b11011: 'months',
+    0b11101: 'fuel_types',
+    0b11110: 'availability',
+    0b11111: 'total',
+}
+
+
+def get_garage_facets(filters):
+    key_source = json.dumps(filters, sort_keys=True, separators=(',', ':'))
+    key = f'subscriptions:garage_facets:{get_catalog_version()}:' + hashlib.md5(key_source.encode()).hexdigest()
+    facets = cache.get(key)
+    if facets is not None:
+        return facets
+
+    today = timezone.localdate()
+    cars_queryset = filter_garage_cars(Car.objects.filter(is_active=True, is_subscriptable=True), filters).annotate(
+        brand_slug=models.F('model__brand__slug'),
+        model_slug=models.F('model__slug'),
+        is_available=models.ExpressionWrapper(
+            models.Q(subscription_available_from__isnull=True) | models.Q(subscription_available_from__lte=today),
+            output_field=models.BooleanField()
+        ),
+    ).values('id', 'brand_slug', 'model_slug', 'fuel_type', 'is_available').order_by()
+    base_sql, params = cars_queryset.query.sql_with_params()
+
+    # 필터링된 차량 집합에 대해 모든 facet 카운트를 한 번의 GROUPING SETS 쿼리로 집계
+    # months는 차량당 여러 행으로 조인되므로 COUNT(DISTINCT)로 집계한다.
+    sql = f"""
+        WITH filtered AS ({base_sql})
+        SELECT
+            GROUPING(filtered.brand_slug, filtered.model_slug, fee.months, filtered.fuel_type, filtered.is_available),
+            filtered.brand_slug, filtered.model_slug, fee.months, filtered.fuel_type, filtered.is_available,
+            COUNT(DISTINCT filtered.id)
+        FROM filtered
+        LEFT JOIN {CarSubscriptionFee._meta.db_table} fee ON fee.car_id = filtered.id
+        GROUP BY GROUPING SETS (
+            (filtered.brand_slug), (filtered.model_slug), (fee.months), (filtered.fuel_type), (filtered.is_available), ()
+        )
+    """
+
+    facets = {'total': 0, 'brands': [], 'models': [], 'months': [], 'fuel_types': [], 'availability': {'available': 0, 'unavailable': 0}}
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        for grouping, brand_slug, model_slug, months, fuel_type, is_available, count in cursor.fetchall():
+            facet = FACET_GROUPINGS.get(grouping)
+            if facet == 'total':
+                facets['total'] = count
+            elif facet == 'brands':
+                facets['brands'].append({'slug': brand_slug, 'count': count})
+            elif facet == 'models':
+                facets['models'].append({'slug': model_slug, 'count': count})
+            elif facet == 'months' and months is not None:
+                facets['months'].append({'month': months, 'count': count})
+            elif facet == 'fuel_types':
+                facets['fuel_types'].append({'fuel_type': fuel_type, 'count': count})
+            elif facet == 'availability':
+                facets['availability']['available' if is_available else 'unavailable'] = count
+
+    for facet in ['brands', 'models', 'months', 'fuel_types']:
+        facets[facet].sort(key=lambda item: item.get('month', item.get('slug', item.get('fuel_type'))))
+
+    cache.set(key, facets, GARAGE_FACETS_TIMEOUT)
+    return facets
+
+
+# Home Feed
+# <-------------------------------------------------------------------------------------------------------------------------------->
+def build_home_feed():
+    # 성능 최적화: 3개 간단한 쿼리로 분리 (더 빠름), 미리 렌더링된 CarListing 행 사용
+    base_queryset = CarListing.objects.filter(service='subscriptions')
+
+    # 1. upcoming_cars: 구독 가능일이 오늘 이후인 차량 10개 (가장 빠른 날짜순)
+    today = timezone.localdate()
+    upcoming_cars = list(base_queryset.filter(
+        subscription_available_from__isnull=False,
+        subscription_available_from__gt=today
+    ).order_by('subscription_available_from')[:10])
+    used_ids = {listing.car_id for listing in upcoming_cars}
+
+    # 2. new_cars: 최신 차량 10개 (upcoming_cars 제외)
+    new_cars = list(base_queryset.filter(is_new=True).exclude(car_id__in=used_ids).order_by('-created_at')[:10])
+    used_ids.update(listing.car_id for listing in new_cars)
+
+    # 3. hot_cars: 인기 차량 10개 (위 두 카테고리 제외)
+    hot_cars = list(base_queryset.filter(is_hot=True).exclude(car_id__in=used_ids).order_by('-created_at')[:10])
+
+    return {
+        'new_cars': [listing.payload for listing in new_cars],
+        'hot_cars': [listing.payload for listing in hot_cars],
+        'upcoming_cars': [listing.payload for listing in upcoming_cars]
+    }
+
+
+def get_home_feed():
+    return get_or_refresh(HOME_FEED_KEY, build_home_feed, HOME_FEED_TIMEOUT, HOME_FEED_STALE_TIMEOUT)
+
+
+def invalidate_home_feed():
+    expire_cached(HOME_FEED_KEY, HOME_FEED_STALE_TIMEOUT)
+
+
+# Subscription Quote
+# <-------------------------------------------------------------------------------------------------------------------------------->
+# (car_id, month) 목록을 요청 순서대로 견적한다. 구독 가능 여부 1회 조회 + 요금표 캐시 일괄 조회로 처리한다.
+def quote_subscriptions(quotes):
+    car_ids = {quote['car_id'] for quote in quotes}
+    available_car_ids = set(Car.objects.filter(id__in=car_ids, is_active=True, is_subscriptable=True).values_list('id', flat=True))
+    tables = get_pricing_tables(available_car_ids)
+
+    results = []
+    for quote in quotes:
+        car_id, month = quote['car_id'], quote['month']
+        fee = lookup_fee(tables[car_id], month) if car_id in available_car_ids else None
+        results.append({
+            'car_id': car_id,
+            'month': month,
+            'fee': fee,
+            'total_amount': fee * month if fee is not None else None,
+            'is_available': fee is not None,
+        })
+    return results
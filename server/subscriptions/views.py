@@ -1,28 +1,31 @@
 # subscriptions/views.py
 app_name = 'subscriptions'
 
-from collections import defaultdict
-
 from rest_framework import status
 from rest_framework.views import APIView
 from rest_framework.response import Response
+from rest_framework.exceptions import NotFound
 
 from django.utils import timezone
-from django.db.models import Prefetch, Q
+from django.db.models import Exists, OuterRef
+from django.utils.decorators import method_decorator
 
 from drf_spectacular.utils import extend_schema
 
 from server.utils import SuccessResponseBuilder, ErrorResponseBuilder
-from cars.models import Brand, Model, Car
+from cars.models import Brand, Model, Car, CarListing
+from cars.caches import get_garage_list, catalog_condition
+from cars.projections import project_models
 
 from .tasks import send_subscription_email
+from .utils import get_garage_filters, filter_garage_cars, filter_garage_listings, get_garage_facets, get_home_feed, quote_subscriptions
 from .models import Subscription, SubscriptionRequest, SubscriptionLike, SubscriptionReview, SubscriptionReviewLike, SubscriptionCoupon, SubscriptionUserCoupon
-from .serializers import SimpleSubscriptionModelSerializer, SubscriptionModelListSerializer, SubscriptionModelDetailSerializer, SubscriptionCarDetailSerializer
-from .serializers import SubscriptionSerializer, SubscriptionRequestSerializer
+from .serializers import SimpleSubscriptionModelSerializer, SubscriptionBrandSerializer, SubscriptionCarSerializer, SubscriptionCarDetailSerializer
+from .serializers import SubscriptionSerializer, SubscriptionRequestSerializer, SubscriptionQuoteSerializer
 from .serializers import SubscriptionReviewSerializer, SubscriptionReviewDetailSerializer, SubscriptionModelRequestSerializer
 from .serializers import SubscriptionCouponSerializer, SubscriptionUserCouponSerializer
 from .permissions import AllowAny, IsAuthenticated, IsAuthor, IsSubscripted
-from .paginations import SubscriptionPagination
+from .paginations import SubscriptionPagination, SubscriptionCursorPagination
 from .schemas import GarageSchema, CouponSchema, SubscriptionSchema, ReviewSchema
 
 # Garage APIs
@@ -31,91 +34,47 @@ from .schemas import GarageSchema, CouponSchema, SubscriptionSchema, ReviewSchem
 class GarageAPIView(APIView):
     permission_classes = [AllowAny]
     pagination_class = SubscriptionPagination
+    cursor_pagination_class = SubscriptionCursorPagination
 
     @extend_schema(**GarageSchema.get_garage())
+    @method_decorator(catalog_condition)
     def get(self, request):
-        brand_model_dict = defaultdict(list)
-        for model in Model.objects.select_related('brand').all():
-            brand_model_dict[model.brand].append(model)
-        
-        garage_list = []
-        for brand, models in brand_model_dict.items():
-            garage_item = {
-                'name': brand.name,
-                'slug': brand.slug,
-                'model_list': SimpleSubscriptionModelSerializer(models, many=True).data
-            }
-            garage_list.append(garage_item)
+        garage_list = get_garage_list('subscriptions', SimpleSubscriptionModelSerializer)
 
-        brands = request.query_params.getlist('brand')
-        models = request.query_params.getlist('model')
-        months = request.query_params.getlist('month')
-        available_only = request.query_params.get('available_only')
+        filters = get_garage_filters(request.query_params)
         sort = request.query_params.get('sort')
         order = request.query_params.get('order')
 
         try:
-            cars_queryset = Car.objects.filter(is_active=True, is_subscriptable=True).select_related('model', 'model__brand')
-
-            # (brand OR model) AND (month_option_1 OR month_option_2 ...)
-            if brands or models:
-                filter_conditions = Q()
-                if brands:
-                    filter_conditions |= Q(model__brand__slug__in=brands)
-                if models:
-                    filter_conditions |= Q(model__slug__in=models)
-                cars_queryset = cars_queryset.filter(filter_conditions)
-            
-            if months:
-                month_filters = []
-                for month in months:
-                    if month == '1':
-                        month_filters.append(Q(subscription_fee_1__isnull=False))
-                    elif month == '3':
-                        month_filters.append(Q(subscription_fee_3__isnull=False))
-                    elif month == '6':
-                        month_filters.append(Q(subscription_fee_6__isnull=False))
-                    elif month == '12':
-                        month_filters.append(Q(subscription_fee_12__isnull=False))
-                    elif month == '24':
-                        month_filters.append(Q(subscription_fee_24__isnull=False))
-                    elif month == '36':
-                        month_filters.append(Q(subscription_fee_36__isnull=False))
-                    elif month == '48':
-                        month_filters.append(Q(subscription_fee_48__isnull=False))
-                    elif month == '60':
-                        month_filters.append(Q(subscription_fee_60__isnull=False))
-                    elif month == '72':
-                        month_filters.append(Q(subscription_fee_72__isnull=False))
-                    elif month == '84':
-                        month_filters.append(Q(subscription_fee_84__isnull=False))
-                    elif month == '96':
-                        month_filters.append(Q(subscription_fee_96__isnull=False))
-                
-                if month_filters:
-                    combined_filter = Q()
-                    for filter_condition in month_filters:
-                        combined_filter |= filter_condition
-                    cars_queryset = cars_queryset.filter(combined_filter)
+            # 미리 렌더링된 CarListing 행을 읽어 행마다 시리얼라이저를 실행하지 않는다.
+            listings_queryset = CarListing.objects.filter(service='subscriptions')
+            listings_queryset = filter_garage_listings(listings_queryset, filters)
             
-            if available_only:
-                today = timezone.now().date()
-                cars_queryset = cars_queryset.filter(
-                    Q(subscription_available_from__isnull=True) |
-                    Q(subscription_available_from__lte=today)
-                )
-            
-            if sort:
-                valid_sort_fields = ['subscription_available_from', 'subscription_fee_minimum', 'mileage', 'release_date']
+            valid_sort_fields = ['subscription_available_from', 'subscription_fee_minimum', 'mileage', 'release_date']
+            if sort in valid_sort_fields:
+                if order == 'desc':
+                    sort_field = f'-{sort}'
+                else:
+                    sort_field = sort
+                listings_queryset = listings_queryset.order_by(sort_field)
+
+            # Cursor 모드: (정렬 필드, id) keyset 페이지네이션
+            if request.query_params.get('pagination') == 'cursor' or request.query_params.get('cursor'):
                 if sort in valid_sort_fields:
-                    if order == 'desc':
-                        sort_field = f'-{sort}'
-                    else:
-                        sort_field = sort
-                    cars_queryset = cars_queryset.order_by(sort_field)
-            
+                    paginator = self.cursor_pagination_class(sort, order == 'desc')
+                else:
+                    paginator = self.cursor_pagination_class('created_at', True)
+                page = paginator.paginate_queryset(listings_queryset, request)
+                response_data = {
+                    'garage_list': garage_list,
+                    'cars': [listing.payload for listing in page],
+                    'pagination_info': paginator.get_pagination_info()
+                }
+                response = SuccessResponseBuilder().with_message("차고 목록 조회 성공").with_data(response_data).build()
+                return Response(response, status=status.HTTP_200_OK)
+
             paginator = self.pagination_class()
-            page = paginator.paginate_queryset(cars_queryset, request)
+            page = paginator.paginate_queryset(listings_queryset, request)
             if page is not None:
                 pagination_info = {
                     'count': paginator.page.paginator.count,
@@ -128,7 +87,7 @@ class GarageAPIView(APIView):
 
                 response_data = {
                     'garage_list': garage_list,
-                    'cars': SubscriptionCarDetailSerializer(page, many=True).data,
+                    'cars': [listing.payload for listing in page],
                     'pagination_info': pagination_info
                 }
                 response = SuccessResponseBuilder().with_message("차고 목록 조회 성공").with_data(response_data).build()
@@ -137,38 +96,95 @@ class GarageAPIView(APIView):
             else:
                 response_data = {
                     'garage_list': garage_list,
-                    'cars': SubscriptionCarDetailSerializer(cars_queryset, many=True).data,
+                    'cars': [listing.payload for listing in listings_queryset],
                 }    
                 response = SuccessResponseBuilder().with_message("차고 목록 조회 성공").with_data(response_data).build()
                 return Response(response, status=status.HTTP_200_OK)
-                
+
+        except NotFound as e:
+            response = ErrorResponseBuilder().with_message("유효하지 않은 커서입니다.").with_errors(str(e)).build()
+            return Response(response, status=status.HTTP_404_NOT_FOUND)
+
         except Exception as e:
             response = ErrorResponseBuilder().with_message("차고 목록을 불러오는 중 오류가 발생했습니다.").with_errors(str(e)).build()
             return Response(response, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+# Garage 필터별 차량 수(facet)를 조회하는 API
+class GarageFacetAPIView(APIView):
+    permission_classes = [AllowAny]
+
+    @extend_schema(**GarageSchema.get_garage_facets())
+    @method_decorator(catalog_condition)
+    def get(self, request):
+        try:
+            facets = get_garage_facets(get_garage_filters(request.query_params))
+            response = SuccessResponseBuilder().with_message("차고 필터 집계 조회 성공").with_data({'facets': facets}).build()
+            return Response(response, status=status.HTTP_200_OK)
+
+        except Exception as e:
+            response = ErrorResponseBuilder().with_message("차고 필터 집계를 불러오는 중 오류가 발생했습니다.").with_errors(str(e)).build()
+            return Response(response, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+# Garage 차량을 검색어로 검색하는 API
+class GarageSearchAPIView(APIView):
+    permission_classes = [AllowAny]
+    pagination_class = SubscriptionPagination
+
+    @extend_schema(**GarageSchema.get_garage_search())
+    @method_decorator(catalog_condition)
+    def get(self, request):
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            response = ErrorResponseBuilder().with_message("검색어를 입력해주세요.").with_errors({'q': '필수 항목입니다.'}).build()
+            return Response(response, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            cars_queryset = Car.objects.filter(is_active=True, is_subscriptable=True).select_related('model', 'model__brand')
+            cars_queryset = filter_garage_cars(cars_queryset, get_garage_filters(request.query_params)).search(query)
+
+            paginator = self.pagination_class()
+            page = paginator.paginate_queryset(cars_queryset, request)
+            pagination_info = {
+                'count': paginator.page.paginator.count,
+                'next': paginator.get_next_link(),
+                'previous': paginator.get_previous_link(),
+                'page_size': paginator.page_size,
+                'current_page': paginator.page.number,
+                'total_pages': paginator.page.paginator.num_pages
+            }
+
+            response_data = {
+                'cars': SubscriptionCarDetailSerializer(page, many=True).data,
+                'pagination_info': pagination_info
+            }
+            response = SuccessResponseBuilder().with_message("차량 검색 성공").with_data(response_data).build()
+            return Response(response, status=status.HTTP_200_OK)
+
+        except NotFound as e:
+            response = ErrorResponseBuilder().with_message("유효하지 않은 페이지입니다.").with_errors(str(e)).build()
+            return Response(response, status=status.HTTP_404_NOT_FOUND)
+
+        except Exception as e:
+            response = ErrorResponseBuilder().with_message("차량을 검색하는 중 오류가 발생했습니다.").with_errors(str(e)).build()
+            return Response(response, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
 # 구독 가능한 자동차 모델 목록을 조회하는 API
 class ModelListAPIView(APIView):
     permission_classes = [AllowAny]
 
     @extend_schema(**GarageSchema.get_model_list())
+    @method_decorator(catalog_condition)
     def get(self, request):
         try:
-            models = Model.objects.filter(
-                cars__is_active=True,
-                cars__is_subscriptable=True
-            ).select_related('brand').prefetch_related(
-                Prefetch(
-                    'cars',
-                    queryset=Car.objects.filter(
-                        is_active=True,
-                        is_subscriptable=True
-                    ).prefetch_related('subscription_requests', 'subscription_requests__subscriptions')
-                )
-            ).distinct().order_by('brand__name', 'name')
+            # 시리얼라이저가 쓰는 컬럼만 values()로 읽어 모델별로 묶는다.
+            cars = Car.objects.filter(is_active=True, is_subscriptable=True)
+            models = Model.objects.filter(Exists(cars.filter(model=OuterRef('pk')))).order_by('brand__name', 'name')
+            models_data = project_models(models, cars, SubscriptionBrandSerializer.Meta.fields, SubscriptionCarSerializer.Meta.fields)
             
-            serializer = SubscriptionModelListSerializer(models, many=True)
-            response = SuccessResponseBuilder().with_message("모델 목록 조회 성공").with_data({'models': serializer.data}).build()
+            response = SuccessResponseBuilder().with_message("모델 목록 조회 성공").with_data({'models': models_data}).build()
             return Response(response, status=status.HTTP_200_OK)
 
         except Exception as e:
@@ -181,22 +197,18 @@ class ModelDetailAPIView(APIView):
     permission_classes = [AllowAny]
 
     @extend_schema(**GarageSchema.get_model_detail())
+    @method_decorator(catalog_condition)
     def get(self, request, model_id):
         try:
-            model = Model.objects.filter(
-                id=model_id,
-                cars__is_active=True,
-                cars__is_subscriptable=True
-            ).select_related('brand').prefetch_related(
-                'cars', 'cars__subscription_requests', 'cars__subscription_requests__subscriptions'
-            ).first()
+            available_cars = Car.objects.filter(model=OuterRef('pk'), is_active=True, is_subscriptable=True)
+            models = Model.objects.filter(Exists(available_cars), id=model_id)
+            models_data = project_models(models, Car.objects.all(), SubscriptionBrandSerializer.Meta.fields, SubscriptionCarSerializer.Meta.fields)
             
-            if not model:
+            if not models_data:
                 response = ErrorResponseBuilder().with_message("요청하신 모델을 찾을 수 없거나 구독이 불가능합니다.").build()
                 return Response(response, status=status.HTTP_404_NOT_FOUND)
             
-            serializer = SubscriptionModelDetailSerializer(model)
-            response = SuccessResponseBuilder().with_message("모델 상세 정보 조회 성공").with_data({'model': serializer.data}).build()
+            response = SuccessResponseBuilder().with_message("모델 상세 정보 조회 성공").with_data({'model': models_data[0]}).build()
             return Response(response, status=status.HTTP_200_OK)
             
         except Exception as e:
@@ -209,36 +221,11 @@ class CarListAPIView(APIView):
     permission_classes = [AllowAny]
 
     @extend_schema(**GarageSchema.get_car_list())
+    @method_decorator(catalog_condition)
     def get(self, request):
         try:            
-            # 성능 최적화: 3개 간단한 쿼리로 분리 (더 빠름)
-            base_queryset = Car.objects.filter(is_active=True, is_subscriptable=True).select_related('model', 'model__brand')
-            
-            # 1. upcoming_cars: 구독 가능일이 오늘 이후인 차량 10개 (가장 빠른 날짜순)
-            today = timezone.now().date()
-            upcoming_cars = list(base_queryset.filter(
-                subscription_available_from__isnull=False,
-                subscription_available_from__gt=today
-            ).order_by('subscription_available_from')[:10])
-            used_ids = {car.id for car in upcoming_cars}
-            
-            # 2. new_cars: 최신 차량 10개 (upcoming_cars 제외)
-            new_cars = list(base_queryset.filter(is_new=True).exclude(id__in=used_ids).order_by('-created_at')[:10])
-            used_ids.update(car.id for car in new_cars)
-            
-            # 3. hot_cars: 인기 차량 10개 (위 두 카테고리 제외)
-            hot_cars = list(base_queryset.filter(is_hot=True).exclude(id__in=used_ids).order_by('-created_at')[:10])
-            
-            # 각각 시리얼라이징
-            new_cars_data = SubscriptionCarDetailSerializer(new_cars, many=True).data
-            hot_cars_data = SubscriptionCarDetailSerializer(hot_cars, many=True).data
-            upcoming_cars_data = SubscriptionCarDetailSerializer(upcoming_cars, many=True).data
-            
-            response_data = {
-                'new_cars': new_cars_data,
-                'hot_cars': hot_cars_data,
-                'upcoming_cars': upcoming_cars_data
-            }
+            # 홈 피드는 soft TTL 캐시에서 읽고, 만료 시 하나의 요청만 다시 만든다.
+            response_data = get_home_feed()
             
             response = SuccessResponseBuilder().with_message("차량 목록 조회 성공").with_data(response_data).build()
             return Response(response, status=status.HTTP_200_OK)
@@ -253,6 +240,7 @@ class CarDetailAPIView(APIView):
     permission_classes = [AllowAny]
 
     @extend_schema(**GarageSchema.get_car_detail())
+    @method_decorator(catalog_condition)
     def get(self, request, car_id):
         try:
             car = Car.objects.filter(
@@ -292,6 +280,28 @@ class CouponListAPIView(APIView):
             return Response(response, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+# 차량에 적용 가능한 내 쿠폰 목록을 조회하는 API
+class CarCouponListAPIView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    @extend_schema(**CouponSchema.get_car_coupon_list())
+    def get(self, request, car_id):
+        try:
+            car = Car.objects.select_related('model').get(id=car_id)
+            user_coupons = SubscriptionUserCoupon.objects.filter(user=request.user).usable().applicable_to(car).select_related('coupon')
+            serializer = SubscriptionUserCouponSerializer(user_coupons, many=True)
+            response = SuccessResponseBuilder().with_message("차량 적용 가능 쿠폰 목록 조회 성공").with_data({'coupons': serializer.data}).build()
+            return Response(response, status=status.HTTP_200_OK)
+
+        except Car.DoesNotExist:
+            response = ErrorResponseBuilder().with_message("요청하신 차량을 찾을 수 없습니다.").build()
+            return Response(response, status=status.HTTP_404_NOT_FOUND)
+
+        except Exception as e:
+            response = ErrorResponseBuilder().with_message("쿠폰 목록을 불러오는 중 오류가 발생했습니다.").with_errors(str(e)).build()
+            return Response(response, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
 class CouponDetailAPIView(APIView):
     permission_classes = [IsAuthenticated]
 
@@ -327,6 +337,27 @@ class CouponDetailAPIView(APIView):
 
 # 구독 APIs
 # <-------------------------------------------------------------------------------------------------------------------------------->
+# 여러 차량의 개월 수별 구독료를 한 번에 견적하는 API
+class SubscriptionQuoteAPIView(APIView):
+    permission_classes = [AllowAny]
+
+    @extend_schema(**SubscriptionSchema.create_subscription_quotes())
+    def post(self, request):
+        try:
+            serializer = SubscriptionQuoteSerializer(data=request.data)
+            if serializer.is_valid():
+                quotes = quote_subscriptions(serializer.validated_data['quotes'])
+                response = SuccessResponseBuilder().with_message("구독료 견적 조회 성공").with_data({'quotes': quotes}).build()
+                return Response(response, status=status.HTTP_200_OK)
+            else:
+                response = ErrorResponseBuilder().with_message("입력 정보가 올바르지 않습니다.").with_errors(serializer.errors).build()
+                return Response(response, status=status.HTTP_400_BAD_REQUEST)
+
+        except Exception as e:
+            response = ErrorResponseBuilder().with_message("구독료 견적을 계산하는 중 오류가 발생했습니다.").with_errors(str(e)).build()
+            return Response(response, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
 # 구독 요청 정보를 조회하는 API
 class SubscriptionRequestListAPIView(APIView):
     permission_classes = [IsAuthenticated]
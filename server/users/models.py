@@ -1,12 +1,11 @@
 # users/models.py
 app_name = 'users'
 
-import random, string
-
 from django.db import models
 from django.utils import timezone
 from django.core.exceptions import ValidationError
 
+from server.codes import generate_unique_codes
 from accounts.models import User
 from subscriptions.models import SubscriptionCoupon
 
@@ -129,11 +128,7 @@ class PointCoupon(models.Model):
         return f"{self.name} ({self.code})"
 
     def generate_code(self):
-        characters = string.ascii_uppercase + string.digits
-        while True:
-            code = ''.join(random.choice(characters) for _ in range(8))
-            if not PointCoupon.objects.filter(code=code).exists():
-                return code
+        return generate_unique_codes(PointCoupon, 1)[0]
 
     def clean(self):
         if self.valid_from and self.valid_to and self.valid_from >= self.valid_to: